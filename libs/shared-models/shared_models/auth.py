@@ -0,0 +1,338 @@
+import os
+import hmac
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import APIToken, User, UserPlan
+
+logger = logging.getLogger("shared_models.auth")
+
+# Per-process cache: bounds staleness if an invalidation message is missed
+AUTH_LOCAL_TTL_SECONDS = float(os.environ.get("AUTH_LOCAL_TTL_SECONDS", "60"))
+AUTH_LOCAL_MAX_ENTRIES = int(os.environ.get("AUTH_LOCAL_MAX_ENTRIES", "10000"))
+# Shared Redis cache
+AUTH_REDIS_TTL_SECONDS = int(os.environ.get("AUTH_REDIS_TTL_SECONDS", "3600"))
+# Unknown tokens are remembered for this long, so bad keys do not reach the database
+AUTH_NEGATIVE_TTL_SECONDS = int(os.environ.get("AUTH_NEGATIVE_TTL_SECONDS", "30"))
+# After a token change, lookups that read the database before it do not cache their (stale)
+# result for this long; must exceed the slowest token lookup
+AUTH_CHANGE_TOMBSTONE_SECONDS = int(os.environ.get("AUTH_CHANGE_TOMBSTONE_SECONDS", "60"))
+
+# Redis pub/sub channel announcing token changes: {"token_hash": ...} and/or {"user_id": ...}
+AUTH_INVALIDATION_CHANNEL = "auth_invalidation"
+
+# Identity asserted by the API gateway after validating X-API-Key at the edge.
+# Services sharing IDENTITY_SIGNING_KEY verify it locally instead of looking the token up.
+IDENTITY_HEADER = "X-Vexa-Identity"
+# Example values shipped in docs and env files; a key anyone can read signs nothing
+_PLACEHOLDER_SIGNING_KEYS = {"change-me", "changeme", "secret"}
+
+def _identity_signing_key() -> Optional[str]:
+    key = os.environ.get("IDENTITY_SIGNING_KEY", "").strip()
+    if key.lower() in _PLACEHOLDER_SIGNING_KEYS:
+        logger.warning("IDENTITY_SIGNING_KEY is a placeholder value; signed identities are disabled")
+        return None
+    return key or None
+
+# None disables signing (gateway) and verification (services): every request is looked up by token
+IDENTITY_SIGNING_KEY = _identity_signing_key()
+IDENTITY_TTL_SECONDS = int(os.environ.get("IDENTITY_TTL_SECONDS", "60"))
+
+_REDIS_TOKEN_KEY = "auth:token:{}"
+_REDIS_USER_KEY = "auth:user:{}" # Set of token hashes cached for a user
+_NEGATIVE = "" # Cached marker for an unknown token
+# Markers of recent changes to a token / to all of a user's tokens
+_REDIS_TOKEN_CHANGED_KEY = "auth:changed:token:{}"
+_REDIS_USER_CHANGED_KEY = "auth:changed:user:{}"
+
+# Caches a lookup result unless the token (or, for a known token, its user) changed since the
+# lookup may have read the database. KEYS: token key, token changed key, user changed key, user key
+# ARGV: value, TTL, token hash (user key and user changed key are only passed for known tokens)
+_CACHE_SET_SCRIPT = """
+for i = 2, math.min(#KEYS, 3) do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+if #KEYS == 4 then
+    redis.call('SADD', KEYS[4], ARGV[3])
+    redis.call('EXPIRE', KEYS[4], ARGV[2])
+end
+return 1
+"""
+
+def hash_token(token: str) -> str:
+    """Tokens are cached by hash only, so cache contents and keys never expose them."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _entry(token: APIToken, user: User, plan: Optional[str]) -> dict:
+    return {
+        "token_id": token.id,
+        "user_id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "image_url": user.image_url,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "plan": plan, # None = default plan
+    }
+
+def _to_user(entry: dict) -> User:
+    """Builds a detached User from a cache entry (no relationships loaded)."""
+    return User(
+        id=entry["user_id"],
+        email=entry["email"],
+        name=entry["name"],
+        image_url=entry["image_url"],
+        created_at=datetime.fromisoformat(entry["created_at"]) if entry["created_at"] else None,
+    )
+
+# --- Signed Identity ---
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _signature(payload: str, key: str) -> str:
+    return _b64encode(hmac.new(key.encode(), payload.encode(), hashlib.sha256).digest())
+
+def sign_identity(entry: dict, token: str, key: Optional[str] = None, ttl: int = IDENTITY_TTL_SECONDS) -> str:
+    """
+    Builds the identity header value for a validated token: "<payload>.<HMAC-SHA256>", where the
+    payload carries the user and token ids, an expiry and a hash binding it to the API key.
+    """
+    payload = _b64encode(json.dumps({
+        "uid": entry["user_id"],
+        "tid": entry["token_id"],
+        "th": hash_token(token)[:32],
+        "exp": int(time.time()) + ttl,
+    }, separators=(",", ":")).encode())
+    return f"{payload}.{_signature(payload, key or IDENTITY_SIGNING_KEY)}"
+
+def verify_identity(value: str, token: Optional[str], key: Optional[str] = None) -> Optional[dict]:
+    """
+    Returns {"user_id", "token_id"} if the identity header is authentic, unexpired and issued for
+    the API key sent with it; None otherwise (including when there is no key). Needs no database
+    or Redis access.
+    """
+    key = key or IDENTITY_SIGNING_KEY
+    if not key or not value or not token:
+        return None
+    payload, _, signature = value.partition(".")
+    if not hmac.compare_digest(signature, _signature(payload, key)):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    if not hmac.compare_digest(claims.get("th", ""), hash_token(token)[:32]):
+        return None
+    return {"user_id": claims["uid"], "token_id": claims["tid"]}
+
+class TokenAuthCache:
+    """
+    Resolves API tokens to users through two cache levels in front of the database:
+    a per-process TTL/LRU cache and a Redis cache shared by all services.
+
+    Unknown tokens are cached too (for AUTH_NEGATIVE_TTL_SECONDS). admin-api calls
+    publish_token_change when tokens are created or revoked; every process listening
+    on AUTH_INVALIDATION_CHANNEL then drops the affected local entries.
+    Redis failures degrade to database lookups, never to authentication errors.
+    """
+
+    def __init__(self, redis_client: Any = None):
+        self.redis_client = redis_client
+        # token hash -> (expires_at, entry dict or None for an unknown token)
+        self._local: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self._listener_task: Optional[asyncio.Task] = None
+        self._cache_set = None
+
+    # --- Lifecycle ---
+
+    def start(self, redis_client: Any):
+        """Attaches the Redis client and starts listening for invalidations (call at startup)."""
+        self.redis_client = redis_client
+        self._cache_set = None
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._run_listener())
+
+    async def stop(self):
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+
+    # --- Lookup ---
+
+    async def lookup(self, token: str, db: AsyncSession) -> Optional[dict]:
+        """Returns the cache entry (token_id, user_id, user fields) for a token, or None if it is invalid."""
+        token_hash = hash_token(token)
+        now = time.monotonic()
+
+        cached = self._local.get(token_hash)
+        if cached is not None:
+            expires_at, entry = cached
+            if expires_at > now:
+                self._local.move_to_end(token_hash)
+                return entry
+            del self._local[token_hash]
+
+        found, entry = await self._redis_get(token_hash)
+        if not found:
+            entry = await self._db_lookup(token, db)
+            if not await self._redis_set(token_hash, entry):
+                return entry # Changed meanwhile: answered, but not cached here either
+        self._remember(token_hash, entry, now)
+        return entry
+
+    async def authenticate(self, token: str, db: AsyncSession) -> Optional[User]:
+        """Returns a detached User for a valid token, None otherwise."""
+        entry = await self.lookup(token, db)
+        return _to_user(entry) if entry else None
+
+    async def authenticate_request(self, token: Optional[str], identity: Optional[str], db: AsyncSession) -> Optional[User]:
+        """
+        Authenticates a request forwarded by the gateway by its signed identity header, which
+        must have been issued for the request's API key; falls back to the token lookup when the
+        header is missing or not valid. Without a token the request is not authenticated.
+        The returned User only has its id set when the identity header was used.
+        """
+        if not token:
+            return None
+        if identity:
+            claims = verify_identity(identity, token)
+            if claims:
+                return User(id=claims["user_id"])
+            logger.warning("Invalid or expired identity header, falling back to token lookup")
+        return await self.authenticate(token, db)
+
+    def _remember(self, token_hash: str, entry: Optional[dict], now: float):
+        ttl = AUTH_LOCAL_TTL_SECONDS if entry else min(AUTH_LOCAL_TTL_SECONDS, AUTH_NEGATIVE_TTL_SECONDS)
+        self._local[token_hash] = (now + ttl, entry)
+        self._local.move_to_end(token_hash)
+        while len(self._local) > AUTH_LOCAL_MAX_ENTRIES:
+            self._local.popitem(last=False)
+
+    async def _db_lookup(self, token: str, db: AsyncSession) -> Optional[dict]:
+        result = await db.execute(
+            select(APIToken, User, UserPlan.plan)
+            .join(User, APIToken.user_id == User.id)
+            .outerjoin(UserPlan, UserPlan.user_id == User.id)
+            .where(APIToken.token == token)
+        )
+        token_user = result.first()
+        if not token_user:
+            return None
+        return _entry(*token_user)
+
+    async def _redis_get(self, token_hash: str) -> Tuple[bool, Optional[dict]]:
+        """Returns (found, entry); found is False on a miss or when Redis is unavailable."""
+        if self.redis_client is None:
+            return False, None
+        try:
+            value = await self.redis_client.get(_REDIS_TOKEN_KEY.format(token_hash))
+        except Exception as e:
+            logger.warning(f"Auth cache read failed, falling back to database: {e}")
+            return False, None
+        if value is None:
+            return False, None
+        return True, (json.loads(value) if value else None) # Empty value = cached unknown token
+
+    async def _redis_set(self, token_hash: str, entry: Optional[dict]) -> bool:
+        """
+        Caches a database lookup result in Redis. Returns False if the token or its user changed
+        recently (see publish_token_change): the result may predate the change and is not cached.
+        """
+        if self.redis_client is None:
+            return True
+        keys = [_REDIS_TOKEN_KEY.format(token_hash), _REDIS_TOKEN_CHANGED_KEY.format(token_hash)]
+        if entry:
+            keys += [_REDIS_USER_CHANGED_KEY.format(entry["user_id"]), _REDIS_USER_KEY.format(entry["user_id"])]
+            value, ttl = json.dumps(entry), AUTH_REDIS_TTL_SECONDS
+        else:
+            value, ttl = _NEGATIVE, AUTH_NEGATIVE_TTL_SECONDS
+        try:
+            if self._cache_set is None:
+                self._cache_set = self.redis_client.register_script(_CACHE_SET_SCRIPT)
+            return bool(await self._cache_set(keys=keys, args=[value, ttl, token_hash]))
+        except Exception as e:
+            logger.warning(f"Auth cache write failed: {e}")
+            return True
+
+    # --- Invalidation ---
+
+    def invalidate_local(self, token_hash: Optional[str] = None, user_id: Optional[int] = None):
+        if token_hash:
+            self._local.pop(token_hash, None)
+        if user_id is not None:
+            for cached_hash, (_, entry) in list(self._local.items()):
+                if entry and entry["user_id"] == user_id:
+                    del self._local[cached_hash]
+
+    async def _run_listener(self):
+        while True:
+            try:
+                pubsub = self.redis_client.pubsub()
+                await pubsub.subscribe(AUTH_INVALIDATION_CHANNEL)
+                try:
+                    # Changes may have been missed while disconnected
+                    self._local.clear()
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message and message.get("type") == "message":
+                            data = json.loads(message["data"])
+                            self.invalidate_local(data.get("token_hash"), data.get("user_id"))
+                finally:
+                    await pubsub.unsubscribe(AUTH_INVALIDATION_CHANNEL)
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Auth invalidation listener failed, restarting in 5s: {e}", exc_info=True)
+                await asyncio.sleep(5)
+
+async def publish_token_change(redis_client: Any, token: Optional[str] = None, user_id: Optional[int] = None):
+    """
+    Drops a token (or all of a user's tokens) from the shared cache and tells every
+    process to drop its local copy. Call after the change is committed.
+
+    The change is also marked for AUTH_CHANGE_TOMBSTONE_SECONDS, so a lookup that read the
+    database before the commit cannot cache its result again after the delete (a revoked
+    token would otherwise stay valid until the entry expires).
+    """
+    token_hash = hash_token(token) if token else None
+    try:
+        # Marked first: no entry is cached after this, so the delete below removes them all
+        async with redis_client.pipeline(transaction=True) as pipe:
+            if token_hash:
+                pipe.set(_REDIS_TOKEN_CHANGED_KEY.format(token_hash), 1, ex=AUTH_CHANGE_TOMBSTONE_SECONDS)
+            if user_id is not None:
+                pipe.set(_REDIS_USER_CHANGED_KEY.format(user_id), 1, ex=AUTH_CHANGE_TOMBSTONE_SECONDS)
+            await pipe.execute()
+        keys = []
+        if token_hash:
+            keys.append(_REDIS_TOKEN_KEY.format(token_hash))
+        if user_id is not None:
+            user_key = _REDIS_USER_KEY.format(user_id)
+            keys.extend(_REDIS_TOKEN_KEY.format(h) for h in await redis_client.smembers(user_key))
+            keys.append(user_key)
+        if keys:
+            await redis_client.delete(*keys)
+        message: Dict[str, Any] = {"token_hash": token_hash, "user_id": user_id}
+        await redis_client.publish(AUTH_INVALIDATION_CHANNEL, json.dumps(message))
+    except Exception as e:
+        # Entries still expire after AUTH_REDIS_TTL_SECONDS / AUTH_LOCAL_TTL_SECONDS
+        logger.error(f"Failed to publish token change (user {user_id}): {e}")
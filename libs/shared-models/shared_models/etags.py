@@ -0,0 +1,19 @@
+import hashlib
+from typing import Optional
+
+def make_etag(body: bytes) -> str:
+    """Strong entity tag for a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """True if an If-None-Match header value lists etag (weak comparison, as RFC 7232 requires for GET)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == bare:
+            return True
+    return False
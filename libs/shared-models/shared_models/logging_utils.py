@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Records waiting for the writer thread; when full, new records are dropped rather than blocking
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# LOG_LEVEL, LOG_FORMAT ("text": the classic one-line format, or "json": one object per line,
+# extra fields included) and LOG_SAMPLE_RATES (fraction of records below WARNING kept per
+# logger, e.g. "transcription_collector.ingest=0.01") are read by configure_logging, so
+# values loaded from a .env file beforehand apply
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as JSON lines, including fields passed with `extra=` (e.g. meeting_id)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps `rate` of the records below WARNING (evenly spaced, no randomness); warnings and
+    errors always pass. Kept records carry `sample_rate`, so counts can be scaled back up.
+    Attach it to the logger itself (logger.addFilter) to sample only that logger's records.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self._credit = 1.0 # The first record passes
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        self._credit += self.rate
+        if self._credit < 1.0:
+            return False
+        self._credit -= 1.0
+        record.sample_rate = self.rate
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without blocking and without formatting them, so the
+    logging call costs the caller only the record creation. Records are dropped (and counted)
+    while the queue is full. Arguments are formatted later: do not mutate objects after logging them.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record # Same process: the writer thread formats it
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            notice = logging.LogRecord("shared_models.logging", logging.WARNING, __file__, 0,
+                                       "Log queue full, dropped %d records", (dropped,), None)
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                self.dropped += dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_listener():
+    """Flushes the records still queued; registered to run at interpreter exit."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+def configure_logging(sample_rates: Optional[Dict[str, float]] = None):
+    """
+    Sets up process-wide logging: the root logger hands records to a queue, and a background
+    thread formats and writes them to stderr. sample_rates maps hot-path logger names to the
+    fraction of their sub-WARNING records to keep (LOG_SAMPLE_RATES overrides them).
+    Safe to call more than once (e.g. several services in one process); later calls only add
+    sampling rates.
+    """
+    global _listener
+    rates = {**(sample_rates or {}), **parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", ""))}
+    for name, rate in rates.items():
+        target = logging.getLogger(name)
+        for existing in [f for f in target.filters if isinstance(f, SamplingFilter)]:
+            target.removeFilter(existing)
+        if rate < 1.0:
+            target.addFilter(SamplingFilter(rate))
+    if _listener is not None:
+        return
+
+    root = logging.getLogger()
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    output = logging.StreamHandler(sys.stderr)
+    json_format = os.environ.get("LOG_FORMAT", "text").lower() == "json"
+    output.setFormatter(StructuredFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
@@ -1,5 +1,5 @@
 import sqlalchemy
-from sqlalchemy import (Column, String, Text, Integer, DateTime, Float, ForeignKey, Index)
+from sqlalchemy import (Column, String, Text, Integer, DateTime, Float, ForeignKey, Index, LargeBinary, JSON)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime # Needed for Transcription model default
@@ -45,6 +45,8 @@ class Meeting(Base):
 
     user = relationship("User", back_populates="meetings")
     transcriptions = relationship("Transcription", back_populates="meeting")
+    archive = relationship("MeetingArchive", back_populates="meeting", uselist=False)
+    transcript_document = relationship("TranscriptDocument", back_populates="meeting", uselist=False)
 
     # Optional: Unique constraint on user_id + platform + native_meeting_id
     # __table_args__ = (UniqueConstraint('user_id', 'platform', 'native_meeting_id', name='_user_platform_native_id_uc'),)
@@ -81,3 +83,54 @@ class Transcription(Base):
     
     # Index for efficient querying by meeting_id and start_time
     __table_args__ = (Index('ix_transcription_meeting_start', 'meeting_id', 'start_time'),)
+
+class MeetingArchive(Base):
+    """Marks a meeting whose segments were moved out of `transcriptions` into cold storage."""
+    __tablename__ = "meeting_archives"
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False, unique=True, index=True)
+    storage_key = Column(String(1024), nullable=False) # Object key within the configured blob store
+    segment_count = Column(Integer, nullable=False, default=0)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    meeting = relationship("Meeting", back_populates="archive")
+
+class TranscriptDocument(Base):
+    """Finalized transcript of a finished meeting, stored as one pre-serialized, compressed document."""
+    __tablename__ = "transcript_documents"
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False, unique=True, index=True)
+    content = Column(LargeBinary, nullable=False) # zlib-compressed JSON array of TranscriptionSegment
+    segment_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    meeting = relationship("Meeting", back_populates="transcript_document")
+
+class FilterProfile(Base):
+    """Per-user (optionally per-meeting) transcription filter rules, layered over filter_config.py."""
+    __tablename__ = "filter_profiles"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=True, index=True) # NULL = applies to all of the user's meetings
+    version = Column(Integer, nullable=False, default=1) # Incremented on every update
+    config = Column(JSON, nullable=False) # FilterProfileConfig
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class KeywordSet(Base):
+    """Terms a user wants to be alerted about when they are spoken in any of their meetings."""
+    __tablename__ = "keyword_sets"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    keywords = Column(JSON, nullable=False) # List of terms
+    version = Column(Integer, nullable=False, default=1) # Incremented on every update
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class UserPlan(Base):
+    """Service plan of a user; selects the gateway's rate limits (users without a row are on the default plan)."""
+    __tablename__ = "user_plans"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    plan = Column(String(50), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
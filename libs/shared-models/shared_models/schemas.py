@@ -138,6 +138,24 @@ class TokenResponse(TokenBase):
 class UserDetailResponse(UserResponse):
     tokens: List[TokenResponse] = []
 
+class UserPlanUpdate(BaseModel):
+    plan: str = Field(..., description="Plan name, as configured in the gateway's RATE_LIMIT_PLANS")
+
+    @validator('plan')
+    def validate_plan(cls, v):
+        v = v.strip().lower()
+        if not re.fullmatch(r"[a-z0-9_-]{1,50}", v):
+            raise ValueError("plan must be 1-50 characters of a-z, 0-9, '_' or '-'")
+        return v
+
+class UserPlanResponse(BaseModel):
+    user_id: int
+    plan: str
+    updated_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
 # --- Meeting Schemas --- 
 
 class MeetingBase(BaseModel):
@@ -232,6 +250,108 @@ class TranscriptionResponse(BaseModel): # Doesn't inherit MeetingResponse to avo
         orm_mode = True # Allows creation from ORM models (e.g., joined query result)
         use_enum_values = True
 
+class TranscriptionBatchRequest(BaseModel):
+    """Request for fetching several meetings' transcripts at once."""
+    meetings: List[MeetingBase] = Field(..., min_items=1, description="Meetings to fetch, by platform and native meeting ID")
+
+class TranscriptionBatchResult(BaseModel):
+    """Outcome for one requested meeting: either its transcript or an error."""
+    platform: Platform
+    native_meeting_id: str
+    transcript: Optional[TranscriptionResponse] = None
+    error: Optional[str] = None
+
+    class Config:
+        use_enum_values = True
+
+class TranscriptionBatchResponse(BaseModel):
+    results: List[TranscriptionBatchResult]
+
+# --- Filter Profile Schemas ---
+
+# Redis pub/sub channel admin-api publishes filter profile changes to
+FILTER_PROFILE_CHANNEL = "filter_profiles"
+
+class FilterProfileConfig(BaseModel):
+    """Per-tenant filter rules. Fields left unset fall back to filter_config.py."""
+    additional_patterns: List[str] = Field(default_factory=list, description="Regex patterns of non-informative segments, added to the base patterns")
+    min_character_length: Optional[int] = Field(None, ge=0)
+    min_real_words: Optional[int] = Field(None, ge=0)
+    stopwords: Dict[str, List[str]] = Field(default_factory=dict, description="Stopwords per language code, replacing the configured ones for that language")
+    redaction_patterns: Dict[str, str] = Field(default_factory=dict, description="Extra PII patterns by label; matches are stored as [LABEL]")
+    redaction_terms: List[str] = Field(default_factory=list, description="Words or phrases always redacted before storage (case-insensitive)")
+
+    @validator('additional_patterns', each_item=True)
+    def validate_pattern(cls, v):
+        try:
+            re.compile(v)
+        except re.error as e:
+            raise ValueError(f"Invalid regex pattern '{v}': {e}")
+        return v
+
+    @validator('redaction_patterns')
+    def validate_redaction_patterns(cls, v):
+        for label, pattern in v.items():
+            if not re.fullmatch(r"[A-Za-z][A-Za-z0-9_]*", label):
+                raise ValueError(f"Invalid redaction label '{label}': use letters, digits and underscores")
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid regex pattern '{pattern}': {e}")
+        return v
+
+class FilterProfileResponse(BaseModel):
+    id: int
+    user_id: int
+    meeting_id: Optional[int]
+    version: int
+    config: FilterProfileConfig
+    updated_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+# --- Keyword Alert Schemas ---
+
+# Redis pub/sub channel announcing keyword set changes: {"set_id": ...}
+KEYWORD_SET_CHANNEL = "keyword_sets"
+# Redis stream receiving keyword hits
+KEYWORD_HITS_STREAM = "keyword_hits"
+
+class KeywordSetCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    keywords: List[str] = Field(..., min_items=1, description="Terms to alert on; matched as whole words, case-insensitively")
+
+    @validator('keywords')
+    def validate_keywords(cls, v):
+        keywords = []
+        for keyword in v:
+            keyword = " ".join(keyword.split())
+            if not keyword:
+                raise ValueError("Keywords must not be empty")
+            if keyword not in keywords:
+                keywords.append(keyword)
+        return keywords
+
+class KeywordSetResponse(BaseModel):
+    id: int
+    name: str
+    keywords: List[str]
+    version: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+class KeywordSetListResponse(BaseModel):
+    keyword_sets: List[KeywordSetResponse]
+
+class BulkExportFormat(str, Enum):
+    """Output formats of the bulk transcript export."""
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
 # --- Utility Schemas --- 
 
 class HealthResponse(BaseModel):
@@ -244,4 +364,18 @@ class ErrorResponse(BaseModel):
     detail: str # Standard FastAPI error response uses 'detail'
 
 class MeetingListResponse(BaseModel):
-    meetings: List[MeetingResponse] 
\ No newline at end of file
+    meetings: List[MeetingResponse] 
+
+class BotStatusResponse(BaseModel):
+    """The latest bot launched for a meeting and the state of its container."""
+    meeting: MeetingResponse
+    container_status: Optional[str] = Field(None, description="Docker container status (e.g. 'running', 'exited'), None if the container is gone or unknown")
+    running: bool = False
+    started_at: Optional[datetime] = None
+    exit_code: Optional[int] = None
+
+class MeetingViewResponse(BaseModel):
+    """Everything a meeting page shows, fetched in one request: the transcript (or its tail) and bot state."""
+    transcript: Optional[TranscriptionResponse] = None
+    bot: Optional[BotStatusResponse] = None
+    errors: Dict[str, str] = Field(default_factory=dict, description="Parts that could not be fetched ('transcript', 'bot') and why")
@@ -0,0 +1,110 @@
+import zlib
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional, Sequence, Any, Iterable, Iterator
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Meeting, Transcription, TranscriptDocument
+from .schemas import MeetingResponse, TranscriptionResponse, TranscriptionSegment
+
+logger = logging.getLogger("shared_models.transcripts")
+
+# Segments whose start times differ by less than this are revisions of the same segment
+REVISION_EPSILON = 0.05
+
+def merge_segment_revisions(segments: Sequence[Any]) -> List[Any]:
+    """
+    Collapses the overlapping revisions WhisperLive sends for the same speech.
+
+    Args:
+        segments: Objects with start_time, end_time and created_at attributes (e.g. Transcription rows)
+
+    Returns:
+        The segments ordered by start_time, keeping only the latest revision of each segment
+        and dropping fragments fully covered by a neighbouring segment.
+    """
+    ordered = sorted(segments, key=lambda s: (s.start_time, s.created_at or datetime.min))
+    return list(iter_merged_revisions(ordered))
+
+def iter_merged_revisions(ordered: Iterable[Any]) -> Iterator[Any]:
+    """
+    Streaming form of merge_segment_revisions for input already ordered by (start_time, created_at).
+    Holds back only one segment, so it can run over a server-side cursor.
+    """
+    previous = None
+    for segment in ordered:
+        if previous is not None:
+            if segment.start_time - previous.start_time < REVISION_EPSILON:
+                # Same segment re-sent - the later revision wins
+                previous = segment
+                continue
+            if segment.end_time <= previous.end_time + REVISION_EPSILON:
+                # Fragment already covered by the previous segment
+                continue
+            yield previous
+        previous = segment
+    if previous is not None:
+        yield previous
+
+def serialize_segments(segments: Sequence[Any]) -> bytes:
+    """Serializes segments exactly as the transcript API renders them (by alias)."""
+    return ("[" + ",".join(TranscriptionSegment.from_orm(s).json(by_alias=True) for s in segments) + "]").encode()
+
+def serialize_segment_dicts(segments: Sequence[dict]) -> bytes:
+    """Same as serialize_segments, for segment dicts (e.g. read back from an archive)."""
+    return ("[" + ",".join(TranscriptionSegment.parse_obj(s).json(by_alias=True) for s in segments) + "]").encode()
+
+def compress_document(segments_json: bytes) -> bytes:
+    return zlib.compress(segments_json, 6)
+
+def decompress_document(content: bytes) -> bytes:
+    return zlib.decompress(content)
+
+def render_transcript_response(meeting: Meeting, segments_json: bytes) -> bytes:
+    """
+    Builds a TranscriptionResponse body around an already serialized segment array,
+    so finalized transcripts are returned without re-validating every segment.
+    """
+    meeting_details = MeetingResponse.from_orm(meeting).dict()
+    meeting_details["segments"] = []
+    header = TranscriptionResponse(**meeting_details).json(exclude={"segments"})
+    return header[:-1].encode() + b', "segments": ' + segments_json + b"}"
+
+def load_document_segments(document: TranscriptDocument) -> List[dict]:
+    """Decodes a finalized document back into segment dicts (keys by alias)."""
+    return json.loads(decompress_document(document.content))
+
+async def finalize_meeting_transcript(db: AsyncSession, meeting_id: int) -> Optional[TranscriptDocument]:
+    """
+    Merges a meeting's segment revisions into one compressed transcript document.
+    Replaces any existing document. Returns None if the meeting has no segments.
+    """
+    result = await db.execute(
+        select(Transcription).where(Transcription.meeting_id == meeting_id).order_by(Transcription.start_time)
+    )
+    segments = result.scalars().all()
+    if not segments:
+        logger.info(f"No segments to finalize for meeting {meeting_id}")
+        return None
+
+    merged = merge_segment_revisions(segments)
+    segments_json = serialize_segments(merged)
+
+    await db.execute(delete(TranscriptDocument).where(TranscriptDocument.meeting_id == meeting_id))
+    document = TranscriptDocument(
+        meeting_id=meeting_id,
+        content=compress_document(segments_json),
+        segment_count=len(merged),
+        created_at=datetime.utcnow()
+    )
+    db.add(document)
+    await db.commit()
+    logger.info(f"Finalized transcript for meeting {meeting_id}: {len(segments)} rows merged into {len(merged)} segments ({len(document.content)} bytes)")
+    return document
+
+async def invalidate_transcript_document(db: AsyncSession, meeting_id: int):
+    """Drops a meeting's finalized document. Does not commit; call within the writing transaction."""
+    await db.execute(delete(TranscriptDocument).where(TranscriptDocument.meeting_id == meeting_id))
@@ -2,29 +2,36 @@ import logging
 import secrets
 import string
 import os
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Security
+import json
+import redis.asyncio as aioredis
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Security, Query
 from fastapi.security import APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List # Import List for response model
+from typing import List, Optional # Import List for response model
 
 # Import shared models and schemas
-from shared_models.models import User, APIToken, Base # Import Base for init_db
+from shared_models.models import User, APIToken, Meeting, FilterProfile, UserPlan, Base # Import Base for init_db
 from shared_models.schemas import UserCreate, UserResponse, TokenResponse, UserDetailResponse # Import required schemas
+from shared_models.schemas import UserPlanUpdate, UserPlanResponse
+from shared_models.schemas import FilterProfileConfig, FilterProfileResponse, FILTER_PROFILE_CHANNEL
 
 # Database utilities (needs to be created)
 from shared_models.database import get_db, init_db # New import
+from shared_models.auth import publish_token_change
+from shared_models.logging_utils import configure_logging
 
 # Logging configuration
-logging.basicConfig(
-    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+configure_logging()
 logger = logging.getLogger("admin_api")
 
 # App initialization
 app = FastAPI(title="Vexa Admin API")
 
+# Redis is used to notify other services of configuration changes
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+redis_client = None
+
 # Security - Reuse logic from bot-manager/auth.py for admin token verification
 API_KEY_HEADER = APIKeyHeader(name="X-Admin-API-Key", auto_error=False) # Use a distinct header
 ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN") # Read from environment
@@ -103,10 +110,118 @@ async def create_token_for_user(user_id: int, db: AsyncSession = Depends(get_db)
     await db.commit()
     await db.refresh(db_token)
     logger.info(f"Admin created token for user {user_id} ({user.email})")
+    # Clears any cached "unknown token" entry for the new value
+    await publish_token_change(redis_client, token=token_value)
     # Use TokenResponse for consistency with schema definition (datetime object)
     return TokenResponse.from_orm(db_token)
 
-# TODO: Add endpoints for GET /users/{id}, DELETE /users/{id}, DELETE /tokens/{token_value}
+@router.delete("/tokens/{token_id}",
+               status_code=status.HTTP_204_NO_CONTENT,
+               summary="Revoke an API token")
+async def revoke_token(token_id: int, db: AsyncSession = Depends(get_db)):
+    db_token = await db.get(APIToken, token_id)
+    if not db_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Token not found")
+    token_value, user_id = db_token.token, db_token.user_id
+    await db.delete(db_token)
+    await db.commit()
+    logger.info(f"Admin revoked token {token_id} of user {user_id}")
+    # Services cache tokens; drop it everywhere so it stops working immediately
+    await publish_token_change(redis_client, token=token_value)
+
+@router.put("/users/{user_id}/plan",
+            response_model=UserPlanResponse,
+            summary="Set a user's plan (selects the gateway rate limits)")
+async def set_user_plan(user_id: int, update: UserPlanUpdate, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    user_plan = await db.get(UserPlan, user_id)
+    if user_plan:
+        user_plan.plan = update.plan
+    else:
+        user_plan = UserPlan(user_id=user_id, plan=update.plan)
+        db.add(user_plan)
+    await db.commit()
+    await db.refresh(user_plan)
+    logger.info(f"Admin set plan '{update.plan}' for user {user_id}")
+    # The plan is part of cached token entries
+    await publish_token_change(redis_client, user_id=user_id)
+    return UserPlanResponse.from_orm(user_plan)
+
+@router.delete("/users/{user_id}/plan",
+               status_code=status.HTTP_204_NO_CONTENT,
+               summary="Reset a user to the default plan")
+async def reset_user_plan(user_id: int, db: AsyncSession = Depends(get_db)):
+    user_plan = await db.get(UserPlan, user_id)
+    if not user_plan:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User has no plan set")
+    await db.delete(user_plan)
+    await db.commit()
+    logger.info(f"Admin reset user {user_id} to the default plan")
+    await publish_token_change(redis_client, user_id=user_id)
+
+async def publish_filter_profile_change(profile_id: int, version: Optional[int]):
+    """Tells transcription collectors to reload a filter profile (version None = deleted)."""
+    try:
+        await redis_client.publish(FILTER_PROFILE_CHANNEL, json.dumps({"profile_id": profile_id, "version": version}))
+    except Exception as e:
+        # Collectors also reload all profiles periodically, so the change still propagates
+        logger.error(f"Failed to publish filter profile change for profile {profile_id}: {e}")
+
+@router.put("/users/{user_id}/filter-profile",
+            response_model=FilterProfileResponse,
+            summary="Create or update a user's transcription filter profile")
+async def upsert_filter_profile(
+    user_id: int,
+    config: FilterProfileConfig,
+    meeting_id: Optional[int] = Query(None, description="Restrict the profile to one of the user's meetings"),
+    db: AsyncSession = Depends(get_db)
+):
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if meeting_id is not None:
+        meeting = await db.get(Meeting, meeting_id)
+        if not meeting or meeting.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meeting not found for this user")
+
+    result = await db.execute(
+        select(FilterProfile).where(FilterProfile.user_id == user_id, FilterProfile.meeting_id == meeting_id)
+    )
+    profile = result.scalars().first()
+    if profile:
+        profile.config = config.dict()
+        profile.version = profile.version + 1
+    else:
+        profile = FilterProfile(user_id=user_id, meeting_id=meeting_id, version=1, config=config.dict())
+        db.add(profile)
+    await db.commit()
+    await db.refresh(profile)
+    logger.info(f"Admin set filter profile {profile.id} v{profile.version} for user {user_id} (meeting: {meeting_id})")
+    await publish_filter_profile_change(profile.id, profile.version)
+    return FilterProfileResponse.from_orm(profile)
+
+@router.get("/users/{user_id}/filter-profiles",
+            response_model=List[FilterProfileResponse],
+            summary="List a user's transcription filter profiles")
+async def list_filter_profiles(user_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(FilterProfile).where(FilterProfile.user_id == user_id))
+    return [FilterProfileResponse.from_orm(p) for p in result.scalars().all()]
+
+@router.delete("/filter-profiles/{profile_id}",
+               status_code=status.HTTP_204_NO_CONTENT,
+               summary="Delete a transcription filter profile")
+async def delete_filter_profile(profile_id: int, db: AsyncSession = Depends(get_db)):
+    profile = await db.get(FilterProfile, profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Filter profile not found")
+    await db.delete(profile)
+    await db.commit()
+    logger.info(f"Admin deleted filter profile {profile_id}")
+    await publish_filter_profile_change(profile_id, None)
+
+# TODO: Add endpoints for GET /users/{id}, DELETE /users/{id}
 
 # Include the router in the main app
 app.include_router(router)
@@ -114,10 +229,19 @@ app.include_router(router)
 # Add startup event to initialize DB (if needed for this service)
 @app.on_event("startup")
 async def startup_event():
+    global redis_client
     logger.info("Starting up Admin API...")
     # Requires database_utils.py to be created in admin-api/app
     await init_db() 
     logger.info("Database initialized.")
+    if redis_client is None: # Already set when running in monolith mode
+        redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+        logger.info(f"Redis client created for {REDIS_URL}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if redis_client:
+        await redis_client.close()
 
 # Root endpoint (optional)
 @app.get("/")
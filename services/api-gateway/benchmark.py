@@ -0,0 +1,132 @@
+"""
+Latency and memory benchmark for the gateway's proxy path.
+
+Starts a synthetic upstream and the gateway as separate uvicorn processes, sends
+requests through the gateway's /admin pass-through route (no API key lookup needed)
+and reports time to first byte and total latency percentiles, plus the gateway's
+peak resident memory.
+
+Usage (from services/api-gateway):
+    python benchmark.py --size-mb 50 --requests 100 --concurrency 4
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+CHUNK = b"x" * 65536
+
+async def upstream_app(scope, receive, send):
+    """Synthetic upstream: GET /admin/blob?size=<bytes> streams that many bytes in 64 KiB chunks."""
+    if scope["type"] != "http":
+        return
+    query = dict(p.split("=", 1) for p in scope["query_string"].decode().split("&") if "=" in p)
+    size = int(query.get("size", "0"))
+    await send({
+        "type": "http.response.start", "status": 200,
+        "headers": [(b"content-type", b"application/octet-stream"), (b"content-length", str(size).encode())],
+    })
+    remaining = size
+    while remaining > 0:
+        chunk = CHUNK[:min(remaining, len(CHUNK))]
+        remaining -= len(chunk)
+        await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+    if size == 0:
+        await send({"type": "http.response.body", "body": b""})
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+
+async def wait_ready(url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+def peak_rss_mb(pid: int) -> float:
+    """Peak resident set size (VmHWM) of a process, Linux only."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+async def run_load(url: str, requests: int, concurrency: int):
+    ttfb, total = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=None) as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                async with client.stream("GET", url) as response:
+                    first = None
+                    async for _ in response.aiter_raw():
+                        if first is None:
+                            first = time.perf_counter()
+                    response.raise_for_status()
+                end = time.perf_counter()
+                ttfb.append((first or end) - start)
+                total.append(end - start)
+        await asyncio.gather(*[one() for _ in range(requests)])
+    return ttfb, total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=50, help="Response size per request")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    upstream_port, gateway_port = free_port(), free_port()
+    env = {**os.environ, "PYTHONPATH": here, "ADMIN_API_URL": f"http://127.0.0.1:{upstream_port}"}
+    upstream = start_server("benchmark:upstream_app", upstream_port, env)
+    gateway = start_server("main:app", gateway_port, env)
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{upstream_port}/admin/blob"))
+        asyncio.run(wait_ready(f"http://127.0.0.1:{gateway_port}/"))
+        baseline_rss = peak_rss_mb(gateway.pid)
+        size = int(args.size_mb * 1024 * 1024)
+        url = f"http://127.0.0.1:{gateway_port}/admin/blob?size={size}"
+        started = time.perf_counter()
+        ttfb, total = asyncio.run(run_load(url, args.requests, args.concurrency))
+        elapsed = time.perf_counter() - started
+
+        print(f"{args.requests} x {args.size_mb} MB through the gateway, concurrency {args.concurrency}")
+        print(f"  time to first byte: p50 {percentile(ttfb, 50) * 1000:8.1f} ms   p99 {percentile(ttfb, 99) * 1000:8.1f} ms")
+        print(f"  total latency:      p50 {percentile(total, 50) * 1000:8.1f} ms   p99 {percentile(total, 99) * 1000:8.1f} ms")
+        print(f"  throughput:         {args.requests * args.size_mb / elapsed:8.1f} MB/s")
+        print(f"  gateway peak RSS:   {peak_rss_mb(gateway.pid):8.1f} MB (idle {baseline_rss:.1f} MB)")
+    finally:
+        gateway.terminate()
+        upstream.terminate()
+        gateway.wait()
+        upstream.wait()
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,73 @@
 import uvicorn
-from fastapi import FastAPI, Request, Response, HTTPException, status, Depends
+from fastapi import FastAPI, Request, Response, HTTPException, status, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import StreamingResponse
+import anyio
 from fastapi.security import APIKeyHeader
 import httpx
 import os
+import time
+import asyncio
+import logging
+import redis.asyncio as aioredis
 from dotenv import load_dotenv
 import json # For request body processing
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple, Union
 
 # Import schemas for documentation
 from shared_models.schemas import (
     MeetingCreate, MeetingResponse, MeetingListResponse, # Updated/Added Schemas
+    BotStatusResponse, MeetingViewResponse,
     TranscriptionResponse, TranscriptionSegment,
+    TranscriptionBatchRequest, TranscriptionBatchResponse,
+    KeywordSetCreate, KeywordSetResponse, KeywordSetListResponse,
     UserCreate, UserResponse, TokenResponse, UserDetailResponse, # Admin Schemas
     ErrorResponse,
     Platform # Import Platform enum for path parameters
 )
+from shared_models.auth import TokenAuthCache, sign_identity, IDENTITY_HEADER, IDENTITY_SIGNING_KEY
+from shared_models.database import async_session_local
+from shared_models.etags import etag_matches
+from shared_models.logging_utils import configure_logging
+from upstreams import UpstreamPool, UpstreamError
+from response_cache import ResponseCache, CachedResponse, Uncached
+from rate_limit import RateLimiter, route_class
 
 load_dotenv()
 
+# Per-request logs go to api_gateway.proxy, sampled when DEBUG is on (see LOG_SAMPLE_RATES)
+configure_logging(sample_rates={"api_gateway.proxy": 0.1})
+logger = logging.getLogger("api_gateway")
+proxy_logger = logging.getLogger("api_gateway.proxy")
+
 # Configuration from environment variables
 ADMIN_API_URL = os.getenv("ADMIN_API_URL", "http://admin-api:8001")
 BOT_MANAGER_URL = os.getenv("BOT_MANAGER_URL", "http://bot-manager:8080")
 TRANSCRIPTION_COLLECTOR_URL = os.getenv("TRANSCRIPTION_COLLECTOR_URL", "http://transcription-collector:8000")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# Deadlines for an upstream's response headers, including retries (streamed bodies are then
+# bounded by the pool's per-chunk read timeout)
+GATEWAY_READ_TIMEOUT = float(os.getenv("GATEWAY_READ_TIMEOUT", "10"))
+GATEWAY_WRITE_TIMEOUT = float(os.getenv("GATEWAY_WRITE_TIMEOUT", "30"))
+GATEWAY_BULK_TIMEOUT = float(os.getenv("GATEWAY_BULK_TIMEOUT", "60"))
+
+# Each *_URL may list several endpoints (comma-separated); requests are balanced across them
+admin_api = UpstreamPool("admin-api", ADMIN_API_URL, "ADMIN_API")
+bot_manager = UpstreamPool("bot-manager", BOT_MANAGER_URL, "BOT_MANAGER")
+transcription_collector = UpstreamPool("transcription-collector", TRANSCRIPTION_COLLECTOR_URL, "TRANSCRIPTION_COLLECTOR")
+UPSTREAMS = (admin_api, bot_manager, transcription_collector)
+
+# Read endpoints polled by dashboards are cached per user (see forward_cached_request)
+response_cache = ResponseCache()
+
+# Per-user request rates and concurrency, shared across gateway replicas through Redis
+rate_limiter = RateLimiter()
+
+# API keys are validated once, here; upstream services trust the signed identity header
+auth_cache = TokenAuthCache()
 
 # Response Models
 # class BotResponseModel(BaseModel): ...
@@ -56,7 +99,7 @@ app = FastAPI(
     1.  **`X-API-Key`**: Required for all regular client operations (e.g., managing bots, getting transcripts). Obtain your key from an administrator.
     2.  **`X-Admin-API-Key`**: Required *only* for administrative endpoints (prefixed with `/admin`). This key is configured server-side.
     
-    Include the appropriate header in your requests.
+    Include the appropriate header in your requests. Client keys are validated by the gateway itself, so invalid keys are rejected here with `403` before reaching any service.
     """,
     version="1.2.0", # Incremented version
     contact={
@@ -123,60 +166,282 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- HTTP Client --- 
-# Use a single client instance for connection pooling
+# --- HTTP Clients --- 
+# One connection pool per upstream service
 @app.on_event("startup")
 async def startup_event():
-    app.state.http_client = httpx.AsyncClient()
+    for upstream in UPSTREAMS:
+        await upstream.open()
+    if getattr(app.state, "redis_client", None) is None: # Already set when running in monolith mode
+        app.state.redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+    auth_cache.start(app.state.redis_client)
+    rate_limiter.start(app.state.redis_client)
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    await app.state.http_client.aclose()
+    for upstream in UPSTREAMS:
+        await upstream.aclose()
+    await auth_cache.stop()
+    await app.state.redis_client.close()
+
+async def authenticate_at_edge(api_key: Optional[str]) -> Dict[str, Any]:
+    """Validates a client API key through the shared auth cache; bad keys never reach upstream services."""
+    if not api_key:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing API token")
+    async with async_session_local() as db:
+        entry = await auth_cache.lookup(api_key, db)
+    if not entry:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid API token")
+    return entry
 
 # --- Helper for Forwarding --- 
-async def forward_request(client: httpx.AsyncClient, method: str, url: str, request: Request) -> Response:
-    # Copy original headers, converting to a standard dict
-    # Exclude host, content-length, transfer-encoding as they are handled by httpx/server
-    excluded_headers = {"host", "content-length", "transfer-encoding"}
-    headers = {k.lower(): v for k, v in request.headers.items() if k.lower() not in excluded_headers}
-    
-    # Debug logging for original request headers
-    print(f"DEBUG: Original request headers: {dict(request.headers)}")
-    
-    # Determine target service based on URL path prefix
-    is_admin_request = url.startswith(f"{ADMIN_API_URL}/admin")
+
+# Hop-by-hop headers (RFC 7230 6.1) apply to a single connection and are never forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+}
+
+def end_to_end_headers(headers) -> Dict[str, str]:
+    """Drops hop-by-hop headers, including any named in the Connection header."""
+    connection_tokens = {t.strip().lower() for t in headers.get("connection", "").split(",") if t.strip()}
+    excluded = HOP_BY_HOP_HEADERS | connection_tokens
+    return {k.lower(): v for k, v in headers.items() if k.lower() not in excluded}
+
+async def enforce_rate_limits(request: Request, entry: Dict[str, Any], path: str):
+    """
+    Applies the caller's plan limits for the route class, raising 429 when exceeded. Stores the
+    rate limit headers and any concurrency slot in request.state; release the slot with
+    release_concurrency_slot once the response is done.
+    """
+    cls = route_class(request.method, path)
+    decision = await rate_limiter.check(entry["user_id"], entry.get("plan"), cls)
+    request.state.rate_limit_headers = decision.headers()
+    if not decision.allowed:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded",
+                            headers=request.state.rate_limit_headers)
+    allowed, slot = await rate_limiter.acquire_slot(entry["user_id"], entry.get("plan"), cls)
+    if not allowed:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many concurrent requests",
+                            headers={**request.state.rate_limit_headers, "Retry-After": "1"})
+    request.state.concurrency_slot = (entry["user_id"], cls, slot)
+
+async def release_concurrency_slot(request: Request):
+    user_id, cls, slot = getattr(request.state, "concurrency_slot", (None, None, None))
+    await rate_limiter.release_slot(user_id, cls, slot)
+
+# Client routes an admin can call with X-Admin-API-Key alone (no edge auth or rate limits)
+ADMIN_KEY_ROUTES = {"/transcripts/export"}
+
+async def upstream_headers(upstream: UpstreamPool, path: str, request: Request) -> Tuple[Dict[str, str], Optional[Dict[str, Any]]]:
+    """
+    Builds the headers forwarded upstream. Client requests are authenticated here; returns
+    the headers and the auth cache entry of the caller (None for admin requests).
+    """
+    headers = end_to_end_headers(request.headers)
+    # Host is set by httpx for the upstream; the identity header is only ever set by the gateway itself
+    headers.pop("host", None)
+    headers.pop(IDENTITY_HEADER.lower(), None)
+
+    # Determine target service based on URL path prefix; client routes that also take the admin
+    # key are admin requests when it is sent (the upstream checks it)
+    is_admin_request = (upstream is admin_api and path.startswith("/admin")) or (
+        path in ADMIN_KEY_ROUTES and "x-admin-api-key" in request.headers)
     
     # Forward appropriate auth header if present
+    entry = None
     if is_admin_request:
         admin_key = request.headers.get("x-admin-api-key")
         if admin_key:
             headers["x-admin-api-key"] = admin_key
-            print(f"DEBUG: Forwarding x-admin-api-key header")
-        else:
-            print(f"DEBUG: No x-admin-api-key header found in request")
     else:
         # Forward client API key for bot-manager and transcription-collector
         client_key = request.headers.get("x-api-key")
-        if client_key:
-            headers["x-api-key"] = client_key
-            print(f"DEBUG: Forwarding x-api-key header: {client_key[:5]}...")
-        else:
-            print(f"DEBUG: No x-api-key header found in request. Headers: {dict(request.headers)}")
-    
-    # Debug logging for forwarded headers
-    print(f"DEBUG: Forwarded headers: {headers}")
+        entry = await authenticate_at_edge(client_key)
+        await enforce_rate_limits(request, entry, path)
+        headers["x-api-key"] = client_key
+        if IDENTITY_SIGNING_KEY:
+            headers[IDENTITY_HEADER.lower()] = sign_identity(entry, client_key)
+    return headers, entry
+
+def upstream_error(exc: Exception) -> HTTPException:
+    """Maps a failed upstream call to the client error: 503 (unavailable, circuit open) or 504 (timed out)."""
+    if isinstance(exc, UpstreamError):
+        headers = {"Retry-After": str(max(1, int(exc.retry_after + 0.999)))} if exc.retry_after else None
+        return HTTPException(status_code=exc.status_code, detail=str(exc), headers=headers)
+    return HTTPException(status_code=503, detail=f"Service unavailable: {exc}")
+
+class RelayedResponse(StreamingResponse):
+    """
+    A streamed upstream response that releases what it holds (upstream connection, endpoint
+    and concurrency slots) once sent - also when the client disconnects or sending fails,
+    where Starlette skips background tasks.
+    """
+
+    def __init__(self, *args, release: List[Callable[[], Awaitable[None]]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                for release in self.release:
+                    try:
+                        await release()
+                    except Exception as e:
+                        logger.warning(f"Failed to release a relayed response: {e!r}")
+
+async def forward_request(upstream: UpstreamPool, method: str, path: str, request: Request,
+                          timeout: Optional[float] = None, invalidate: bool = True) -> Response:
+    """
+    Streams the request to the upstream service and its response back to the client.
+    Bodies pass through chunk by chunk in both directions, so gateway memory does not grow
+    with payload size and the first response bytes are sent as soon as the upstream produces them.
+    timeout overrides the route deadline (GATEWAY_READ_TIMEOUT for GETs, GATEWAY_WRITE_TIMEOUT otherwise).
+    Non-GET requests drop the caller's cached responses, unless invalidate is False (read-only POSTs).
+    """
+    headers, entry = await upstream_headers(upstream, path, request)
     
-    content = await request.body()
+    # Stream the body only if there is one (Content-Length is kept, so uploads are not re-chunked)
+    has_body = headers.get("content-length", "0") != "0" or "transfer-encoding" in request.headers
     
     try:
-        print(f"DEBUG: Forwarding {method} request to {url}")
-        resp = await client.request(method, url, headers=headers, content=content)
-        print(f"DEBUG: Response from {url}: status={resp.status_code}")
-        # Return downstream response directly (including headers, status code)
-        return Response(content=resp.content, status_code=resp.status_code, headers=dict(resp.headers))
-    except httpx.RequestError as exc:
-        print(f"DEBUG: Request error: {exc}")
-        raise HTTPException(status_code=503, detail=f"Service unavailable: {exc}")
+        resp = await upstream.send(
+            method, path, headers=headers, params=request.query_params,
+            content=request.stream() if has_body else None,
+            timeout=timeout or (GATEWAY_READ_TIMEOUT if method == "GET" else GATEWAY_WRITE_TIMEOUT)
+        )
+    except BaseException as exc:
+        await release_concurrency_slot(request)
+        if isinstance(exc, (UpstreamError, httpx.RequestError)):
+            logger.warning("%s %s%s failed: %r", method, upstream.name, path, exc)
+            raise upstream_error(exc)
+        raise
+    proxy_logger.debug("%s %s%s -> %d", method, upstream.name, path, resp.status_code)
+    if entry and invalidate and method != "GET":
+        # The user's data may have changed; do not serve it from the response cache
+        response_cache.invalidate(entry["user_id"])
+    return relay_response(upstream, resp, request)
+
+def relay_response(upstream: UpstreamPool, resp: httpx.Response, request: Request, decode: bool = False,
+                   extra_headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Streams an upstream response (from upstream.send) to the client, releasing it and the
+    request's concurrency slot when done. Raw bytes are relayed as received, so
+    Content-Encoding/Content-Length stay valid; with decode, the body is relayed decoded
+    (for upstream requests the client's Accept-Encoding was not forwarded with).
+    """
+    headers = end_to_end_headers(resp.headers)
+    if decode:
+        headers = {k: v for k, v in headers.items() if k not in ("content-encoding", "content-length")}
+    return RelayedResponse(
+        resp.aiter_bytes() if decode else resp.aiter_raw(),
+        status_code=resp.status_code,
+        headers={**headers, **getattr(request.state, "rate_limit_headers", {}), **(extra_headers or {})},
+        release=[lambda: upstream.close(resp), lambda: release_concurrency_slot(request)]
+    )
+
+# Conditional/caching request headers are answered by the gateway, not forwarded
+CACHE_REQUEST_HEADERS = {"if-none-match", "if-modified-since", "cache-control", "pragma", "accept-encoding"}
+# Transcript export types of transcription-collector (?format= or Accept): streamed, never cached
+EXPORT_MEDIA_TYPES = ("text/vtt", "text/srt", "application/x-subrip", "text/plain")
+
+def requests_export(request: Request) -> bool:
+    export_format = request.query_params.get("format")
+    if export_format and export_format.lower() != "json":
+        return True
+    accept = request.headers.get("accept", "").lower()
+    return any(media_type in accept for media_type in EXPORT_MEDIA_TYPES)
+
+def cacheable(resp: httpx.Response) -> bool:
+    """JSON with a Content-Length within GATEWAY_CACHE_MAX_BODY_BYTES; anything else is streamed through."""
+    length = resp.headers.get("content-length")
+    return ("json" in resp.headers.get("content-type", "") and length is not None and length.isdigit()
+            and int(length) <= response_cache.max_body_bytes)
+
+async def forward_cached_request(upstream: UpstreamPool, path: str, request: Request) -> Response:
+    """
+    Serves a GET through the response cache. Entries are keyed by user, path, query and
+    Accept; identical concurrent requests share one upstream call, and stale entries are
+    revalidated with the upstream's ETag. Clients get an X-Cache header and 304s for
+    matching If-None-Match. `Cache-Control: no-cache` forces revalidation.
+
+    Only bodies that can be cached are buffered: exports and responses that are not JSON, or
+    have no or too large a Content-Length, are streamed through (X-Cache: BYPASS).
+    """
+    if requests_export(request):
+        return await forward_request(upstream, "GET", path, request)
+    headers, entry = await upstream_headers(upstream, path, request)
+    for name in CACHE_REQUEST_HEADERS:
+        headers.pop(name, None)
+    params = list(request.query_params.multi_items())
+    key = (entry["user_id"], upstream.name, path, tuple(sorted(params)), request.headers.get("accept", ""))
+
+    async def fetch(stale: Optional[CachedResponse]) -> Union[CachedResponse, Uncached, None]:
+        fetch_headers = dict(headers)
+        if stale is not None and stale.etag:
+            fetch_headers["if-none-match"] = stale.etag
+        resp = await upstream.send("GET", path, headers=fetch_headers, params=params, timeout=GATEWAY_READ_TIMEOUT)
+        if not (resp.status_code == 304 and stale is not None) and not cacheable(resp):
+            return Uncached(resp, lambda: upstream.close(resp))
+        try:
+            if resp.status_code == 304 and stale is not None:
+                return None
+            body = await resp.aread()
+        finally:
+            await upstream.close(resp)
+        # The body is stored decoded, so its original encoding and length no longer apply
+        response_headers = {k: v for k, v in end_to_end_headers(resp.headers).items()
+                            if k not in ("content-encoding", "content-length")}
+        return CachedResponse(resp.status_code, response_headers, body, resp.headers.get("etag"),
+                              time.monotonic() + response_cache.ttl)
+
+    revalidate = "no-cache" in request.headers.get("cache-control", "").lower()
+    try:
+        cached, cache_status = await response_cache.fetch(key, fetch, revalidate=revalidate)
+        if cache_status == "BYPASS":
+            # Joined a fetch that turned out to be uncacheable: fetch again, this time for this request
+            resp = cached.response if cached is not None else await upstream.send(
+                "GET", path, headers=headers, params=params, timeout=GATEWAY_READ_TIMEOUT)
+            proxy_logger.debug("GET %s%s -> %d (BYPASS)", upstream.name, path, resp.status_code)
+            return relay_response(upstream, resp, request, decode=True, extra_headers={"x-cache": cache_status})
+    except BaseException as exc:
+        await release_concurrency_slot(request)
+        if isinstance(exc, (UpstreamError, httpx.RequestError)):
+            logger.warning("GET %s%s failed: %r", upstream.name, path, exc)
+            raise upstream_error(exc)
+        raise
+    await release_concurrency_slot(request)
+    proxy_logger.debug("GET %s%s -> %d (%s)", upstream.name, path, cached.status_code, cache_status)
+
+    extra_headers = {"x-cache": cache_status, **getattr(request.state, "rate_limit_headers", {})}
+    if cached.status_code == 200 and etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"etag": cached.etag, **extra_headers})
+    return Response(content=cached.body, status_code=cached.status_code, headers={**cached.headers, **extra_headers})
+
+async def fetch_part(upstream: UpstreamPool, path: str, headers: Dict[str, str],
+                     params: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    GETs one part of a composite response and returns its JSON body. Failures, including
+    non-200 upstream responses, are raised as HTTPException with the status the client would get.
+    """
+    try:
+        resp = await upstream.send("GET", path, headers=headers, params=params, timeout=GATEWAY_READ_TIMEOUT)
+        try:
+            body = await resp.aread()
+        finally:
+            await upstream.close(resp)
+    except (UpstreamError, httpx.RequestError) as exc:
+        raise upstream_error(exc)
+    if resp.status_code != 200:
+        try:
+            detail = json.loads(body).get("detail")
+        except (ValueError, AttributeError):
+            detail = None
+        raise HTTPException(status_code=resp.status_code, detail=detail or f"{upstream.name} returned {resp.status_code}")
+    return body
 
 # --- Root Endpoint --- 
 @app.get("/", tags=["General"], summary="API Gateway Root")
@@ -188,9 +453,9 @@ async def root():
 @app.post("/bots",
          tags=["Bot Management"],
          summary="Request a new bot to join a meeting",
-         description="Creates a new meeting record and launches a bot instance based on platform and native meeting ID.",
+         description="Creates a new meeting record and queues the launch of a bot instance based on platform and native meeting ID. Returns `202` with the meeting in status `requested`; poll the `Location` (`GET /bots/{platform}/{native_meeting_id}`) until it is `active` or `error`.",
          # response_model=MeetingResponse, # Response comes from downstream, keep commented
-         status_code=status.HTTP_201_CREATED,
+         status_code=status.HTTP_202_ACCEPTED,
          dependencies=[Depends(api_key_scheme)],
          # Explicitly define the request body schema for OpenAPI documentation
          openapi_extra={
@@ -207,9 +472,9 @@ async def root():
 # Function signature remains generic for forwarding
 async def request_bot_proxy(request: Request, body: Dict[str, Any]): 
     """Forward request to Bot Manager to start a bot."""
-    url = f"{BOT_MANAGER_URL}/bots"
+    path = "/bots"
     # forward_request handles reading and passing the body from the original request
-    return await forward_request(app.state.http_client, "POST", url, request)
+    return await forward_request(bot_manager, "POST", path, request)
 
 @app.delete("/bots/{platform}/{native_meeting_id}",
            tags=["Bot Management"],
@@ -219,8 +484,19 @@ async def request_bot_proxy(request: Request, body: Dict[str, Any]):
            dependencies=[Depends(api_key_scheme)])
 async def stop_bot_proxy(platform: Platform, native_meeting_id: str, request: Request):
     """Forward request to Bot Manager to stop a bot."""
-    url = f"{BOT_MANAGER_URL}/bots/{platform.value}/{native_meeting_id}"
-    return await forward_request(app.state.http_client, "DELETE", url, request)
+    path = f"/bots/{platform.value}/{native_meeting_id}"
+    return await forward_request(bot_manager, "DELETE", path, request)
+
+@app.get("/bots/{platform}/{native_meeting_id}",
+        tags=["Bot Management"],
+        summary="Get bot status for a specific meeting",
+        description="Returns the latest meeting record for the specified platform and native meeting ID and the state of its bot container.",
+        response_model=BotStatusResponse,
+        dependencies=[Depends(api_key_scheme)])
+async def get_bot_status_proxy(platform: Platform, native_meeting_id: str, request: Request):
+    """Forward request to Bot Manager to get a bot's status."""
+    path = f"/bots/{platform.value}/{native_meeting_id}"
+    return await forward_request(bot_manager, "GET", path, request)
 
 # --- Transcription Collector Routes --- 
 @app.get("/meetings",
@@ -231,19 +507,162 @@ async def stop_bot_proxy(platform: Platform, native_meeting_id: str, request: Re
         dependencies=[Depends(api_key_scheme)])
 async def get_meetings_proxy(request: Request):
     """Forward request to Transcription Collector to get meetings."""
-    url = f"{TRANSCRIPTION_COLLECTOR_URL}/meetings"
-    return await forward_request(app.state.http_client, "GET", url, request)
+    path = "/meetings"
+    return await forward_cached_request(transcription_collector, path, request)
 
 @app.get("/transcripts/{platform}/{native_meeting_id}",
         tags=["Transcriptions"],
         summary="Get transcript for a specific meeting",
-        description="Retrieves the transcript segments for a meeting specified by its platform and native ID.",
+        description="Retrieves the transcript segments for a meeting specified by its platform and native ID. Use `?format=srt|vtt|txt` (or the matching Accept header) for subtitle and plain text exports.",
         response_model=TranscriptionResponse,
         dependencies=[Depends(api_key_scheme)])
 async def get_transcript_proxy(platform: Platform, native_meeting_id: str, request: Request):
     """Forward request to Transcription Collector to get a transcript."""
-    url = f"{TRANSCRIPTION_COLLECTOR_URL}/transcripts/{platform.value}/{native_meeting_id}"
-    return await forward_request(app.state.http_client, "GET", url, request)
+    path = f"/transcripts/{platform.value}/{native_meeting_id}"
+    return await forward_cached_request(transcription_collector, path, request)
+
+@app.get("/meetings/{platform}/{native_meeting_id}",
+        tags=["Transcriptions"],
+        summary="Get a meeting's transcript and bot status in one request",
+        description="Fetches the transcript (or, with `tail`, its last segments) and the bot status of a meeting concurrently and returns them together. A part that cannot be fetched is `null` and its reason is listed in `errors`; if both fail, the request fails.",
+        response_model=MeetingViewResponse,
+        dependencies=[Depends(api_key_scheme)])
+async def get_meeting_view(platform: Platform, native_meeting_id: str, request: Request,
+                           tail: Optional[int] = Query(None, ge=1, description="Return only the last N transcript segments")):
+    """Fan out to Transcription Collector and Bot Manager in parallel and merge the results."""
+    transcript_path = f"/transcripts/{platform.value}/{native_meeting_id}"
+    bot_path = f"/bots/{platform.value}/{native_meeting_id}"
+    # Authenticated and rate limited once, as a single read
+    headers, _entry = await upstream_headers(transcription_collector, transcript_path, request)
+    for name in CACHE_REQUEST_HEADERS:
+        headers.pop(name, None)
+    headers["accept"] = "application/json"
+
+    try:
+        results = await asyncio.gather(
+            fetch_part(transcription_collector, transcript_path, headers, {"tail": tail} if tail else None),
+            fetch_part(bot_manager, bot_path, headers),
+            return_exceptions=True
+        )
+    finally:
+        await release_concurrency_slot(request)
+    parts = dict(zip(("transcript", "bot"), results))
+
+    errors = {}
+    for name, part in parts.items():
+        if isinstance(part, HTTPException):
+            errors[name] = part.detail if isinstance(part.detail, str) else json.dumps(part.detail)
+        elif isinstance(part, BaseException):
+            raise part
+    if len(errors) == len(parts):
+        # Nothing to show (e.g. no such meeting): fail with the transcript's error
+        raise parts["transcript"]
+
+    # Upstream bodies are spliced in as-is rather than parsed and re-serialized
+    body = b'{"transcript": ' + (parts["transcript"] if "transcript" not in errors else b"null") \
+        + b', "bot": ' + (parts["bot"] if "bot" not in errors else b"null") \
+        + b', "errors": ' + json.dumps(errors).encode() + b"}"
+    return Response(content=body, media_type="application/json",
+                    headers=getattr(request.state, "rate_limit_headers", {}))
+
+@app.post("/transcripts/batch",
+         tags=["Transcriptions"],
+         summary="Get transcripts for several meetings",
+         description="Retrieves the transcripts of several meetings, each given by platform and native ID, in one request. Meetings that cannot be resolved are reported with a per-item `error`.",
+         response_model=TranscriptionBatchResponse,
+         dependencies=[Depends(api_key_scheme)],
+         openapi_extra={
+             "requestBody": {
+                 "content": {
+                     "application/json": {
+                         "schema": TranscriptionBatchRequest.schema()
+                     }
+                 },
+                 "required": True,
+                 "description": "List of meetings (platform and native meeting ID) to fetch."
+             },
+         })
+async def get_transcripts_batch_proxy(request: Request):
+    """Forward batch transcript request to Transcription Collector."""
+    path = "/transcripts/batch"
+    # Read-only: a client polling it must not empty its own cached responses
+    return await forward_request(transcription_collector, "POST", path, request, timeout=GATEWAY_BULK_TIMEOUT,
+                                 invalidate=False)
+
+@app.get("/transcripts/export",
+        tags=["Transcriptions"],
+        summary="Bulk export transcript segments",
+        description="Streams all segments of the API key's user (or, with `X-Admin-API-Key` instead of `X-API-Key`, of one or all users) created in a time range, as NDJSON or Parquet. When more rows remain, the export ends with a continuation token (a final `{\"continuation\": ...}` NDJSON line, or the `continuation` Parquet metadata key); pass it back as `continuation` to fetch the next page.",
+        dependencies=[Depends(api_key_scheme)])
+async def bulk_export_proxy(request: Request):
+    """Forward bulk export request to Transcription Collector."""
+    path = "/transcripts/export"
+    return await forward_request(transcription_collector, "GET", path, request, timeout=GATEWAY_BULK_TIMEOUT)
+
+@app.get("/keyword-sets",
+        tags=["Keyword Alerts"],
+        summary="List keyword sets",
+        description="Returns the keyword sets of the user associated with the API key.",
+        response_model=KeywordSetListResponse,
+        dependencies=[Depends(api_key_scheme)])
+async def list_keyword_sets_proxy(request: Request):
+    """Forward request to Transcription Collector to list keyword sets."""
+    path = "/keyword-sets"
+    return await forward_request(transcription_collector, "GET", path, request)
+
+@app.post("/keyword-sets",
+         tags=["Keyword Alerts"],
+         summary="Create a keyword set",
+         description="Registers terms to be alerted on. Whenever one is spoken in any of the user's meetings, a hit is appended to the `keyword_hits` Redis stream.",
+         response_model=KeywordSetResponse,
+         status_code=status.HTTP_201_CREATED,
+         dependencies=[Depends(api_key_scheme)],
+         openapi_extra={
+             "requestBody": {
+                 "content": {
+                     "application/json": {
+                         "schema": KeywordSetCreate.schema()
+                     }
+                 },
+                 "required": True,
+                 "description": "Name and keywords of the set."
+             },
+         })
+async def create_keyword_set_proxy(request: Request):
+    """Forward request to Transcription Collector to create a keyword set."""
+    path = "/keyword-sets"
+    return await forward_request(transcription_collector, "POST", path, request)
+
+@app.put("/keyword-sets/{set_id}",
+        tags=["Keyword Alerts"],
+        summary="Replace a keyword set",
+        response_model=KeywordSetResponse,
+        dependencies=[Depends(api_key_scheme)],
+        openapi_extra={
+            "requestBody": {
+                "content": {
+                    "application/json": {
+                        "schema": KeywordSetCreate.schema()
+                    }
+                },
+                "required": True,
+                "description": "New name and keywords of the set."
+            },
+        })
+async def update_keyword_set_proxy(set_id: int, request: Request):
+    """Forward request to Transcription Collector to replace a keyword set."""
+    path = f"/keyword-sets/{set_id}"
+    return await forward_request(transcription_collector, "PUT", path, request)
+
+@app.delete("/keyword-sets/{set_id}",
+           tags=["Keyword Alerts"],
+           summary="Delete a keyword set",
+           status_code=status.HTTP_204_NO_CONTENT,
+           dependencies=[Depends(api_key_scheme)])
+async def delete_keyword_set_proxy(set_id: int, request: Request):
+    """Forward request to Transcription Collector to delete a keyword set."""
+    path = f"/keyword-sets/{set_id}"
+    return await forward_request(transcription_collector, "DELETE", path, request)
 
 # --- Admin API Routes --- 
 @app.api_route("/admin/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"], 
@@ -254,8 +673,7 @@ async def get_transcript_proxy(platform: Platform, native_meeting_id: str, reque
 async def forward_admin_request(request: Request, path: str):
     """Generic forwarder for all admin endpoints."""
     admin_path = f"/admin/{path}" 
-    url = f"{ADMIN_API_URL}{admin_path}"
-    return await forward_request(app.state.http_client, request.method, url, request)
+    return await forward_request(admin_api, request.method, admin_path, request)
 
 # --- Main Execution --- 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("api_gateway.rate_limit")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Tokens taken from the shared Redis bucket per round trip, as a fraction of the burst size.
+# Leased tokens are spent locally, so most requests never wait on Redis; unused ones lapse
+# after RATE_LIMIT_LEASE_SECONDS.
+RATE_LIMIT_LEASE_FRACTION = float(os.getenv("RATE_LIMIT_LEASE_FRACTION", "0.1"))
+RATE_LIMIT_LEASE_SECONDS = float(os.getenv("RATE_LIMIT_LEASE_SECONDS", "1"))
+# Safety expiry of a concurrency slot whose release was lost (e.g. a gateway crash)
+RATE_LIMIT_SLOT_TTL_SECONDS = int(os.getenv("RATE_LIMIT_SLOT_TTL_SECONDS", "600"))
+# Local buckets (leases and cached denials) kept per replica; the least recently used are
+# dropped beyond this, costing those users one Redis round trip on their next request
+RATE_LIMIT_LOCAL_MAX_ENTRIES = int(os.getenv("RATE_LIMIT_LOCAL_MAX_ENTRIES", "10000"))
+
+# Limits per plan and route class: rate (requests/second), burst (bucket size) and optionally
+# concurrency (requests in flight). RATE_LIMIT_PLANS (JSON, same shape) adds or overrides plans;
+# classes a plan leaves out are taken from the default plan.
+DEFAULT_PLANS: Dict[str, Dict[str, Dict[str, float]]] = {
+    "default": {
+        "read": {"rate": 5, "burst": 20},
+        "write": {"rate": 1, "burst": 10},
+        "bulk": {"rate": 0.2, "burst": 3, "concurrency": 2},
+    },
+}
+DEFAULT_PLAN = "default"
+
+def load_plans() -> Dict[str, Dict[str, Dict[str, float]]]:
+    plans = json.loads(json.dumps(DEFAULT_PLANS))
+    for name, classes in json.loads(os.getenv("RATE_LIMIT_PLANS") or "{}").items():
+        plan = plans.setdefault(name, {})
+        for cls, limits in classes.items():
+            plan[cls] = {**plan.get(cls, {}), **limits}
+    # Every plan has every class; unset fields come from the default plan
+    default = plans[DEFAULT_PLAN]
+    return {
+        name: {cls: {**default.get(cls, {}), **plan.get(cls, {})} for cls in set(default) | set(plan)}
+        for name, plan in plans.items()
+    }
+
+def route_class(method: str, path: str) -> str:
+    """Groups routes by cost: bulk reads (batch, export), other reads, and writes."""
+    if path.startswith(("/transcripts/batch", "/transcripts/export")):
+        return "bulk"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+# Token bucket, refilled continuously. Takes up to ARGV[3] tokens (at least 1 if available).
+# Returns {granted, tokens left, ms until the next token, ms until the bucket is full}.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local granted = math.min(wanted, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+local retry = 0
+if tokens < 1 then retry = math.ceil((1 - tokens) * 1000 / rate) end
+return {granted, math.floor(tokens), retry, math.ceil((burst - tokens) * 1000 / rate)}
+"""
+
+# Concurrency slots as a sorted set of slot ids scored by expiry.
+# Returns 1 and adds ARGV[3] if fewer than ARGV[1] unexpired slots are held, else 0.
+CONCURRENCY_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then return 0 end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int # Bucket size
+    remaining: int
+    reset_after: float # Seconds until the bucket is full again
+    retry_after: float # Seconds until a request would be allowed (0 if allowed)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.remaining)),
+            "X-RateLimit-Reset": str(int(self.reset_after + 0.999)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, int(self.retry_after + 0.999)))
+        return headers
+
+class _LocalBucket:
+    """Tokens leased from Redis for one (user, route class), plus a cached denial."""
+    __slots__ = ("tokens", "lease_expires", "denied_until", "remaining", "reset_at")
+
+    def __init__(self):
+        self.tokens = 0
+        self.lease_expires = 0.0
+        self.denied_until = 0.0
+        self.remaining = 0 # Shared bucket level at the last Redis round trip
+        self.reset_at = 0.0
+
+class RateLimiter:
+    """
+    Token-bucket rate limits and concurrency quotas per user and route class, shared by all
+    gateway replicas through Redis (both checks are single Lua scripts, so they are atomic).
+
+    Each replica leases a few tokens at a time and spends them locally, and remembers a
+    denial until the bucket refills, so only a fraction of requests cost a Redis round trip.
+    If Redis is unavailable requests are allowed: limits protect upstreams, they never
+    take the API down.
+    """
+
+    def __init__(self, plans: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None):
+        self.plans = plans if plans is not None else load_plans()
+        self.redis_client: Any = None
+        self._bucket_script = None
+        self._concurrency_script = None
+        self._local: "OrderedDict[Tuple[int, str], _LocalBucket]" = OrderedDict()
+
+    def start(self, redis_client: Any):
+        self.redis_client = redis_client
+        self._bucket_script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._concurrency_script = redis_client.register_script(CONCURRENCY_SCRIPT)
+
+    def limits(self, plan: Optional[str], cls: str) -> Dict[str, float]:
+        classes = self.plans.get(plan or DEFAULT_PLAN)
+        if classes is None:
+            logger.warning(f"Unknown plan '{plan}', using the default limits")
+            classes = self.plans[DEFAULT_PLAN]
+        return classes[cls]
+
+    # --- Token bucket ---
+
+    async def check(self, user_id: int, plan: Optional[str], cls: str) -> RateLimitDecision:
+        limits = self.limits(plan, cls)
+        rate, burst = float(limits["rate"]), int(limits["burst"])
+        if not RATE_LIMIT_ENABLED or self._bucket_script is None:
+            return RateLimitDecision(True, burst, burst, 0, 0)
+        now = time.monotonic()
+        local = self._local.get((user_id, cls))
+        if local is None:
+            local = self._local[(user_id, cls)] = _LocalBucket()
+            while len(self._local) > RATE_LIMIT_LOCAL_MAX_ENTRIES:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end((user_id, cls))
+
+        if local.denied_until > now:
+            return RateLimitDecision(False, burst, 0, local.reset_at - now, local.denied_until - now)
+        if local.tokens > 0 and local.lease_expires > now:
+            local.tokens -= 1
+            return RateLimitDecision(True, burst, local.remaining + local.tokens, local.reset_at - now, 0)
+
+        lease = max(1, int(burst * RATE_LIMIT_LEASE_FRACTION))
+        try:
+            granted, remaining, retry_ms, reset_ms = await self._bucket_script(
+                keys=[f"ratelimit:{user_id}:{cls}"], args=[rate, burst, lease]
+            )
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return RateLimitDecision(True, burst, burst, 0, 0)
+
+        local.remaining = int(remaining)
+        local.reset_at = now + int(reset_ms) / 1000
+        if int(granted) == 0:
+            local.tokens = 0
+            local.denied_until = now + int(retry_ms) / 1000
+            return RateLimitDecision(False, burst, 0, local.reset_at - now, local.denied_until - now)
+        local.tokens = int(granted) - 1
+        local.lease_expires = now + RATE_LIMIT_LEASE_SECONDS
+        return RateLimitDecision(True, burst, local.remaining + local.tokens, local.reset_at - now, 0)
+
+    # --- Concurrency ---
+
+    async def acquire_slot(self, user_id: int, plan: Optional[str], cls: str) -> Tuple[bool, Optional[str]]:
+        """
+        Takes a concurrency slot if the class has a quota. Returns (allowed, slot id);
+        pass the slot id to release_slot when the request is done (None = nothing to release).
+        """
+        concurrency = self.limits(plan, cls).get("concurrency")
+        if not concurrency or not RATE_LIMIT_ENABLED or self._concurrency_script is None:
+            return True, None
+        slot = uuid.uuid4().hex
+        try:
+            acquired = await self._concurrency_script(
+                keys=[f"ratelimit:{user_id}:{cls}:inflight"],
+                args=[int(concurrency), RATE_LIMIT_SLOT_TTL_SECONDS * 1000, slot]
+            )
+        except Exception as e:
+            logger.warning(f"Concurrency check failed, allowing request: {e}")
+            return True, None
+        return (True, slot) if int(acquired) else (False, None)
+
+    async def release_slot(self, user_id: int, cls: str, slot: Optional[str]):
+        if slot is None:
+            return
+        try:
+            await self.redis_client.zrem(f"ratelimit:{user_id}:{cls}:inflight", slot)
+        except Exception as e:
+            # The slot expires after RATE_LIMIT_SLOT_TTL_SECONDS
+            logger.warning(f"Failed to release concurrency slot: {e}")
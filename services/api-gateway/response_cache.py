@@ -0,0 +1,168 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Set, Tuple, Union
+
+logger = logging.getLogger("api_gateway.response_cache")
+
+# Freshness window: within it, cached responses are served without contacting the upstream;
+# after it they are revalidated with If-None-Match
+GATEWAY_CACHE_TTL_SECONDS = float(os.getenv("GATEWAY_CACHE_TTL_SECONDS", "2"))
+GATEWAY_CACHE_MAX_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+GATEWAY_CACHE_MAX_BODY_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    etag: Optional[str]
+    expires_at: float
+
+    def fresh(self, now: float) -> bool:
+        return self.expires_at > now
+
+class Uncached(NamedTuple):
+    """
+    A response the fetcher did not buffer (e.g. streamed, or too large to cache). Only the
+    request that started the fetch gets it and must close it; requests that joined the fetch
+    are told to fetch for themselves.
+    """
+    response: Any
+    close: Callable[[], Awaitable[None]]
+
+class ResponseCache:
+    """
+    Short-lived cache of upstream GET responses, with single-flight fetching.
+    Keys are tuples whose first element identifies the owner (the user), see invalidate().
+
+    Entries are LRU-evicted to stay under GATEWAY_CACHE_MAX_BYTES and never dropped just
+    for being stale: a stale entry's ETag is used to revalidate it, so an unchanged
+    response costs the upstream a 304 instead of a full body. Concurrent requests for
+    the same key share one upstream fetch, which runs as its own task so it completes
+    even if the request that started it goes away.
+    """
+
+    def __init__(self, ttl: float = GATEWAY_CACHE_TTL_SECONDS, max_bytes: int = GATEWAY_CACHE_MAX_BYTES,
+                 max_body_bytes: int = GATEWAY_CACHE_MAX_BODY_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Owner -> its keys in _entries and _inflight, so invalidate() does not scan the whole cache
+        self._owner_keys: Dict[Hashable, Set[Hashable]] = {}
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, response: CachedResponse):
+        self.discard(key)
+        if response.status_code != 200 or len(response.body) > self.max_body_bytes:
+            return
+        self._entries[key] = response
+        self._size += len(response.body)
+        self._index(key)
+        while self._size > self.max_bytes:
+            self.discard(next(iter(self._entries)))
+
+    def renew(self, key: Hashable, entry: CachedResponse) -> CachedResponse:
+        """Marks a revalidated entry fresh again."""
+        renewed = entry._replace(expires_at=time.monotonic() + self.ttl)
+        if key in self._entries:
+            self._entries[key] = renewed
+        return renewed
+
+    def discard(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.body)
+            self._unindex(key)
+
+    def invalidate(self, owner: Hashable):
+        """Drops every entry whose key starts with owner (keys are (owner, ...) tuples)."""
+        for key in self._owner_keys.pop(owner, ()):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= len(entry.body)
+            # Fetches already running may predate the change: later requests must not join
+            # them, and their results are not stored
+            self._inflight.pop(key, None)
+
+    def _index(self, key: Hashable):
+        self._owner_keys.setdefault(key[0], set()).add(key)
+
+    def _unindex(self, key: Hashable):
+        """Forgets key in the owner index once it is neither cached nor being fetched."""
+        if key in self._entries or key in self._inflight:
+            return
+        keys = self._owner_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._owner_keys[key[0]]
+
+    async def fetch(
+        self,
+        key: Hashable,
+        fetcher: Callable[[Optional[CachedResponse]], Awaitable[Union[CachedResponse, Uncached, None]]],
+        revalidate: bool = False
+    ) -> Tuple[Union[CachedResponse, Uncached, None], str]:
+        """
+        Returns (response, cache status). A fresh entry is returned directly (unless revalidate
+        is set); otherwise fetcher is called - at most once at a time per key - with the stale
+        entry, if any, and returns the new response, or None if the stale entry is still valid.
+        Cache status is HIT, MISS, REVALIDATED or COALESCED, or BYPASS if the fetcher returned
+        an Uncached response: the Uncached for the request that started the fetch, None for
+        the others.
+        """
+        entry = self.get(key)
+        if entry is not None and not revalidate and entry.fresh(time.monotonic()):
+            return entry, "HIT"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            response, _ = await asyncio.shield(task)
+            if isinstance(response, Uncached):
+                return None, "BYPASS"
+            return response, "COALESCED"
+
+        task = asyncio.create_task(self._refresh(key, fetcher, entry))
+        self._inflight[key] = task
+        self._index(key)
+        task.add_done_callback(lambda t: self._done(key, t))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(_close_orphaned)
+            raise
+
+    async def _refresh(self, key: Hashable, fetcher, stale: Optional[CachedResponse]) -> Tuple[CachedResponse, str]:
+        response = await fetcher(stale)
+        if isinstance(response, Uncached):
+            return response, "BYPASS"
+        current = self._inflight.get(key) is asyncio.current_task()
+        if response is None:
+            return (self.renew(key, stale) if current else stale), "REVALIDATED"
+        if current:
+            self.put(key, response)
+        return response, "MISS"
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._unindex(key)
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Cache fetch for %r failed: %s", key, task.exception())
+
+def _close_orphaned(task: asyncio.Task):
+    """Closes an Uncached response whose request went away while it was being fetched."""
+    if not task.cancelled() and task.exception() is None:
+        response, _ = task.result()
+        if isinstance(response, Uncached):
+            asyncio.create_task(response.close())
@@ -0,0 +1,394 @@
+import os
+import time
+import asyncio
+import random
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+logger = logging.getLogger("api_gateway.upstreams")
+
+# Pool defaults for every upstream; each can be overridden per upstream with its
+# env prefix, e.g. TRANSCRIPTION_COLLECTOR_MAX_CONNECTIONS=200
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "50"))
+# Keep below the upstream's idle keep-alive timeout (uvicorn: 5s), so the gateway never
+# reuses a connection the upstream is closing
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "4"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "30")) # Read, write and pool wait
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+# Passive health checks: an endpoint failing this many requests in a row is taken out of
+# rotation, for UPSTREAM_EJECT_SECONDS doubled on each consecutive ejection (up to 10x)
+UPSTREAM_EJECT_FAILURES = int(os.getenv("UPSTREAM_EJECT_FAILURES", "3"))
+UPSTREAM_EJECT_SECONDS = float(os.getenv("UPSTREAM_EJECT_SECONDS", "10"))
+
+# Circuit breaker per upstream: opens when at least UPSTREAM_CIRCUIT_FAILURE_RATIO of the last
+# UPSTREAM_CIRCUIT_WINDOW requests failed (and at least UPSTREAM_CIRCUIT_MIN_REQUESTS were seen);
+# requests are then rejected without contacting the upstream until a trial request succeeds
+UPSTREAM_CIRCUIT_WINDOW = int(os.getenv("UPSTREAM_CIRCUIT_WINDOW", "20"))
+UPSTREAM_CIRCUIT_MIN_REQUESTS = int(os.getenv("UPSTREAM_CIRCUIT_MIN_REQUESTS", "10"))
+UPSTREAM_CIRCUIT_FAILURE_RATIO = float(os.getenv("UPSTREAM_CIRCUIT_FAILURE_RATIO", "0.5"))
+UPSTREAM_CIRCUIT_OPEN_SECONDS = float(os.getenv("UPSTREAM_CIRCUIT_OPEN_SECONDS", "10"))
+# Idempotent requests (GET/HEAD without a body) are retried and hedged. Both draw on a retry
+# budget that earns UPSTREAM_RETRY_BUDGET_RATIO per request plus a small fixed allowance per second,
+# so retries can never multiply the load on an upstream that is already struggling.
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "1"))
+UPSTREAM_RETRY_BUDGET_RATIO = float(os.getenv("UPSTREAM_RETRY_BUDGET_RATIO", "0.1"))
+UPSTREAM_RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("UPSTREAM_RETRY_BUDGET_MIN_PER_SECOND", "1"))
+# A hedge is a second attempt on another endpoint, sent when the first has not answered within
+# the upstream's recent UPSTREAM_HEDGE_PERCENTILE response time; the first answer wins
+UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "true").lower() == "true"
+UPSTREAM_HEDGE_PERCENTILE = float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", "95"))
+UPSTREAM_HEDGE_MIN_DELAY = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", "0.05"))
+
+# Upstream responses counted as endpoint failures (overloaded or unreachable behind it)
+FAILURE_STATUS_CODES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+class UpstreamError(Exception):
+    """Raised instead of contacting (or waiting longer for) an upstream; carries the status to return."""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+class UpstreamTimeoutError(UpstreamError):
+    status_code = 504
+
+def _setting(prefix: str, key: str, default):
+    value = os.getenv(f"{prefix}_{key}")
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() == "true"
+    return type(default)(value)
+
+class Endpoint:
+    """One upstream instance with its in-flight request count and health state."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        parsed = httpx.URL(self.url)
+        self.origin: Tuple[str, str, Optional[int]] = (parsed.scheme, parsed.host, parsed.port)
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker: closed -> open -> half-open (one trial request) -> closed or open."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"
+        self._outcomes: deque = deque(maxlen=UPSTREAM_CIRCUIT_WINDOW) # True = failed
+        self._opened_until = 0.0
+        self._trial_started = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == "closed"
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_until - time.monotonic())
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == "open":
+            if now < self._opened_until:
+                return False
+            self.state = "half_open"
+            self._trial_started = 0.0
+        if self.state == "half_open":
+            # One trial at a time; a trial that never reported back is replaced after a while
+            if self._trial_started and now - self._trial_started < UPSTREAM_CIRCUIT_OPEN_SECONDS:
+                return False
+            self._trial_started = now
+        return True
+
+    def record(self, failed: bool):
+        if self.state == "half_open":
+            if failed:
+                self._open()
+            else:
+                logger.info(f"Upstream {self.name}: circuit closed")
+                self.state = "closed"
+                self._outcomes.clear()
+            return
+        self._outcomes.append(failed)
+        if (self.state == "closed" and len(self._outcomes) >= UPSTREAM_CIRCUIT_MIN_REQUESTS
+                and sum(self._outcomes) >= UPSTREAM_CIRCUIT_FAILURE_RATIO * len(self._outcomes)):
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self._opened_until = time.monotonic() + UPSTREAM_CIRCUIT_OPEN_SECONDS
+        self._outcomes.clear()
+        logger.warning(f"Upstream {self.name}: circuit open for {UPSTREAM_CIRCUIT_OPEN_SECONDS:.0f}s")
+
+class RetryBudget:
+    """Token bucket for retries and hedges, filled by regular requests and a fixed per-second allowance."""
+
+    def __init__(self, ratio: float = UPSTREAM_RETRY_BUDGET_RATIO,
+                 min_per_second: float = UPSTREAM_RETRY_BUDGET_MIN_PER_SECOND, cap: float = 20):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.cap = cap
+        self._balance = cap
+        self._updated = time.monotonic()
+
+    def _refill(self, amount: float = 0.0):
+        now = time.monotonic()
+        self._balance = min(self.cap, self._balance + amount + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+class LatencyTracker:
+    """Recent time-to-response samples of successful requests, for the hedging delay."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples: deque = deque(maxlen=size)
+        self._min_samples = min_samples
+        self._percentile: Optional[float] = None
+        self._since_update = 0
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+        self._since_update += 1
+        if self._since_update >= 20 or self._percentile is None:
+            self._since_update = 0
+            if len(self._samples) >= self._min_samples:
+                ordered = sorted(self._samples)
+                self._percentile = ordered[min(len(ordered) - 1, int(len(ordered) * UPSTREAM_HEDGE_PERCENTILE / 100))]
+
+    def hedge_delay(self) -> Optional[float]:
+        if self._percentile is None:
+            return None
+        return max(UPSTREAM_HEDGE_MIN_DELAY, self._percentile)
+
+class UpstreamPool:
+    """
+    Connection pool and client-side load balancer for one upstream service.
+
+    All endpoints share one httpx client (keep-alive connections, limits and timeouts are
+    per upstream). Each request goes to the available endpoint with the fewest outstanding
+    requests - a request is outstanding until its response body has been relayed - with
+    ties broken randomly. Endpoints that fail UPSTREAM_EJECT_FAILURES requests in a row
+    (connection errors, timeouts, 502/503/504) are ejected for a while; if every endpoint
+    is ejected, all of them are used again rather than failing outright.
+
+    On top of that, a circuit breaker sheds all requests while the upstream as a whole is
+    failing, and idempotent requests are retried and hedged within a retry budget.
+    """
+
+    def __init__(self, name: str, urls: str, env_prefix: str):
+        """
+        Args:
+            name: Upstream name used in logs
+            urls: Comma-separated endpoint base URLs, e.g. "http://collector-1:8000,http://collector-2:8000"
+            env_prefix: Prefix of the per-upstream pool overrides, e.g. "TRANSCRIPTION_COLLECTOR"
+        """
+        self.name = name
+        self.endpoints: List[Endpoint] = []
+        for url in urls.split(","):
+            if url.strip() and url.strip().rstrip("/") not in {e.url for e in self.endpoints}:
+                self.endpoints.append(Endpoint(url.strip()))
+        if not self.endpoints:
+            raise ValueError(f"No endpoints configured for upstream {name}")
+        self._by_origin: Dict[Tuple[str, str, Optional[int]], Endpoint] = {e.origin: e for e in self.endpoints}
+
+        self.limits = httpx.Limits(
+            max_connections=_setting(env_prefix, "MAX_CONNECTIONS", UPSTREAM_MAX_CONNECTIONS),
+            max_keepalive_connections=_setting(env_prefix, "MAX_KEEPALIVE", UPSTREAM_MAX_KEEPALIVE),
+            keepalive_expiry=_setting(env_prefix, "KEEPALIVE_EXPIRY", UPSTREAM_KEEPALIVE_EXPIRY),
+        )
+        self.timeout = httpx.Timeout(
+            _setting(env_prefix, "TIMEOUT", UPSTREAM_TIMEOUT),
+            connect=_setting(env_prefix, "CONNECT_TIMEOUT", UPSTREAM_CONNECT_TIMEOUT),
+        )
+        # HTTP/2 is negotiated via ALPN, so it only takes effect for https:// endpoints
+        self.http2 = _setting(env_prefix, "HTTP2", UPSTREAM_HTTP2)
+        self.client: Optional[httpx.AsyncClient] = None
+        # Replaces the network transport, e.g. to call the upstream app in-process (monolith mode)
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self.breaker = CircuitBreaker(name)
+        self.retry_budget = RetryBudget()
+        self.latency = LatencyTracker()
+
+    async def open(self):
+        self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2,
+                                        transport=self.transport)
+        logger.info(f"Upstream {self.name}: {len(self.endpoints)} endpoint(s) {[e.url for e in self.endpoints]}, "
+                    f"{self.limits}, {self.timeout}, http2={self.http2}")
+
+    async def aclose(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    # --- Balancing ---
+
+    def pick(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """Least outstanding requests among available endpoints, preferring ones not in exclude."""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now)] or self.endpoints
+        candidates = [e for e in available if e not in exclude] or available
+        fewest = min(e.outstanding for e in candidates)
+        return random.choice([e for e in candidates if e.outstanding == fewest])
+
+    def _record(self, endpoint: Endpoint, failed: bool):
+        self.breaker.record(failed)
+        if not failed:
+            endpoint.consecutive_failures = 0
+            endpoint.ejections = 0
+            return
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= UPSTREAM_EJECT_FAILURES and len(self.endpoints) > 1:
+            duration = UPSTREAM_EJECT_SECONDS * min(2 ** endpoint.ejections, 10)
+            endpoint.ejected_until = time.monotonic() + duration
+            endpoint.ejections += 1
+            endpoint.consecutive_failures = 0
+            logger.warning(f"Upstream {self.name}: ejecting {endpoint.url} for {duration:.0f}s after repeated failures")
+
+    # --- Requests ---
+
+    async def send(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request and returns the response with its body unread. The caller must pass
+        the response to close() once it is done with it.
+
+        timeout bounds the wait for the response headers, including any retries; the body
+        is then subject to the client's read timeout per chunk. Raises CircuitOpenError
+        while the circuit is open, UpstreamTimeoutError when the timeout passes, and
+        httpx.RequestError for transport errors.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Upstream {self.name} is unavailable", retry_after=self.breaker.retry_after())
+        self.retry_budget.deposit()
+        deadline = time.monotonic() + timeout if timeout else None
+        if method in IDEMPOTENT_METHODS and kwargs.get("content") is None:
+            return await self._send_idempotent(method, path, deadline, kwargs)
+        return await self._attempt(self.pick(), method, path, deadline, kwargs)
+
+    async def _attempt(self, endpoint: Endpoint, method: str, path: str, deadline: Optional[float], kwargs: dict) -> httpx.Response:
+        request = self.client.build_request(method, f"{endpoint.url}{path}", **kwargs)
+        endpoint.outstanding += 1
+        started = time.monotonic()
+        try:
+            if deadline is None:
+                response = await self.client.send(request, stream=True)
+            else:
+                response = await asyncio.wait_for(self.client.send(request, stream=True), max(0.0, deadline - started))
+        except BaseException as exc: # Including cancellation, so the slot is always released
+            endpoint.outstanding -= 1
+            if isinstance(exc, asyncio.TimeoutError):
+                self._record(endpoint, failed=True)
+                raise UpstreamTimeoutError(f"Upstream {self.name} did not respond in time") from exc
+            if isinstance(exc, httpx.RequestError):
+                self._record(endpoint, failed=True)
+            raise
+        failed = response.status_code in FAILURE_STATUS_CODES
+        self._record(endpoint, failed)
+        if not failed:
+            self.latency.add(time.monotonic() - started)
+        return response
+
+    async def _send_idempotent(self, method: str, path: str, deadline: Optional[float], kwargs: dict) -> httpx.Response:
+        """
+        Runs an idempotent request with up to UPSTREAM_MAX_RETRIES retries (after transport
+        errors or 502/503/504) and at most one hedge, each on a different endpoint if possible
+        and only while the circuit is closed and the retry budget allows.
+        """
+        attempts: List[asyncio.Task] = []
+        used: List[Endpoint] = []
+
+        def launch():
+            endpoint = self.pick(exclude=used)
+            used.append(endpoint)
+            attempts.append(asyncio.create_task(self._attempt(endpoint, method, path, deadline, kwargs)))
+
+        launch()
+        hedge_delay = self.latency.hedge_delay() if UPSTREAM_HEDGE_ENABLED and len(self.endpoints) > 1 else None
+        retries_left = UPSTREAM_MAX_RETRIES
+        winner: Optional[asyncio.Task] = None
+        failure: Optional[asyncio.Task] = None
+        try:
+            while True:
+                pending = [t for t in attempts if not t.done()]
+                if pending:
+                    done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        # Slow response: hedge once, on another endpoint
+                        hedge_delay = None
+                        if self.breaker.closed and self.retry_budget.withdraw():
+                            logger.debug("Upstream %s: hedging %s %s", self.name, method, path)
+                            launch()
+                        continue
+                    for task in done:
+                        if task.exception() is None and task.result().status_code not in FAILURE_STATUS_CODES:
+                            winner = task
+                            return task.result()
+                        if failure is not None:
+                            attempts.remove(failure)
+                            await self._discard(failure)
+                        failure = task
+                    if any(not t.done() for t in attempts):
+                        continue # A hedge is still running
+                retryable = failure.exception() is None or isinstance(failure.exception(), httpx.TransportError)
+                if (retryable and retries_left > 0 and self.breaker.closed
+                        and (deadline is None or deadline > time.monotonic()) and self.retry_budget.withdraw()):
+                    retries_left -= 1
+                    attempts.remove(failure)
+                    await self._discard(failure)
+                    failure = None
+                    logger.debug("Upstream %s: retrying %s %s", self.name, method, path)
+                    launch()
+                    continue
+                winner = failure
+                return failure.result() # The last failed response, or raises its error
+        finally:
+            for task in attempts:
+                if task is not winner:
+                    await self._discard(task)
+
+    async def _discard(self, task: asyncio.Task):
+        """Cancels an attempt that lost (or closes the response it already got)."""
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+            if task.cancelled():
+                return
+        if not task.cancelled() and task.exception() is None:
+            await self.close(task.result())
+
+    async def close(self, response: httpx.Response):
+        """Closes a response from send() and releases its endpoint slot."""
+        try:
+            await response.aclose()
+        finally:
+            url = response.request.url
+            endpoint = self._by_origin.get((url.scheme, url.host, url.port))
+            if endpoint:
+                endpoint.outstanding -= 1
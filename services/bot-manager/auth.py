@@ -1,40 +1,39 @@
-from fastapi import Depends, HTTPException, Security, status
+from fastapi import Depends, HTTPException, Security, Header, status
 from fastapi.security import APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 import logging
 import os
+from typing import Optional
 
-from shared_models.models import User, APIToken
+from shared_models.models import User
 from shared_models.database import get_db
+from shared_models.auth import TokenAuthCache, IDENTITY_HEADER
 
 logger = logging.getLogger("bot_manager.auth")
 
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+# Token -> user cache shared with the other services through Redis (started in main.py)
+auth_cache = TokenAuthCache()
+
 async def get_api_key(api_key: str = Security(API_KEY_HEADER),
+                    identity: Optional[str] = Header(None, alias=IDENTITY_HEADER, include_in_schema=False),
                     db: AsyncSession = Depends(get_db)) -> tuple[str, User]:
-    """Dependency to verify X-API-Key and return the (api_key_string, User_object) tuple."""
+    """Dependency to verify X-API-Key and return the (api_key_string, User_object) tuple.
+    The key is still required (it is handed to the bot), but a valid signed identity from
+    the gateway authenticates it without any lookup."""
     if not api_key:
         logger.warning("API token missing from header")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Missing API token (X-API-Key header)"
         )
+
+    # Signed gateway identity is verified locally; otherwise a cached token lookup
+    user_obj = await auth_cache.authenticate_request(api_key, identity, db)
     
-    # Log the API key received for debugging
-    logger.info(f"Received API key: {api_key[:5]}...")
-    
-    # Find the token in the database
-    result = await db.execute(
-        select(APIToken, User)
-        .join(User, APIToken.user_id == User.id)
-        .where(APIToken.token == api_key)
-    )
-    token_user = result.first()
-    
-    if not token_user:
-        logger.warning(f"Invalid API token provided: {api_key[:5]}...")
+    if not user_obj:
+        logger.warning("Invalid API token provided")
         # Do NOT return mock user in any environment
         # if os.getenv("ENVIRONMENT", "development") == "production":
         raise HTTPException(
@@ -45,13 +44,7 @@ async def get_api_key(api_key: str = Security(API_KEY_HEADER),
         # mock_user = User(id=999, email="mock@example.com", name="Mock User")
         # return (None, mock_user)
     
-    # Extract User object from the result row
-    user_obj = token_user[1] # Assuming User is the second element
-    if not isinstance(user_obj, User):
-         logger.error(f"get_api_key did not retrieve a valid User object: {type(user_obj)}")
-         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Authentication data error")
-
-    logger.info(f"API key validated for user {user_obj.id}. Returning key string and user object.")
+    logger.debug("API key validated for user %s", user_obj.id)
     # Return the original api_key string and the User object
     return (api_key, user_obj)
 
@@ -61,13 +54,11 @@ async def get_user_and_token(token_user_tuple: tuple[str, User] = Depends(get_ap
     if not isinstance(token_user_tuple, tuple) or len(token_user_tuple) != 2:
         logger.error(f"get_user_and_token received invalid input: {type(token_user_tuple)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Authentication processing error")
-    logger.info(f"Providing API key and User object for user {token_user_tuple[1].id}")
     return token_user_tuple # Return the tuple (api_key_string, User_object)
 
 async def get_current_user(user_and_token: tuple[str, User] = Depends(get_user_and_token)) -> User:
     """Dependency to get only the User object from the (api_key_string, User) tuple."""
     _api_key, user = user_and_token # Unpack the tuple
-    logger.info(f"get_current_user providing User object for user {user.id}")
     return user # Return only the User object
 
 # --- Remove Admin Auth --- 
@@ -0,0 +1,157 @@
+"""
+Concurrency benchmark for bot-manager's Docker Engine API client (docker_utils).
+
+Starts a fake Docker daemon as a separate uvicorn process on a unix socket. It serves the
+Engine API endpoints docker_utils calls (version, create, start, stop, inspect, list), with
+configurable create and stop delays. The benchmark then runs concurrent start_bot_container
+and stop_bot_container calls against it and reports their wall time and the event loop lag
+seen meanwhile. With a non-blocking client, N concurrent launches take about one create
+delay, not N, and the loop lag stays in the milliseconds.
+
+Usage (from services/bot-manager):
+    python benchmark.py --bots 10 --create-delay 0.5 --stop-delay 1.0
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from urllib.parse import parse_qs
+
+# Seconds the fake daemon takes to create and to stop a container (set by main() for its process)
+CREATE_DELAY = float(os.environ.get("BENCHMARK_CREATE_DELAY", "0.5"))
+STOP_DELAY = float(os.environ.get("BENCHMARK_STOP_DELAY", "1.0"))
+
+_containers = {} # Container ID -> {"name", "labels", "running"}
+
+async def _respond(send, status: int, body=None):
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"content-type", b"application/json")] if body is not None else []
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+
+def _find(ref: str):
+    """Container ID for an ID or name, as Docker resolves both."""
+    if ref in _containers:
+        return ref
+    return next((cid for cid, c in _containers.items() if c["name"] == ref), None)
+
+async def docker_app(scope, receive, send):
+    """Fake Docker daemon: the subset of the Engine API used by docker_utils."""
+    if scope["type"] != "http":
+        return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    method, parts = scope["method"], scope["path"].strip("/").split("/")
+    query = {k: v[0] for k, v in parse_qs(scope["query_string"].decode()).items()}
+
+    if parts == ["version"]:
+        return await _respond(send, 200, {"ApiVersion": "1.43"})
+    if method == "POST" and parts == ["containers", "create"]:
+        await asyncio.sleep(CREATE_DELAY)
+        name = query.get("name", "")
+        if _find(name):
+            return await _respond(send, 409, {"message": f"Conflict. The container name \"/{name}\" is already in use"})
+        container_id = uuid.uuid4().hex * 2
+        _containers[container_id] = {"name": name, "labels": json.loads(body or b"{}").get("Labels") or {}, "running": False}
+        return await _respond(send, 201, {"Id": container_id, "Warnings": []})
+    if method == "GET" and parts == ["containers", "json"]:
+        labels = json.loads(query.get("filters", "{}")).get("label", [])
+        def matches(container):
+            for label in labels:
+                key, _, value = label.partition("=")
+                if key not in container["labels"] or (value and container["labels"][key] != value):
+                    return False
+            return True
+        return await _respond(send, 200, [
+            {"Id": cid, "Names": [f"/{c['name']}"], "Labels": c["labels"], "Created": int(time.time())}
+            for cid, c in _containers.items() if c["running"] and matches(c)
+        ])
+    if len(parts) == 3 and parts[0] == "containers":
+        container_id = _find(parts[1])
+        if container_id is None:
+            return await _respond(send, 404, {"message": f"No such container: {parts[1]}"})
+        container = _containers[container_id]
+        if method == "GET" and parts[2] == "json":
+            return await _respond(send, 200, {"Id": container_id, "Name": f"/{container['name']}",
+                                              "State": {"Status": "running" if container["running"] else "created",
+                                                        "Running": container["running"]}})
+        if method == "POST" and parts[2] == "start":
+            if container["running"]:
+                return await _respond(send, 304)
+            container["running"] = True
+            return await _respond(send, 204)
+        if method == "POST" and parts[2] == "stop":
+            await asyncio.sleep(STOP_DELAY)
+            del _containers[container_id] # AutoRemove
+            return await _respond(send, 204)
+    await _respond(send, 404, {"message": "page not found"})
+
+async def run_benchmark(bots: int):
+    import docker_utils # Reads DOCKER_HOST on import
+
+    await docker_utils.init_docker_client(max_retries=50, delay=0.2)
+    lag = []
+    async def probe():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag.append(time.perf_counter() - start - 0.01)
+    prober = asyncio.create_task(probe())
+    try:
+        start = time.perf_counter()
+        container_ids = await asyncio.gather(*[
+            docker_utils.start_bot_container(i, "https://meet.google.com/abc-defg-hij", "google_meet", None, "token", "abc-defg-hij")
+            for i in range(bots)
+        ])
+        start_seconds = time.perf_counter() - start
+        start_lag, lag[:] = max(lag, default=0.0), []
+
+        start = time.perf_counter()
+        stopped = await asyncio.gather(*[docker_utils.stop_bot_container(c) for c in container_ids if c])
+        stop_seconds = time.perf_counter() - start
+        stop_lag = max(lag, default=0.0)
+    finally:
+        prober.cancel()
+        await docker_utils.close_docker_client()
+    return container_ids, start_seconds, start_lag, stopped, stop_seconds, stop_lag
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=10, help="Concurrent launches, then concurrent stops")
+    parser.add_argument("--create-delay", type=float, default=0.5, help="Seconds the fake daemon takes per create")
+    parser.add_argument("--stop-delay", type=float, default=1.0, help="Seconds the fake daemon takes per stop")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="fake-docker-"), "docker.sock")
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])),
+        "BENCHMARK_CREATE_DELAY": str(args.create_delay),
+        "BENCHMARK_STOP_DELAY": str(args.stop_delay),
+    }
+    daemon = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmark:docker_app", "--uds", socket_path, "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    os.environ["DOCKER_HOST"] = f"unix://{socket_path}"
+    try:
+        container_ids, start_seconds, start_lag, stopped, stop_seconds, stop_lag = asyncio.run(run_benchmark(args.bots))
+        print(f"{args.bots} bots against a fake Docker daemon (create {args.create_delay:g}s, stop {args.stop_delay:g}s)")
+        print(f"  concurrent launches: {start_seconds:6.2f} s   {sum(map(bool, container_ids))}/{args.bots} started   max loop lag {start_lag * 1000:6.1f} ms")
+        print(f"  concurrent stops:    {stop_seconds:6.2f} s   {sum(stopped)}/{len(stopped)} stopped   max loop lag {stop_lag * 1000:6.1f} ms")
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
-import requests_unixsocket
+import httpx
 import logging
 import json
 import uuid
 import os
-import time
-from typing import Optional
+import asyncio
+from typing import Dict, List, Optional
 
 # Import the Platform class from shared models
 from shared_models.schemas import Platform
@@ -13,118 +13,107 @@ from shared_models.schemas import Platform
 DOCKER_HOST = os.environ.get("DOCKER_HOST", "unix://var/run/docker.sock")
 DOCKER_NETWORK = os.environ.get("DOCKER_NETWORK", "vexa_default")
 BOT_IMAGE_NAME = os.environ.get("BOT_IMAGE", "vexa-bot:latest")
+# Seconds allowed for each Docker Engine API call (connect, read, pool wait)
+DOCKER_API_TIMEOUT = float(os.environ.get("DOCKER_API_TIMEOUT", "10"))
+# Seconds Docker gives a bot to exit on stop before killing it; the stop call waits this long on top
+DOCKER_STOP_TIMEOUT = int(os.environ.get("DOCKER_STOP_TIMEOUT", "10"))
+# Pooled connections to the Docker socket, i.e. Docker calls in flight at once
+DOCKER_MAX_CONNECTIONS = int(os.environ.get("DOCKER_MAX_CONNECTIONS", "20"))
+# Retries of a call that could not connect; idempotent calls (inspect, start, stop) are also retried after dropped connections
+DOCKER_API_RETRIES = int(os.environ.get("DOCKER_API_RETRIES", "2"))
 
 logger = logging.getLogger("bot_manager.docker_utils")
 
-# Global session for requests_unixsocket
-_socket_session = None
+# Global async client for the Docker Engine API over the unix socket
+_docker_client: Optional[httpx.AsyncClient] = None
 
 # Define a local exception
 class DockerConnectionError(Exception):
     pass
 
-def get_socket_session(max_retries=3, delay=2):
-    """Initializes and returns a requests_unixsocket session with retries."""
-    global _socket_session
-    if _socket_session is None:
-        logger.info(f"Attempting to initialize requests_unixsocket session for {DOCKER_HOST}...")
-        retries = 0
-        # Extract socket path correctly AND ensure it's absolute
-        socket_path_relative = DOCKER_HOST.split('//', 1)[1]
-        socket_path_abs = f"/{socket_path_relative}" # Prepend slash for absolute path
-
-        # URL encode path separately using the absolute path
-        # The http+unix scheme requires the encoded absolute path
-        socket_path_encoded = socket_path_abs.replace("/", "%2F")
-        socket_url = f'http+unix://{socket_path_encoded}'
-
-        while retries < max_retries:
-            try:
-                # Check socket file exists before attempting connection using the absolute path
-                logger.debug(f"Checking for socket file at absolute path: {socket_path_abs}") # Added debug log
-                if not os.path.exists(socket_path_abs):
-                     # Ensure the error message shows the absolute path being checked
-                     raise FileNotFoundError(f"Docker socket file not found at: {socket_path_abs}")
-
-                logger.debug(f"Attempt {retries+1}/{max_retries}: Creating session.")
-                temp_session = requests_unixsocket.Session()
-
-                # Test connection by getting Docker version via the correctly formed URL
-                logger.debug(f"Attempt {retries+1}/{max_retries}: Getting Docker version via {socket_url}/version")
-                response = temp_session.get(f'{socket_url}/version')
-                response.raise_for_status() # Raise HTTPError for bad responses
-                version_data = response.json()
-                api_version = version_data.get('ApiVersion')
-                logger.info(f"requests_unixsocket session initialized. Docker API version: {api_version}")
-                _socket_session = temp_session # Assign only on success
-                return _socket_session
-
-            except FileNotFoundError as e:
-                 # Log the actual exception message which now includes the absolute path
-                 logger.warning(f"Attempt {retries+1}/{max_retries}: {e}. Retrying in {delay}s...")
-            except requests_unixsocket.exceptions.ConnectionError as e:
-                 logger.warning(f"Attempt {retries+1}/{max_retries}: Socket connection error ({e}). Is Docker running? Retrying in {delay}s...")
-            except requests_unixsocket.exceptions.HTTPError as e:
-                logger.error(f"Attempt {retries+1}/{max_retries}: HTTP error communicating with Docker socket: {e}", exc_info=True)
-                 # Don't retry on HTTP errors like 4xx/5xx immediately, might be persistent issue
-                break
-            except Exception as e:
-                logger.error(f"Attempt {retries+1}/{max_retries}: Failed to initialize requests_unixsocket session: {e}", exc_info=True)
-
-            retries += 1
-            if retries < max_retries:
-                time.sleep(delay)
-            else:
-                logger.error(f"Failed to connect to Docker socket at {DOCKER_HOST} after {max_retries} attempts.")
-                _socket_session = None
-                raise DockerConnectionError(f"Could not connect to Docker socket after {max_retries} attempts.")
-
-    return _socket_session
-
-def close_docker_client(): # Keep name for compatibility in main.py
-    """Closes the requests_unixsocket session."""
-    global _socket_session
-    if _socket_session:
-        logger.info("Closing requests_unixsocket session.")
+def docker_socket_path() -> str:
+    """Absolute path of the socket in DOCKER_HOST (unix://var/run/docker.sock and unix:///var/run/docker.sock alike)."""
+    return "/" + DOCKER_HOST.split('//', 1)[1].lstrip("/")
+
+def get_docker_client() -> httpx.AsyncClient:
+    """Returns the shared Docker API client, creating it (without connecting) on first use."""
+    global _docker_client
+    if _docker_client is None:
+        transport = httpx.AsyncHTTPTransport(
+            uds=docker_socket_path(),
+            retries=DOCKER_API_RETRIES, # Connection failures only: the request was never sent
+            limits=httpx.Limits(max_connections=DOCKER_MAX_CONNECTIONS, max_keepalive_connections=DOCKER_MAX_CONNECTIONS),
+        )
+        # The host is ignored on a unix socket; "docker" only makes URLs readable in logs
+        _docker_client = httpx.AsyncClient(transport=transport, base_url="http://docker", timeout=DOCKER_API_TIMEOUT)
+    return _docker_client
+
+async def docker_request(method: str, path: str, retry: bool = False, **kwargs) -> httpx.Response:
+    """
+    Sends a Docker Engine API request. With retry (for idempotent calls), transport errors are
+    retried DOCKER_API_RETRIES times with a short backoff, except read timeouts: the daemon got
+    the call and is slow, and asking again would only wait longer. The last error is raised.
+    """
+    client = get_docker_client()
+    attempts = DOCKER_API_RETRIES + 1 if retry else 1
+    for attempt in range(1, attempts + 1):
+        try:
+            return await client.request(method, path, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == attempts or isinstance(e, httpx.ReadTimeout):
+                raise
+            logger.warning(f"Docker {method} {path} failed ({e!r}), retrying ({attempt}/{DOCKER_API_RETRIES})...")
+            await asyncio.sleep(0.2 * attempt)
+
+async def init_docker_client(max_retries=3, delay=2):
+    """Creates the Docker API client and checks the daemon answers, waiting for it between retries."""
+    socket_path = docker_socket_path()
+    for attempt in range(1, max_retries + 1):
+        try:
+            if not os.path.exists(socket_path):
+                raise FileNotFoundError(f"Docker socket file not found at: {socket_path}")
+            response = await docker_request("GET", "/version")
+            response.raise_for_status()
+            logger.info(f"Docker API client initialized. Docker API version: {response.json().get('ApiVersion')}")
+            return get_docker_client()
+        except FileNotFoundError as e:
+            logger.warning(f"Attempt {attempt}/{max_retries}: {e}. Retrying in {delay}s...")
+        except httpx.TransportError as e:
+            logger.warning(f"Attempt {attempt}/{max_retries}: Socket connection error ({e!r}). Is Docker running? Retrying in {delay}s...")
+        except httpx.HTTPStatusError as e:
+            # Don't retry on HTTP errors like 4xx/5xx, might be persistent issue
+            logger.error(f"Attempt {attempt}/{max_retries}: HTTP error communicating with Docker socket: {e}")
+            break
+        if attempt < max_retries:
+            await asyncio.sleep(delay)
+    logger.error(f"Failed to connect to Docker socket at {DOCKER_HOST} after {max_retries} attempts.")
+    raise DockerConnectionError(f"Could not connect to Docker socket after {max_retries} attempts.")
+
+async def close_docker_client():
+    """Closes the Docker API client and its pooled connections."""
+    global _docker_client
+    if _docker_client:
+        logger.info("Closing Docker API client.")
         try:
-            _socket_session.close()
+            await _docker_client.aclose()
         except Exception as e:
-            logger.warning(f"Error closing requests_unixsocket session: {e}")
-        _socket_session = None
+            logger.warning(f"Error closing Docker API client: {e}")
+        _docker_client = None
 
-def start_bot_container(
+def build_bot_config(
     meeting_id: int,
     meeting_url: Optional[str],
-    platform: str, # External name (e.g., google_meet)
+    platform: str,
     bot_name: Optional[str],
-    user_token: str, # *** ADDED ***
-    native_meeting_id: str # *** ADDED ***
-) -> Optional[str]:
-    """Starts a vexa-bot container using requests_unixsocket.
-    
-    Args:
-        meeting_id: The internal database ID for the meeting.
-        meeting_url: The *constructed* meeting URL (can be None).
-        platform: The platform string (e.g., 'google_meet').
-        bot_name: Optional name for the bot.
-        user_token: The API token of the user requesting the bot. # *** ADDED doc ***
-        native_meeting_id: The platform-specific meeting ID (e.g., 'xyz-abc-pdq'). # *** ADDED doc ***
-        
-    Returns:
-        The container ID if successful, None otherwise.
-    """
-    session = get_socket_session()
-    if not session:
-        logger.error("Cannot start bot container, requests_unixsocket session not available.")
-        return None
-
-    container_name = f"vexa-bot-{meeting_id}-{uuid.uuid4().hex[:8]}"
+    user_token: str,
+    native_meeting_id: str
+) -> dict:
+    """The BOT_CONFIG a bot joins its meeting with (passed as an env var, or handed to a warm bot)."""
     if not bot_name:
         bot_name = f"VexaBot-{uuid.uuid4().hex[:6]}"
-
-    # Construct BOT_CONFIG JSON - Use external platform name directly
-    bot_config_data = {
-        "meeting_id": meeting_id,         # Keep internal ID 
+    # Use external platform name directly
+    return {
+        "meeting_id": meeting_id,         # Keep internal ID
         "platform": platform,             # Use original external platform name
         "meetingUrl": meeting_url,
         "botName": bot_name,
@@ -137,38 +126,39 @@ def start_bot_container(
             "everyoneLeftTimeout": 300000
         }
     }
-    bot_config_json = json.dumps(bot_config_data)
 
-    logger.info(f"Bot config: {bot_config_json}") # Log the full config
-
-    environment = [
-        f"BOT_CONFIG={bot_config_json}",
+def bot_environment(*extra: str) -> List[str]:
+    """Environment of a bot container: extra entries plus the settings every bot gets."""
+    return [
+        *extra,
         f"WHISPER_LIVE_URL={os.getenv('WHISPER_LIVE_URL', 'ws://whisperlive:9090')}",
         f"LOG_LEVEL={os.getenv('LOG_LEVEL', 'INFO').upper()}",
     ]
 
-    # Ensure absolute path for URL encoding here as well
-    socket_path_relative = DOCKER_HOST.split('//', 1)[1]
-    socket_path_abs = f"/{socket_path_relative}"
-    socket_path_encoded = socket_path_abs.replace("/", "%2F")
-    socket_url_base = f'http+unix://{socket_path_encoded}'
-
+async def create_and_start_container(container_name: str, environment: List[str],
+                                     labels: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Creates and starts a bot container. If a container with this name already exists (from an
+    earlier attempt), that one is started instead. Returns the container ID, or None on failure.
+    """
     # Docker API payload for creating a container
     create_payload = {
         "Image": BOT_IMAGE_NAME,
         "Env": environment,
+        "Labels": labels or {},
         "HostConfig": {
             "NetworkMode": DOCKER_NETWORK,
             "AutoRemove": True
         },
     }
 
-    create_url = f'{socket_url_base}/containers/create?name={container_name}'
-    start_url_template = f'{socket_url_base}/containers/{{}}/start'
-
     try:
-        logger.info(f"Attempting to create bot container '{container_name}' ({BOT_IMAGE_NAME}) via socket ({socket_url_base})...")
-        response = session.post(create_url, json=create_payload)
+        logger.info(f"Attempting to create bot container '{container_name}' ({BOT_IMAGE_NAME})...")
+        # Not retried after a read error: the container may have been created, and the name is unique
+        response = await docker_request("POST", "/containers/create", params={"name": container_name}, json=create_payload)
+        if response.status_code == 409:
+            logger.warning(f"Container '{container_name}' already exists, starting it")
+            response = await docker_request("GET", f"/containers/{container_name}/json", retry=True)
         response.raise_for_status()
         container_info = response.json()
         container_id = container_info.get('Id')
@@ -179,45 +169,76 @@ def start_bot_container(
 
         logger.info(f"Container {container_id} created. Starting...")
 
-        start_url = start_url_template.format(container_id)
-        response = session.post(start_url)
+        # Starting a started container returns 304, so the start call can be retried
+        response = await docker_request("POST", f"/containers/{container_id}/start", retry=True)
 
-        if response.status_code != 204:
+        if response.status_code not in (204, 304):
             logger.error(f"Failed to start container {container_id}. Status: {response.status_code}, Response: {response.text}")
             return None
 
-        logger.info(f"Successfully started container {container_id} for meeting: {meeting_id}")
         return container_id
 
-    except requests_unixsocket.exceptions.RequestException as e:
-        logger.error(f"HTTP error communicating with Docker socket: {e}", exc_info=True)
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error communicating with Docker socket: {e!r}", exc_info=True)
     except Exception as e:
         logger.error(f"Unexpected error starting container via socket: {e}", exc_info=True)
 
     return None
 
-def stop_bot_container(container_id: str) -> bool:
-    """Stops a container using its ID via requests_unixsocket."""
-    session = get_socket_session()
-    if not session:
-        logger.error(f"Cannot stop container {container_id}, requests_unixsocket session not available.")
-        return False
+async def start_bot_container(
+    meeting_id: int,
+    meeting_url: Optional[str],
+    platform: str, # External name (e.g., google_meet)
+    bot_name: Optional[str],
+    user_token: str, # *** ADDED ***
+    native_meeting_id: str # *** ADDED ***
+) -> Optional[str]:
+    """Starts a vexa-bot container through the Docker Engine API.
 
-    # Ensure absolute path for URL encoding here as well
-    socket_path_relative = DOCKER_HOST.split('//', 1)[1]
-    socket_path_abs = f"/{socket_path_relative}"
-    socket_path_encoded = socket_path_abs.replace("/", "%2F")
-    socket_url_base = f'http+unix://{socket_path_encoded}'
-    
-    stop_url = f'{socket_url_base}/containers/{container_id}/stop'
-    # Since AutoRemove=True, we don't need a separate remove call
+    Args:
+        meeting_id: The internal database ID for the meeting.
+        meeting_url: The *constructed* meeting URL (can be None).
+        platform: The platform string (e.g., 'google_meet').
+        bot_name: Optional name for the bot.
+        user_token: The API token of the user requesting the bot. # *** ADDED doc ***
+        native_meeting_id: The platform-specific meeting ID (e.g., 'xyz-abc-pdq'). # *** ADDED doc ***
+
+    Returns:
+        The container ID if successful, None otherwise.
+    """
+    bot_config_data = build_bot_config(meeting_id, meeting_url, platform, bot_name, user_token, native_meeting_id)
+    logger.debug("Bot config for meeting %s: %s", meeting_id, {**bot_config_data, "token": "***"})
+
+    # One name per meeting: a retried launch finds the container of an earlier attempt instead of adding one
+    container_id = await create_and_start_container(
+        f"vexa-bot-{meeting_id}", bot_environment(f"BOT_CONFIG={json.dumps(bot_config_data)}")
+    )
+    if container_id:
+        logger.info(f"Successfully started container {container_id} for meeting: {meeting_id}")
+    return container_id
 
+async def list_containers(label: str) -> Optional[List[dict]]:
+    """Running containers carrying a label ("key" or "key=value"), or None if Docker could not be reached."""
     try:
-        logger.info(f"Attempting to stop container {container_id} via socket ({stop_url})...") # Log stop URL
-        # Send POST request to stop the container. Docker waits for it to stop.
-        # Timeout can be added via query param `t` (e.g., ?t=10 for 10 seconds)
-        response = session.post(f"{stop_url}?t=10") 
-        
+        response = await docker_request("GET", "/containers/json", retry=True,
+                                        params={"filters": json.dumps({"label": [label]})})
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error listing containers with label {label}: {e!r}")
+        return None
+
+async def stop_bot_container(container_id: str) -> bool:
+    """Stops a container using its ID through the Docker Engine API."""
+    # Since AutoRemove=True, we don't need a separate remove call
+    try:
+        logger.info(f"Attempting to stop container {container_id}...")
+        # Docker waits up to DOCKER_STOP_TIMEOUT seconds for the bot to exit before answering
+        response = await docker_request(
+            "POST", f"/containers/{container_id}/stop", retry=True,
+            params={"t": DOCKER_STOP_TIMEOUT}, timeout=DOCKER_STOP_TIMEOUT + DOCKER_API_TIMEOUT
+        )
+
         # Check status code: 204 No Content (success), 304 Not Modified (already stopped), 404 Not Found
         if response.status_code == 204:
             logger.info(f"Successfully sent stop command to container {container_id}.")
@@ -227,20 +248,33 @@ def stop_bot_container(container_id: str) -> bool:
             return True
         elif response.status_code == 404:
             logger.warning(f"Container {container_id} not found, assuming already stopped/removed.")
-            return True 
+            return True
         else:
-            # Raise exception for other errors (like 500)
             logger.error(f"Error stopping container {container_id}. Status: {response.status_code}, Body: {response.text}")
-            response.raise_for_status()
-            return False # Should not be reached if raise_for_status() works
+            return False
 
-    except requests_unixsocket.exceptions.RequestException as e:
-        # Handle 404 specifically if raise_for_status() doesn't catch it as expected
-        if hasattr(e, 'response') and e.response is not None and e.response.status_code == 404:
-            logger.warning(f"Container {container_id} not found (exception check), assuming already stopped/removed.")
-            return True
-        logger.error(f"HTTP error stopping container {container_id}: {e}", exc_info=True)
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error stopping container {container_id}: {e!r}", exc_info=True)
         return False
     except Exception as e:
         logger.error(f"Unexpected error stopping container {container_id}: {e}", exc_info=True)
-        return False 
\ No newline at end of file
+        return False
+
+async def get_container_state(container_id: str) -> Optional[dict]:
+    """
+    Returns the Docker state of a container (the "State" object of an inspect: Status,
+    Running, StartedAt, ExitCode, ...), {} if the container does not exist (bots are
+    auto-removed when they exit) or None if Docker could not be reached.
+    """
+    try:
+        response = await docker_request("GET", f"/containers/{container_id}/json", retry=True, timeout=5)
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return response.json().get("State", {})
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error inspecting container {container_id}: {e!r}")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error inspecting container {container_id}: {e}", exc_info=True)
+        return None
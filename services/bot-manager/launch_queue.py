@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("bot_manager.launch_queue")
+
+# Launch workers per bot-manager replica, i.e. bot containers being created at once
+BOT_LAUNCH_WORKERS = int(os.environ.get("BOT_LAUNCH_WORKERS", "4"))
+# Seconds a claimed job stays invisible to other workers; a worker that dies mid-launch
+# releases its job after this long. Extended every third of it while the launch runs
+BOT_LAUNCH_VISIBILITY_TIMEOUT = float(os.environ.get("BOT_LAUNCH_VISIBILITY_TIMEOUT", "120"))
+BOT_LAUNCH_MAX_ATTEMPTS = int(os.environ.get("BOT_LAUNCH_MAX_ATTEMPTS", "3"))
+# Delay before a failed launch is retried, multiplied by the attempt number
+BOT_LAUNCH_RETRY_DELAY = float(os.environ.get("BOT_LAUNCH_RETRY_DELAY", "5"))
+# Idle workers check for jobs enqueued by other replicas this often
+BOT_LAUNCH_POLL_SECONDS = float(os.environ.get("BOT_LAUNCH_POLL_SECONDS", "1"))
+
+# Sorted set of meeting IDs scored by the time their job becomes visible: queued jobs have
+# their enqueue time, claimed jobs the end of their visibility timeout
+LAUNCH_QUEUE_KEY = "bot_launch:queue"
+LAUNCH_JOBS_KEY = "bot_launch:jobs" # Hash: meeting ID -> job JSON (no credentials: tokens are referenced by id)
+LAUNCH_ATTEMPTS_KEY = "bot_launch:attempts" # Hash: meeting ID -> claims so far
+# Meeting status changes (requested, active, error, stopped) for clients that follow launches
+BOT_STATUS_STREAM = "bot_status_events"
+BOT_STATUS_STREAM_MAXLEN = int(os.environ.get("BOT_STATUS_STREAM_MAXLEN", "10000"))
+
+# Takes the oldest visible job and hides it for the visibility timeout, atomically
+_CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ids == 0 then
+    return nil
+end
+local id = ids[1]
+redis.call('ZADD', KEYS[1], ARGV[2], id)
+local attempts = redis.call('HINCRBY', KEYS[3], id, 1)
+return {id, attempts, redis.call('HGET', KEYS[2], id)}
+"""
+
+JobHandler = Callable[[dict], Awaitable[bool]]
+
+async def publish_status_event(redis_client: Any, meeting: Any):
+    """Appends a meeting's current status to the bot status stream."""
+    entry = {
+        "user_id": meeting.user_id,
+        "meeting_id": meeting.id,
+        "platform": meeting.platform,
+        "native_meeting_id": meeting.platform_specific_id or "",
+        "status": meeting.status,
+        "bot_container_id": meeting.bot_container_id or "",
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    try:
+        await redis_client.xadd(BOT_STATUS_STREAM, entry, maxlen=BOT_STATUS_STREAM_MAXLEN, approximate=True)
+    except Exception as e:
+        logger.error(f"Failed to publish status '{meeting.status}' of meeting {meeting.id}: {e}")
+
+class LaunchQueue:
+    """
+    Redis-backed queue of bot launches with visibility timeouts.
+
+    POST /bots enqueues a job per meeting and returns; workers in every bot-manager replica
+    claim jobs and run the handler. A claimed job is hidden, not removed, until the handler
+    finishes, so a job whose worker dies is claimed again once its visibility timeout ends.
+    The handler returns False (or raises) to have the job retried later; give_up is called
+    for a job whose last attempt failed.
+    """
+
+    def __init__(self, handler: JobHandler, give_up: Callable[[dict], Awaitable[None]]):
+        self.handler = handler
+        self.give_up = give_up
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._claim = None
+
+    async def enqueue(self, redis_client: Any, meeting_id: int, job: dict):
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(LAUNCH_JOBS_KEY, meeting_id, json.dumps(job))
+            pipe.hdel(LAUNCH_ATTEMPTS_KEY, meeting_id)
+            pipe.zadd(LAUNCH_QUEUE_KEY, {meeting_id: time.time()})
+            await pipe.execute()
+        self._wakeup.set() # Workers of other replicas find it on their next poll
+
+    async def remove(self, redis_client: Any, meeting_id: int) -> bool:
+        """Drops a meeting's job; True if it was still queued or being launched."""
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.zrem(LAUNCH_QUEUE_KEY, meeting_id)
+            pipe.hdel(LAUNCH_JOBS_KEY, meeting_id)
+            pipe.hdel(LAUNCH_ATTEMPTS_KEY, meeting_id)
+            removed, _, _ = await pipe.execute()
+        return bool(removed)
+
+    async def claim(self, redis_client: Any) -> Optional[Tuple[int, int, Optional[dict]]]:
+        """Claims the oldest visible job: (meeting ID, attempt number, job), or None if there is none."""
+        if self._claim is None:
+            self._claim = redis_client.register_script(_CLAIM_SCRIPT)
+        now = time.time()
+        claimed = await self._claim(keys=[LAUNCH_QUEUE_KEY, LAUNCH_JOBS_KEY, LAUNCH_ATTEMPTS_KEY],
+                                    args=[now, now + BOT_LAUNCH_VISIBILITY_TIMEOUT])
+        if not claimed:
+            return None
+        meeting_id, attempts, job = claimed
+        return int(meeting_id), int(attempts), json.loads(job) if job else None
+
+    def start(self, redis_client: Any):
+        self._tasks = [asyncio.create_task(self._work(redis_client)) for _ in range(BOT_LAUNCH_WORKERS)]
+        logger.info(f"Started {BOT_LAUNCH_WORKERS} bot launch workers")
+
+    async def stop(self):
+        # Jobs being launched are claimed again by a worker once their visibility timeout ends
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self, redis_client: Any):
+        while True:
+            try:
+                self._wakeup.clear()
+                claimed = await self.claim(redis_client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to claim a bot launch job: {e}")
+                await asyncio.sleep(BOT_LAUNCH_POLL_SECONDS)
+                continue
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), BOT_LAUNCH_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(redis_client, *claimed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to run the launch job of meeting {claimed[0]}: {e}", exc_info=True)
+
+    async def _run(self, redis_client: Any, meeting_id: int, attempt: int, job: Optional[dict]):
+        if job is None: # Removed while being claimed
+            await self.remove(redis_client, meeting_id)
+            return
+        final_attempt = attempt >= BOT_LAUNCH_MAX_ATTEMPTS
+        heartbeat = asyncio.create_task(self._extend_visibility(redis_client, meeting_id))
+        try:
+            done = await self.handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Launch attempt {attempt} for meeting {meeting_id} failed: {e}", exc_info=True)
+            done = False
+        finally:
+            heartbeat.cancel()
+        try:
+            if done:
+                await self.remove(redis_client, meeting_id)
+            elif final_attempt:
+                logger.error(f"Giving up launching a bot for meeting {meeting_id} after {attempt} attempts")
+                await self.give_up(job)
+                await self.remove(redis_client, meeting_id)
+            else:
+                delay = BOT_LAUNCH_RETRY_DELAY * attempt
+                logger.warning(f"Launch attempt {attempt} for meeting {meeting_id} failed, retrying in {delay:g}s")
+                # xx: not re-added if the job was removed (meeting stopped) meanwhile
+                await redis_client.zadd(LAUNCH_QUEUE_KEY, {meeting_id: time.time() + delay}, xx=True)
+        except Exception as e:
+            # The job stays claimed and is retried once its visibility timeout ends
+            logger.error(f"Failed to update the launch job of meeting {meeting_id}: {e}", exc_info=True)
+
+    async def _extend_visibility(self, redis_client: Any, meeting_id: int):
+        """Keeps a job hidden from other workers while its launch runs, however long it takes."""
+        while True:
+            await asyncio.sleep(BOT_LAUNCH_VISIBILITY_TIMEOUT / 3)
+            try:
+                # xx: not re-added if the job was removed (meeting stopped) meanwhile
+                await redis_client.zadd(LAUNCH_QUEUE_KEY, {meeting_id: time.time() + BOT_LAUNCH_VISIBILITY_TIMEOUT}, xx=True)
+            except Exception as e:
+                logger.warning(f"Failed to extend the launch job of meeting {meeting_id}: {e}")
@@ -1,5 +1,5 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, status
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import logging
@@ -14,21 +14,22 @@ import redis.asyncio as aioredis
 # from app.tasks.monitoring import celery_app # Not used here
 
 from config import BOT_IMAGE_NAME, REDIS_URL
-from docker_utils import get_socket_session, close_docker_client, start_bot_container, stop_bot_container
-from shared_models.database import init_db, get_db
-from shared_models.models import User, Meeting # Import Meeting model
-from shared_models.schemas import MeetingCreate, MeetingResponse, Platform # Import new schemas and Platform
-from auth import get_user_and_token # Import the new dependency
+from docker_utils import init_docker_client, close_docker_client, start_bot_container, stop_bot_container, get_container_state, build_bot_config
+from shared_models.database import init_db, get_db, async_session_local
+from shared_models.models import User, Meeting, APIToken # Import Meeting model
+from shared_models.schemas import MeetingCreate, MeetingResponse, BotStatusResponse, Platform # Import new schemas and Platform
+from shared_models.transcripts import finalize_meeting_transcript
+from shared_models.logging_utils import configure_logging
+from auth import get_user_and_token, auth_cache # Import the new dependency
+from launch_queue import LaunchQueue, publish_status_event
+from warm_pool import WarmPool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_
+from sqlalchemy import and_, update
 from datetime import datetime # For start_time
 
 # Configure logging
-logging.basicConfig(
-    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+configure_logging()
 logger = logging.getLogger("bot_manager")
 
 # Initialize the FastAPI app
@@ -43,27 +44,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Redis client for the shared auth cache
+redis_client = None
+
 # Pydantic models - Use schemas from shared_models
 # class BotRequest(BaseModel): ... -> Replaced by MeetingCreate
 # class BotResponse(BaseModel): ... -> Replaced by MeetingResponse
 
 @app.on_event("startup")
 async def startup_event():
+    global redis_client
     logger.info("Starting up Bot Manager...")
     await init_db()
+    if redis_client is None: # Already set when running in monolith mode
+        redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+    auth_cache.start(redis_client)
     # await init_redis() # Removed redis init if not used elsewhere
     try:
-        get_socket_session()
+        await init_docker_client()
     except Exception as e:
         logger.error(f"Failed to initialize Docker client on startup: {e}", exc_info=True)
     logger.info("Database and Docker Client initialized (attempted).")
+    launch_queue.start(redis_client)
+    warm_pool.start(containers_in_use)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Bot Manager...")
     # await close_redis() # Removed redis close if not used
-    close_docker_client()
+    await launch_queue.stop()
+    await warm_pool.stop()
+    await close_docker_client()
     logger.info("Docker Client closed.")
+    await auth_cache.stop()
+    if redis_client:
+        await redis_client.close()
 
 @app.get("/", include_in_schema=False)
 async def root():
@@ -71,21 +86,22 @@ async def root():
 
 @app.post("/bots",
           response_model=MeetingResponse,
-          status_code=status.HTTP_201_CREATED,
+          status_code=status.HTTP_202_ACCEPTED,
           summary="Request a new bot instance to join a meeting",
           dependencies=[Depends(get_user_and_token)])
 async def request_bot(
     req: MeetingCreate,
+    response: Response,
     auth_data: tuple[str, User] = Depends(get_user_and_token),
     db: AsyncSession = Depends(get_db)
 ):
     """Handles requests to launch a new bot container for a meeting.
     Requires a valid API token associated with a user.
     - Constructs the meeting URL from platform and native ID.
-    - Creates a Meeting record in the database.
-    - Starts a Docker container for the bot, passing user token, internal meeting ID, native meeting ID, and constructed URL.
-    - Updates the Meeting record with container details and status.
-    - Returns the created Meeting details.
+    - Creates a Meeting record in the database with status 'requested'.
+    - Queues the bot launch and returns 202 with the meeting. A launch worker starts the
+      container and sets the status to 'active' (or 'error'); follow it with
+      GET /bots/{platform}/{native_meeting_id} (the Location header) or the bot_status_events stream.
     """
     # Unpack the token and user from the dependency result
     user_token, current_user = auth_data
@@ -119,6 +135,11 @@ async def request_bot(
             detail=f"An active or requested meeting already exists for this platform and meeting ID. Meeting ID: {existing_meeting.id}"
         )
 
+    # The launch job references the token by id (cached lookup; identity-authenticated requests have no entry yet)
+    token_entry = await auth_cache.lookup(user_token, db)
+    if not token_entry:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid API token")
+
     # 3. Create Meeting record in DB
     new_meeting = Meeting(
         user_id=current_user.id,
@@ -132,68 +153,143 @@ async def request_bot(
     meeting_id = new_meeting.id # Internal DB ID
     logger.info(f"Created meeting record with ID: {meeting_id}")
 
-    # 4. Start the bot container
-    container_id = None
+    # 4. Queue the bot launch
+    job = {
+        "meeting_id": meeting_id,           # Internal DB ID
+        "meeting_url": constructed_url,     # Constructed URL (still pass it to bot if needed)
+        "platform": req.platform.value,     # Platform string
+        "bot_name": req.bot_name,
+        # The bot sends transcripts with the user's token; the queue (Redis) only holds its id
+        "token_id": token_entry["token_id"],
+        "native_meeting_id": native_meeting_id,
+    }
     try:
-        logger.info(f"Attempting to start bot container for meeting {meeting_id} (native: {native_meeting_id})...")
-        # MODIFY the call to start_bot_container:
-        container_id = start_bot_container(
-            meeting_id=meeting_id,           # Internal DB ID
-            meeting_url=constructed_url,     # Constructed URL (still pass it to bot if needed)
-            platform=req.platform.value,     # Platform string
-            bot_name=req.bot_name,
-            user_token=user_token,           # *** ADDED: Pass the user's API token ***
-            native_meeting_id=native_meeting_id # *** ADDED: Pass the native meeting ID ***
+        await launch_queue.enqueue(redis_client, meeting_id, job)
+    except Exception as e:
+        logger.error(f"Failed to queue bot launch for meeting {meeting_id}: {e}", exc_info=True)
+        new_meeting.status = 'error'
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"status": "error", "message": "Could not queue the bot launch.", "meeting_id": meeting_id}
         )
-        logger.info(f"Call to start_bot_container completed. Container ID: {container_id}") # Log after start
+    await publish_status_event(redis_client, new_meeting)
+
+    logger.info(f"Queued bot launch for meeting {meeting_id} (native: {native_meeting_id})")
+    response.headers["Location"] = f"/bots/{req.platform.value}/{native_meeting_id}"
+    return MeetingResponse.from_orm(new_meeting)
 
+async def launch_bot(job: dict) -> bool:
+    """
+    Launch worker job: starts the bot container of a requested meeting and marks the meeting
+    'active'. Returns False to have the launch retried; a meeting that was stopped meanwhile
+    is not launched (or its new container is stopped again).
+    """
+    meeting_id = job["meeting_id"]
+    async with async_session_local() as db:
+        meeting = await db.get(Meeting, meeting_id)
+        if not meeting or meeting.status != 'requested':
+            logger.info(f"Meeting {meeting_id} is no longer requested ({meeting.status if meeting else 'deleted'}), not launching a bot")
+            return True
+
+        user_token = await db.scalar(
+            select(APIToken.token).where(APIToken.id == job["token_id"], APIToken.user_id == meeting.user_id)
+        ) if job.get("token_id") is not None else None
+        if not user_token:
+            logger.warning(f"The API token that requested meeting {meeting_id} was revoked, not launching a bot")
+            await launch_failed(job)
+            return True
+        bot_args = {**{k: v for k, v in job.items() if k != "token_id"}, "user_token": user_token}
+
+        logger.info(f"Attempting to start bot container for meeting {meeting_id} (native: {job['native_meeting_id']})...")
+        container_id = await warm_pool.assign(redis_client, meeting_id, job["platform"], build_bot_config(**bot_args))
+        if not container_id: # No idle bot for the platform: start one for this meeting
+            container_id = await start_bot_container(**bot_args)
         if not container_id:
             logger.error(f"Failed to start bot container for meeting {meeting_id} (start_bot_container returned None)")
-            # Update status immediately if start failed
-            new_meeting.status = 'error'
-            await db.commit()
-            # Use await db.refresh(new_meeting) if needed, but commit might be enough
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={"status": "error", "message": "Failed to start bot container.", "meeting_id": meeting_id}
-            )
-
-        # 5. Update Meeting record with container details and status
-        logger.info(f"Attempting to update meeting {meeting_id} status to active with container ID {container_id}...") # Log before update
-        new_meeting.bot_container_id = container_id
-        new_meeting.status = 'active'
-        new_meeting.start_time = datetime.utcnow()
-        await db.commit()
-        await db.refresh(new_meeting)
-        logger.info(f"Successfully updated meeting {meeting_id} status.") # Log after update
+            return False
 
+        # Only a meeting still in 'requested' becomes active: a stop may have come in during the launch
+        result = await db.execute(
+            update(Meeting)
+            .where(Meeting.id == meeting_id, Meeting.status == 'requested')
+            .values(status='active', bot_container_id=container_id, start_time=datetime.utcnow())
+        )
+        await db.commit()
+        if result.rowcount == 0:
+            logger.warning(f"Meeting {meeting_id} was stopped while its bot was launching, stopping container {container_id}")
+            await stop_bot_container(container_id)
+            return True
+        await db.refresh(meeting)
         logger.info(f"Successfully started bot container {container_id} for meeting {meeting_id}")
-        return MeetingResponse.from_orm(new_meeting)
+    await publish_status_event(redis_client, meeting)
+    return True
+
+async def launch_failed(job: dict):
+    """Marks a meeting whose bot could not be launched as 'error'."""
+    async with async_session_local() as db:
+        result = await db.execute(
+            update(Meeting)
+            .where(Meeting.id == job["meeting_id"], Meeting.status == 'requested')
+            .values(status='error')
+        )
+        await db.commit()
+        if result.rowcount:
+            await publish_status_event(redis_client, await db.get(Meeting, job["meeting_id"]))
 
-    except Exception as e:
-        # Enhanced logging in the exception handler
-        logger.error(f"Exception occurred during bot startup process for meeting {meeting_id} (after DB creation): {e}", exc_info=True)
-        # Attempt to update status to error even if container start failed or subsequent update failed
-        try:
-            # Fetch again in case session state is lost or object is detached
-            meeting_to_update = await db.get(Meeting, meeting_id)
-            if meeting_to_update and meeting_to_update.status != 'error': # Avoid redundant updates
-                 logger.warning(f"Updating meeting {meeting_id} status to 'error' due to exception.")
-                 meeting_to_update.status = 'error'
-                 # Assign container ID even if update failed later, helps debugging
-                 if container_id:
-                     meeting_to_update.bot_container_id = container_id
-                 await db.commit()
-            elif not meeting_to_update:
-                logger.error(f"Could not find meeting {meeting_id} to update status to error.")
-        except Exception as db_err:
-             logger.error(f"Failed to update meeting {meeting_id} status to error after bot startup exception: {db_err}")
-
-        # Re-raise HTTPException to send appropriate response to client
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"status": "error", "message": f"An unexpected error occurred during bot startup: {str(e)}", "meeting_id": meeting_id}
+launch_queue = LaunchQueue(launch_bot, launch_failed)
+
+# Idle bots that launch_bot hands meetings to; see warm_pool.py
+warm_pool = WarmPool()
+
+async def containers_in_use() -> set:
+    """Containers of requested or active meetings (warm bots among them are not idle)."""
+    async with async_session_local() as db:
+        result = await db.execute(
+            select(Meeting.bot_container_id)
+            .where(Meeting.status.in_(['requested', 'active']), Meeting.bot_container_id.isnot(None))
         )
+        return set(result.scalars().all())
+
+@app.get("/bots/{platform}/{native_meeting_id}",
+         response_model=BotStatusResponse,
+         summary="Get the status of the latest bot for a specific meeting using platform and native ID",
+         dependencies=[Depends(get_user_and_token)])
+async def get_bot_status(
+    platform: Platform,
+    native_meeting_id: str,
+    auth_data: tuple[str, User] = Depends(get_user_and_token),
+    db: AsyncSession = Depends(get_db)
+):
+    """Returns the latest meeting record for the platform and native meeting ID and the state of its bot container."""
+    user_token, current_user = auth_data
+
+    stmt = select(Meeting).where(
+        Meeting.user_id == current_user.id,
+        Meeting.platform == platform.value,
+        Meeting.platform_specific_id == native_meeting_id
+    ).order_by(Meeting.created_at.desc())
+    result = await db.execute(stmt)
+    meeting = result.scalars().first()
+    if not meeting:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No meeting found for platform {platform.value} and meeting ID {native_meeting_id}.")
+
+    container = {}
+    if meeting.bot_container_id:
+        state = await get_container_state(meeting.bot_container_id)
+        if state is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not reach Docker to inspect the bot container.")
+        if state:
+            running = bool(state.get("Running"))
+            started_at = state.get("StartedAt")
+            container = {
+                "container_status": state.get("Status"),
+                "running": running,
+                # Docker reports "0001-01-01T00:00:00Z" for containers that never started
+                "started_at": started_at if started_at and not started_at.startswith("0001-") else None,
+                "exit_code": None if running else state.get("ExitCode"),
+            }
+    return BotStatusResponse(meeting=MeetingResponse.from_orm(meeting), **container)
 
 @app.delete("/bots/{platform}/{native_meeting_id}",
              status_code=status.HTTP_200_OK,
@@ -203,6 +299,7 @@ async def request_bot(
 async def stop_bot(
     platform: Platform,
     native_meeting_id: str,
+    background_tasks: BackgroundTasks,
     auth_data: tuple[str, User] = Depends(get_user_and_token),
     db: AsyncSession = Depends(get_db)
 ):
@@ -251,7 +348,7 @@ async def stop_bot(
     stop_success = False
     if container_id:
         logger.info(f"Attempting to stop container {container_id} for meeting {internal_meeting_id}")
-        stopped = stop_bot_container(container_id)
+        stopped = await stop_bot_container(container_id)
         if stopped:
             logger.info(f"Successfully sent stop command to container {container_id}")
             stop_success = True
@@ -259,8 +356,12 @@ async def stop_bot(
             logger.error(f"Stop command failed or container {container_id} not found by Docker for meeting {internal_meeting_id}. Marking as error.")
             meeting.status = 'error' # Mark as error if stop failed
     else:
-        # This case might happen if status was 'requested' but no container was ever assigned
-        logger.warning(f"No container ID found for meeting {internal_meeting_id} with status '{meeting.status}'. Marking as stopped.")
+        # The launch is still queued or running; a launch worker skips (or undoes) a stopped meeting
+        logger.info(f"No container yet for meeting {internal_meeting_id} with status '{meeting.status}'. Cancelling its launch.")
+        try:
+            await launch_queue.remove(redis_client, internal_meeting_id)
+        except Exception as e:
+            logger.warning(f"Failed to remove the launch job of meeting {internal_meeting_id}: {e}")
         stop_success = True # No container to stop, consider it 'stopped'
 
     # 3. Update Meeting record
@@ -269,9 +370,23 @@ async def stop_bot(
     meeting.end_time = datetime.utcnow()
     await db.commit()
     await db.refresh(meeting)
+    await publish_status_event(redis_client, meeting)
+
+    # 4. Compact the finished transcript into a single document after responding
+    if meeting.status == 'stopped':
+        background_tasks.add_task(finalize_meeting, internal_meeting_id)
 
     return MeetingResponse.from_orm(meeting)
 
+async def finalize_meeting(meeting_id: int):
+    """Background task: finalizes a stopped meeting's transcript using its own DB session."""
+    async with async_session_local() as db:
+        try:
+            await finalize_meeting_transcript(db, meeting_id)
+        except Exception as e:
+            logger.error(f"Failed to finalize transcript for meeting {meeting_id}: {e}", exc_info=True)
+            await db.rollback()
+
 # Remove old/debug endpoints if they exist
 
 if __name__ == "__main__":
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from docker_utils import bot_environment, create_and_start_container, list_containers, get_container_state, stop_bot_container
+
+logger = logging.getLogger("bot_manager.warm_pool")
+
+# Idle bots kept per platform, e.g. "google_meet=3" (empty: no warm pool)
+BOT_WARM_POOL_SIZE = os.environ.get("BOT_WARM_POOL_SIZE", "")
+# Pool sizes by time of day (UTC hours, end exclusive, may wrap midnight), overriding
+# BOT_WARM_POOL_SIZE per platform, e.g. {"07-19": {"google_meet": 10}, "19-07": {"google_meet": 1}}
+BOT_WARM_POOL_SCHEDULE = os.environ.get("BOT_WARM_POOL_SCHEDULE", "")
+# Seconds between pool checks (dead bots dropped, missing ones started)
+BOT_WARM_POOL_REFILL_SECONDS = float(os.environ.get("BOT_WARM_POOL_REFILL_SECONDS", "10"))
+# Idle bots older than this are replaced, so meetings do not get a long-running browser
+BOT_WARM_POOL_MAX_IDLE_SECONDS = float(os.environ.get("BOT_WARM_POOL_MAX_IDLE_SECONDS", "3600"))
+# Warm bots being started at once
+BOT_WARM_POOL_STARTS = int(os.environ.get("BOT_WARM_POOL_STARTS", "2"))
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
+
+# Label of warm bot containers (value: platform), used to find them again after a restart
+WARM_POOL_LABEL = "vexa.warm_pool"
+# List a warm bot waits on (BLPOP) for its BOT_CONFIG
+BOT_CONFIG_KEY_PREFIX = "bot_config:"
+# Seconds a handed-over config waits for its bot (which is already waiting on it); it holds the
+# user's token, so it does not stay around if the bot is gone
+BOT_CONFIG_TTL_SECONDS = 30
+# Meeting ID -> warm bot it was handed to, so a retried launch does not take a second bot
+WARM_HANDOVER_PREFIX = "bot_warm_handover:"
+WARM_HANDOVER_TTL_SECONDS = 3600
+
+@dataclass
+class WarmBot:
+    container_id: str
+    container_name: str
+    started_at: float
+
+def parse_pool_sizes(value: str) -> Dict[str, int]:
+    sizes = {}
+    for item in value.split(","):
+        platform, _, size = item.partition("=")
+        if platform.strip() and size.strip():
+            sizes[platform.strip()] = int(size)
+    return sizes
+
+def parse_schedule(value: str) -> Dict[tuple, Dict[str, int]]:
+    """{"HH-HH": {platform: size}} -> {(start_hour, end_hour): {platform: size}}"""
+    schedule = {}
+    for hours, sizes in (json.loads(value) if value else {}).items():
+        start, _, end = hours.partition("-")
+        schedule[(int(start) % 24, int(end) % 24)] = {platform: int(size) for platform, size in sizes.items()}
+    return schedule
+
+def in_hours(hour: int, start: int, end: int) -> bool:
+    return start <= hour < end if start < end else hour >= start or hour < end
+
+class WarmPool:
+    """
+    Pre-started, idle bot containers on this node, per platform.
+
+    A warm bot is started without BOT_CONFIG: it gets BOT_CONFIG_KEY and waits (BLPOP on that
+    Redis list) for the config of the meeting it is assigned to, so its browser is already up
+    when a meeting is requested. Bots handed out are replaced in the background; the pool
+    size per platform can follow the time of day. The bot image must support this mode;
+    without BOT_WARM_POOL_SIZE or BOT_WARM_POOL_SCHEDULE the pool stays empty.
+    """
+
+    def __init__(self):
+        self.sizes = parse_pool_sizes(BOT_WARM_POOL_SIZE)
+        self.schedule = parse_schedule(BOT_WARM_POOL_SCHEDULE)
+        self.idle: Dict[str, Deque[WarmBot]] = {}
+        # Container ID -> when it was handed to a meeting, until the meeting's record shows it
+        self._assigned: Dict[str, float] = {}
+        self._refill = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sizes or self.schedule)
+
+    def target_sizes(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Pool size per platform at the given time (default: now)."""
+        hour = (now or datetime.now(timezone.utc)).hour
+        sizes = dict(self.sizes)
+        for (start, end), scheduled in self.schedule.items():
+            if in_hours(hour, start, end):
+                sizes.update(scheduled)
+                break
+        return sizes
+
+    async def assign(self, redis_client: Any, meeting_id: int, platform: str, bot_config: dict) -> Optional[str]:
+        """
+        Hands a meeting's BOT_CONFIG to an idle bot of its platform and returns that bot's
+        container ID, or None if there is no idle bot (the caller then starts a new one).
+        """
+        handover_key = f"{WARM_HANDOVER_PREFIX}{meeting_id}"
+        previous = await redis_client.get(handover_key)
+        if previous:
+            return previous # A retried launch: the bot already has this meeting's config
+        bots = self.idle.get(platform)
+        while bots:
+            bot = bots.popleft()
+            self._assigned[bot.container_id] = time.time() # Not idle anymore, but not orphaned either
+            self._refill.set()
+            state = await get_container_state(bot.container_id)
+            if state is None:
+                self._return(platform, bot) # Docker unreachable: the bot may be fine, keep it
+                return None
+            if not state.get("Running"):
+                if state: # Exited or paused while idle, but not removed
+                    await stop_bot_container(bot.container_id)
+                self._assigned.pop(bot.container_id, None)
+                continue
+            try:
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    pipe.set(handover_key, bot.container_id, ex=WARM_HANDOVER_TTL_SECONDS)
+                    pipe.rpush(f"{BOT_CONFIG_KEY_PREFIX}{bot.container_name}", json.dumps(bot_config))
+                    pipe.expire(f"{BOT_CONFIG_KEY_PREFIX}{bot.container_name}", BOT_CONFIG_TTL_SECONDS)
+                    await pipe.execute()
+            except Exception:
+                self._return(platform, bot) # Not handed over
+                raise
+            logger.info(f"Assigned warm bot {bot.container_id} to meeting {meeting_id} ({len(bots)} idle {platform} bots left)")
+            return bot.container_id
+        return None
+
+    def _return(self, platform: str, bot: WarmBot):
+        self._assigned.pop(bot.container_id, None)
+        self.idle.setdefault(platform, deque()).appendleft(bot)
+
+    def start(self, containers_in_use: Callable[[], Awaitable[Set[str]]]):
+        if self.enabled:
+            self._task = asyncio.create_task(self._run(containers_in_use))
+
+    async def stop(self):
+        # Idle bots keep running and are adopted on the next start
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, containers_in_use: Callable[[], Awaitable[Set[str]]]):
+        adopted = False
+        while True:
+            try:
+                if not adopted:
+                    await self._adopt(await containers_in_use())
+                    adopted = True
+                await self._reconcile(containers_in_use)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Warm pool refill failed: {e}", exc_info=True)
+            self._refill.clear()
+            try:
+                await asyncio.wait_for(self._refill.wait(), BOT_WARM_POOL_REFILL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _adopt(self, in_use: Set[str]):
+        """Takes back warm bots left idle by an earlier bot-manager process on this node."""
+        containers = await list_containers(WARM_POOL_LABEL)
+        if containers is None:
+            raise RuntimeError("Could not list warm bot containers")
+        for container in containers:
+            if container["Id"] in in_use:
+                continue
+            platform = container.get("Labels", {}).get(WARM_POOL_LABEL, "")
+            name = (container.get("Names") or [""])[0].lstrip("/")
+            self.idle.setdefault(platform, deque()).append(WarmBot(container["Id"], name, container.get("Created", time.time())))
+        if containers:
+            logger.info(f"Adopted {sum(len(bots) for bots in self.idle.values())} idle warm bots")
+
+    async def _reconcile(self, containers_in_use: Callable[[], Awaitable[Set[str]]]):
+        running = await list_containers(WARM_POOL_LABEL)
+        if running is None:
+            return
+        running_ids = {c["Id"] for c in running}
+        in_use = await containers_in_use() # After listing: a bot assigned meanwhile is in use or in _assigned
+        targets = self.target_sizes()
+        expire_before = time.time() - BOT_WARM_POOL_MAX_IDLE_SECONDS
+        to_stop = []
+        for platform in set(self.idle) | set(targets):
+            bots = self.idle.setdefault(platform, deque())
+            kept = deque(bot for bot in bots if bot.container_id in running_ids)
+            target = targets.get(platform, 0)
+            # Oldest first: over-target and long-idle bots are stopped
+            while kept and (len(kept) > target or kept[0].started_at < expire_before):
+                to_stop.append(kept.popleft())
+            self.idle[platform] = kept
+        stop_ids = [bot.container_id for bot in to_stop]
+
+        # Warm bots that are neither idle nor serving a meeting (e.g. handed to a meeting whose
+        # launch then failed, or left by a lost handover) would run forever
+        expire_assigned = time.time() - WARM_HANDOVER_TTL_SECONDS
+        self._assigned = {c: t for c, t in self._assigned.items() if c not in in_use and c in running_ids and t > expire_assigned}
+        idle_ids = {bot.container_id for bots in self.idle.values() for bot in bots}
+        orphaned = [c for c in running_ids if c not in idle_ids and c not in in_use and c not in self._assigned]
+        if orphaned:
+            logger.warning(f"Stopping {len(orphaned)} warm bots that are neither idle nor in use")
+        if to_stop:
+            logger.info(f"Stopping {len(to_stop)} surplus or expired warm bots")
+        if stop_ids or orphaned:
+            await asyncio.gather(*[stop_bot_container(container_id) for container_id in stop_ids + orphaned])
+
+        semaphore = asyncio.Semaphore(BOT_WARM_POOL_STARTS)
+        async def start_one(platform: str):
+            async with semaphore:
+                name = f"vexa-bot-warm-{platform.replace('_', '-')}-{uuid.uuid4().hex[:8]}"
+                container_id = await create_and_start_container(
+                    name,
+                    bot_environment(f"BOT_CONFIG_KEY={BOT_CONFIG_KEY_PREFIX}{name}", f"BOT_PLATFORM={platform}", f"REDIS_URL={REDIS_URL}"),
+                    labels={WARM_POOL_LABEL: platform},
+                )
+                if container_id:
+                    self.idle[platform].append(WarmBot(container_id, name, time.time()))
+        missing = [p for p, target in targets.items() for _ in range(target - len(self.idle[p]))]
+        if missing:
+            logger.info(f"Starting {len(missing)} warm bots")
+            await asyncio.gather(*[start_one(platform) for platform in missing])
@@ -0,0 +1,148 @@
+"""
+Latency and memory benchmark: multi-service layout vs the single-process monolith.
+
+Starts the four services (gateway, admin-api, bot-manager, transcription-collector) as
+separate uvicorn processes, then the monolith, creates a user and API key through the
+gateway's admin routes, and sends GET /meetings requests through each layout. Reports
+latency percentiles, throughput and the total resident memory of each layout's processes.
+
+Both layouts use the database and Redis configured in the environment (DB_HOST, DB_PORT,
+REDIS_URL, REDIS_HOST, REDIS_PORT, ...), as the services themselves do.
+
+Usage (from services/monolith):
+    python benchmark.py --requests 2000 --concurrency 16
+"""
+import os
+import sys
+import time
+import uuid
+import socket
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+import httpx
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(service: str, app: str, port: int, env: dict) -> subprocess.Popen:
+    directory = os.path.join(SERVICES_DIR, service)
+    env = {**env, "PYTHONPATH": os.pathsep.join(filter(None, [directory, env.get("PYTHONPATH")]))}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=directory, env=env, stdout=subprocess.DEVNULL
+    )
+
+async def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+def rss_mb(pid: int) -> float:
+    """Current resident set size (VmRSS) of a process, Linux only."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+async def create_api_key(gateway_url: str, admin_token: str) -> str:
+    async with httpx.AsyncClient(base_url=gateway_url, headers={"X-Admin-API-Key": admin_token}) as client:
+        user = await client.post("/admin/users", json={"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "name": "bench"})
+        user.raise_for_status()
+        token = await client.post(f"/admin/users/{user.json()['id']}/tokens")
+        token.raise_for_status()
+        return token.json()["token"]
+
+async def run_load(url: str, api_key: str, requests: int, concurrency: int) -> Tuple[List[float], float]:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    # no-cache: every request is revalidated with the collector instead of served by the gateway cache
+    headers = {"X-API-Key": api_key, "Cache-Control": "no-cache"}
+    async with httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+        await one() # Warm-up
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(requests)])
+    return latencies, time.perf_counter() - started
+
+def benchmark(layout: str, servers: Dict[str, subprocess.Popen], ready_urls: List[str], gateway_url: str, env: dict, args) -> None:
+    try:
+        for url in ready_urls:
+            asyncio.run(wait_ready(url))
+        idle_rss = sum(rss_mb(p.pid) for p in servers.values())
+        api_key = asyncio.run(create_api_key(gateway_url, env["ADMIN_API_TOKEN"]))
+        latencies, elapsed = asyncio.run(run_load(f"{gateway_url}/meetings", api_key, args.requests, args.concurrency))
+        loaded_rss = sum(rss_mb(p.pid) for p in servers.values())
+
+        print(f"{layout}: {len(servers)} process(es), {args.requests} x GET /meetings, concurrency {args.concurrency}")
+        print(f"  latency:    p50 {percentile(latencies, 50) * 1000:7.2f} ms   p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+        print(f"  throughput: {args.requests / elapsed:7.0f} req/s")
+        print(f"  total RSS:  {loaded_rss:7.1f} MB (idle {idle_rss:.1f} MB)")
+    finally:
+        for process in servers.values():
+            process.terminate()
+        for process in servers.values():
+            process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "ADMIN_API_TOKEN": os.getenv("ADMIN_API_TOKEN") or uuid.uuid4().hex,
+        "IDENTITY_SIGNING_KEY": os.getenv("IDENTITY_SIGNING_KEY") or uuid.uuid4().hex,
+        "RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+
+    ports = {name: free_port() for name in ("gateway", "admin-api", "bot-manager", "transcription-collector")}
+    gateway_env = {
+        **env,
+        "ADMIN_API_URL": f"http://127.0.0.1:{ports['admin-api']}",
+        "BOT_MANAGER_URL": f"http://127.0.0.1:{ports['bot-manager']}",
+        "TRANSCRIPTION_COLLECTOR_URL": f"http://127.0.0.1:{ports['transcription-collector']}",
+    }
+    services = {
+        "admin-api": start_server("admin-api", "app.main:app", ports["admin-api"], env),
+        "bot-manager": start_server("bot-manager", "main:app", ports["bot-manager"], env),
+        "transcription-collector": start_server("transcription-collector", "main:app", ports["transcription-collector"], env),
+        "gateway": start_server("api-gateway", "main:app", ports["gateway"], gateway_env),
+    }
+    ready_urls = [f"http://127.0.0.1:{p}/" for p in ports.values()]
+    benchmark("services", services, ready_urls, f"http://127.0.0.1:{ports['gateway']}", env, args)
+
+    port = free_port()
+    monolith = {"monolith": start_server("monolith", "main:app", port, env)}
+    benchmark("monolith", monolith, [f"http://127.0.0.1:{port}/"], f"http://127.0.0.1:{port}", env, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import Any, Optional, Set
+from urllib.parse import unquote
+
+import httpx
+
+logger = logging.getLogger("monolith.inprocess")
+
+# Response chunks buffered ahead of the reader; the app is paused while the buffer is full
+RESPONSE_BUFFER_CHUNKS = 16
+
+class _ResponseStream(httpx.AsyncByteStream):
+    """Body of an in-process response: chunks from the app's send() calls, as they are produced."""
+
+    def __init__(self, chunks: asyncio.Queue, task: asyncio.Task, complete: asyncio.Event):
+        self._chunks = chunks
+        self._task = task
+        self._complete = complete
+
+    async def __aiter__(self):
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise httpx.ReadError(f"In-process app failed mid-response: {chunk}") from chunk
+            yield chunk
+
+    async def aclose(self):
+        # A reader that stops early aborts the app, like a dropped connection; once the response
+        # is complete the app keeps running, as its background tasks run after the body is sent
+        if not self._complete.is_set() and not self._task.done():
+            self._task.cancel()
+
+class InProcessTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that calls an ASGI app in the same process instead of over the network.
+
+    Unlike httpx.ASGITransport, which runs the app to completion and buffers the whole body,
+    the response is returned as soon as the app starts it and its body is streamed, so large
+    exports pass through in constant memory and upstream timeouts apply to the first byte.
+    """
+
+    def __init__(self, app: Any, client: tuple = ("127.0.0.1", 0)):
+        self.app = app
+        self.client = client
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": request.url.scheme,
+            "path": unquote(request.url.path),
+            "raw_path": request.url.raw_path.split(b"?", 1)[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(name.lower(), value) for name, value in request.headers.raw],
+            "server": (request.url.host, request.url.port),
+            "client": self.client,
+        }
+        body = request.stream.__aiter__()
+        request_complete = False
+        response_complete = asyncio.Event()
+        started: asyncio.Future = asyncio.get_running_loop().create_future()
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=RESPONSE_BUFFER_CHUNKS)
+
+        async def receive() -> dict:
+            nonlocal request_complete
+            if request_complete:
+                # Like a server, report the client as gone only once the response is done
+                await response_complete.wait()
+                return {"type": "http.disconnect"}
+            try:
+                chunk = await body.__anext__()
+            except StopAsyncIteration:
+                request_complete = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            return {"type": "http.request", "body": chunk, "more_body": True}
+
+        async def send(message: dict):
+            if message["type"] == "http.response.start":
+                started.set_result((message["status"], message.get("headers", [])))
+            elif message["type"] == "http.response.body" and not response_complete.is_set():
+                if message.get("body"):
+                    await chunks.put(message["body"])
+                if not message.get("more_body", False):
+                    response_complete.set()
+                    await chunks.put(None)
+
+        async def run():
+            error: Optional[Exception] = None
+            try:
+                await self.app(scope, receive, send)
+            except Exception as exc:
+                error = exc
+            if not started.done():
+                started.set_exception(error or RuntimeError("In-process app returned without a response"))
+            elif not response_complete.is_set():
+                response_complete.set()
+                await chunks.put(error or RuntimeError("In-process app returned before the response was complete"))
+            elif error is not None:
+                # The app already answered (e.g. with a 500); report the error like a server would
+                logger.error(f"Exception in in-process app {request.method} {request.url.path}: {error}", exc_info=error)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        try:
+            status_code, headers = await asyncio.shield(started)
+        except BaseException:
+            task.cancel()
+            raise
+        return httpx.Response(status_code, headers=headers, stream=_ResponseStream(chunks, task, response_complete),
+                              request=request)
+
+    async def aclose(self):
+        # Let in-flight requests and their background tasks finish
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,112 @@
+"""
+Single-process deployment: api-gateway, admin-api, bot-manager and transcription-collector
+in one ASGI app.
+
+Clients talk to the gateway exactly as in the multi-service layout. The gateway's upstream
+pools call the other services' apps in-process instead of over HTTP, and all four services
+share one database engine, one Redis client and one API key cache. The collector's WebSocket
+endpoint for WhisperLive is served at the same path, /collector.
+
+Run (from services/monolith):
+    uvicorn main:app --host 0.0.0.0 --port 8000
+"""
+import os
+import sys
+import logging
+import importlib
+import importlib.util
+from types import ModuleType
+from typing import Set
+
+import redis.asyncio as aioredis
+from fastapi import FastAPI
+
+from shared_models.logging_utils import configure_logging
+from inprocess import InProcessTransport
+
+configure_logging()
+logger = logging.getLogger("monolith")
+
+# Directory holding the service sources (services/ in the repo)
+SERVICES_DIR = os.getenv("SERVICES_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+def local_modules(directory: str) -> Set[str]:
+    """Top-level module and package names a service imports from its own directory."""
+    names = set()
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if entry.endswith(".py"):
+            names.add(entry[:-3])
+        elif os.path.isfile(os.path.join(path, "__init__.py")):
+            names.add(entry)
+    return names
+
+def load_service(module_name: str, service: str, entry: str) -> ModuleType:
+    """
+    Imports a service's app module (entry, relative to the service directory) as module_name.
+    Each service has a main.py, so entry modules get unique names; the service directory is
+    added to sys.path for its other modules, which must not clash with those already loaded.
+    """
+    directory = os.path.join(SERVICES_DIR, service)
+    entry_name = os.path.splitext(entry)[0].split("/")[0]
+    for name in local_modules(directory) - {entry_name}:
+        loaded = getattr(sys.modules.get(name), "__file__", None)
+        if loaded and not os.path.abspath(loaded).startswith(directory + os.sep):
+            raise RuntimeError(f"Module '{name}' of {service} clashes with already loaded {loaded}")
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, entry))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    logger.info(f"Loaded {service} from {directory}")
+    return module
+
+admin_api = load_service("admin_api_main", "admin-api", "app/main.py")
+bot_manager = load_service("bot_manager_main", "bot-manager", "main.py")
+transcription_collector = load_service("transcription_collector_main", "transcription-collector", "main.py")
+gateway = load_service("api_gateway_main", "api-gateway", "main.py")
+
+# One API key cache: a key validated by the gateway is not looked up again by a service
+auth_cache = gateway.auth_cache
+transcription_collector.auth_cache = auth_cache
+bot_manager.auth_cache = auth_cache
+importlib.import_module("auth").auth_cache = auth_cache # bot-manager's auth module
+
+# Gateway upstream -> in-process app
+IN_PROCESS_UPSTREAMS = (
+    (gateway.admin_api, admin_api.app),
+    (gateway.bot_manager, bot_manager.app),
+    (gateway.transcription_collector, transcription_collector.app),
+)
+# Started in this order (the gateway last, once its upstreams are up) and stopped in reverse
+SERVICE_APPS = (admin_api.app, bot_manager.app, transcription_collector.app, gateway.app)
+
+app = FastAPI(title="Vexa", docs_url=None, redoc_url=None, openapi_url=None)
+app.add_api_websocket_route("/collector", transcription_collector.websocket_endpoint)
+app.mount("/", gateway.app)
+
+@app.on_event("startup")
+async def startup():
+    # Mounted apps' startup and shutdown handlers are not run by the server, so they are run here
+    app.state.redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+    admin_api.redis_client = app.state.redis_client
+    bot_manager.redis_client = app.state.redis_client
+    transcription_collector.redis_client = app.state.redis_client
+    gateway.app.state.redis_client = app.state.redis_client
+    for upstream, service_app in IN_PROCESS_UPSTREAMS:
+        upstream.transport = InProcessTransport(service_app)
+    for service_app in SERVICE_APPS:
+        await service_app.router.startup()
+    logger.info("All services started in-process")
+
+@app.on_event("shutdown")
+async def shutdown():
+    for service_app in reversed(SERVICE_APPS):
+        try:
+            await service_app.router.shutdown()
+        except Exception as e:
+            logger.error(f"Error shutting down {service_app.title}: {e}", exc_info=True)
+    await app.state.redis_client.close()
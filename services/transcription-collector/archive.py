@@ -0,0 +1,226 @@
+import io
+import os
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared_models.database import async_session_local
+from shared_models.models import Meeting, MeetingArchive, Transcription
+
+logger = logging.getLogger("transcription_collector.archive")
+
+# Archive configuration from environment variables
+ARCHIVE_ENABLED = os.environ.get("ARCHIVE_ENABLED", "false").lower() == "true"
+ARCHIVE_BACKEND = os.environ.get("ARCHIVE_BACKEND", "local") # 'local' or 's3'
+ARCHIVE_LOCAL_PATH = os.environ.get("ARCHIVE_LOCAL_PATH", "/data/archive")
+ARCHIVE_S3_BUCKET = os.environ.get("ARCHIVE_S3_BUCKET", "vexa-archive")
+ARCHIVE_S3_PREFIX = os.environ.get("ARCHIVE_S3_PREFIX", "transcripts/")
+ARCHIVE_S3_ENDPOINT_URL = os.environ.get("ARCHIVE_S3_ENDPOINT_URL") # Set for MinIO and other S3-compatible stores
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "7"))
+ARCHIVE_INTERVAL_SECONDS = int(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "50"))
+
+# Columns persisted for every archived segment, in file order
+SEGMENT_COLUMNS = ["start_time", "end_time", "text", "speaker", "language", "created_at"]
+
+class ArchiveError(Exception):
+    pass
+
+# --- Blob Stores ---
+
+class BlobStore(ABC):
+    """Minimal key/value interface over the storage used for archived transcripts."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        ...
+
+class LocalBlobStore(BlobStore):
+    """Stores archive objects as files below a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ArchiveError(f"Invalid archive key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial object
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+class S3BlobStore(BlobStore):
+    """Stores archive objects in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError:
+            raise ArchiveError("boto3 is required for the 's3' archive backend")
+        self.bucket = bucket
+        self.prefix = prefix
+        # Credentials and region are resolved by boto3 from the standard AWS_* environment variables
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=f"{self.prefix}{key}", Body=data)
+
+    def get(self, key: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}")
+        return response["Body"].read()
+
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """Returns the blob store selected by ARCHIVE_BACKEND, creating it on first use."""
+    global _blob_store
+    if _blob_store is None:
+        if ARCHIVE_BACKEND == "local":
+            _blob_store = LocalBlobStore(ARCHIVE_LOCAL_PATH)
+        elif ARCHIVE_BACKEND == "s3":
+            _blob_store = S3BlobStore(ARCHIVE_S3_BUCKET, ARCHIVE_S3_PREFIX, ARCHIVE_S3_ENDPOINT_URL)
+        else:
+            raise ArchiveError(f"Unknown archive backend '{ARCHIVE_BACKEND}'. Must be one of: local, s3")
+        logger.info(f"Using '{ARCHIVE_BACKEND}' archive backend")
+    return _blob_store
+
+# --- Columnar Encoding ---
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ArchiveError("pyarrow is required to read or write transcript archives")
+    return pyarrow, pyarrow.parquet
+
+def encode_segments(segments: List[Transcription]) -> bytes:
+    """Encodes transcription rows as a zstd-compressed Parquet file."""
+    pa, pq = _require_pyarrow()
+    schema = pa.schema([
+        ("start_time", pa.float64()),
+        ("end_time", pa.float64()),
+        ("text", pa.string()),
+        ("speaker", pa.string()),
+        ("language", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ])
+    columns = {name: [getattr(s, name) for s in segments] for name in SEGMENT_COLUMNS}
+    table = pa.Table.from_pydict(columns, schema=schema)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+def decode_segments(data: bytes) -> List[Dict[str, Any]]:
+    """Decodes an archive file into segment dicts ordered by start_time."""
+    _pa, pq = _require_pyarrow()
+    table = pq.read_table(io.BytesIO(data), columns=SEGMENT_COLUMNS)
+    return table.to_pylist()
+
+def archive_key_for(meeting: Meeting) -> str:
+    return f"{meeting.user_id}/{meeting.id}.parquet"
+
+async def load_archived_segments(archive: MeetingArchive) -> List[Dict[str, Any]]:
+    """Reads an archived meeting's segments back from the blob store."""
+    store = get_blob_store()
+    data = await asyncio.to_thread(store.get, archive.storage_key)
+    return await asyncio.to_thread(decode_segments, data)
+
+# --- Archiver ---
+
+async def archive_meeting(meeting_id: int, db: AsyncSession) -> bool:
+    """Moves one stopped meeting's segments into the blob store.
+
+    The meeting row is locked with SKIP LOCKED so concurrent archivers on other
+    collector replicas never process the same meeting. The blob is written before
+    the rows are deleted, so a failure at any point leaves the data readable.
+    """
+    result = await db.execute(
+        select(Meeting).where(Meeting.id == meeting_id).with_for_update(skip_locked=True)
+    )
+    meeting = result.scalars().first()
+    if not meeting:
+        await db.rollback()
+        return False # Locked by another archiver
+
+    existing = await db.execute(select(MeetingArchive.id).where(MeetingArchive.meeting_id == meeting_id))
+    if existing.first():
+        await db.rollback()
+        return False
+
+    result_segments = await db.execute(
+        select(Transcription).where(Transcription.meeting_id == meeting_id).order_by(Transcription.start_time)
+    )
+    segments = result_segments.scalars().all()
+
+    storage_key = archive_key_for(meeting)
+    data = await asyncio.to_thread(encode_segments, segments)
+    await asyncio.to_thread(get_blob_store().put, storage_key, data)
+
+    db.add(MeetingArchive(meeting_id=meeting_id, storage_key=storage_key, segment_count=len(segments)))
+    await db.execute(delete(Transcription).where(Transcription.meeting_id == meeting_id))
+    await db.commit()
+    logger.info(f"Archived {len(segments)} segments for meeting {meeting_id} to '{storage_key}' ({len(data)} bytes)")
+    return True
+
+async def archive_once() -> int:
+    """Archives one batch of eligible meetings. Returns the number archived."""
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    async with async_session_local() as db:
+        result = await db.execute(
+            select(Meeting.id)
+            .outerjoin(MeetingArchive, MeetingArchive.meeting_id == Meeting.id)
+            .where(
+                Meeting.status == 'stopped',
+                Meeting.end_time < cutoff,
+                MeetingArchive.id.is_(None)
+            )
+            .order_by(Meeting.end_time)
+            .limit(ARCHIVE_BATCH_SIZE)
+        )
+        meeting_ids = result.scalars().all()
+
+    archived = 0
+    for meeting_id in meeting_ids:
+        async with async_session_local() as db:
+            try:
+                if await archive_meeting(meeting_id, db):
+                    archived += 1
+            except Exception as e:
+                logger.error(f"Failed to archive meeting {meeting_id}: {e}", exc_info=True)
+                await db.rollback()
+    return archived
+
+async def run_archiver():
+    """Background loop that periodically archives stopped meetings."""
+    logger.info(f"Transcript archiver started (after {ARCHIVE_AFTER_DAYS} days, every {ARCHIVE_INTERVAL_SECONDS}s)")
+    while True:
+        try:
+            archived = await archive_once()
+            if archived:
+                logger.info(f"Archiver run complete: {archived} meetings archived")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Archiver run failed: {e}", exc_info=True)
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,102 @@
+"""
+Throughput benchmark for the collector's per-segment text stages.
+
+Compares, on synthetic segments:
+  - filter:          TranscriptionFilter.filter_segments (memo disabled, every text unique)
+  - redact:          Redactor.redact_segments (all rules in one combined matcher)
+  - redact-per-rule: the same rules applied as separate regexes, one pass per rule
+
+Before timing, the redactor is checked against REDACTION_CHECKS; a mismatch aborts the run.
+
+Usage:
+    python benchmark.py [--segments 20000] [--terms 200] [--rounds 5]
+"""
+import re
+import time
+import random
+import argparse
+import logging
+
+import filters
+from filters import TranscriptionFilter
+from redaction import Redactor
+
+WORDS = ("meeting budget roadmap customer release deadline review design team quarter "
+         "project launch metrics hiring contract migration feedback priority sprint demo").split()
+PII = [
+    lambda r: f"{r.choice(['anna', 'j.smith', 'ops+alerts'])}@example.com",
+    lambda r: f"+1 ({r.randint(200, 999)}) {r.randint(200, 999)}-{r.randint(1000, 9999)}",
+    lambda r: "4111 1111 1111 1111",
+]
+
+# (text, expected redacted text): edge cases of the combined matcher
+REDACTION_CHECKS = [
+    ("card 4111 1111 1111 1111 ok", "card [CARD] ok"),
+    # Fails Luhn as a card number: the same digits must still be seen by the phone rule
+    ("numbers 415 555 1234 415 555 9876", "numbers [PHONE] [PHONE]"),
+    ("mail j.smith@example.com now", "mail [EMAIL] now"),
+]
+
+def check_redaction(redactor: Redactor):
+    for text, expected in REDACTION_CHECKS:
+        redacted, _ = redactor.redact(text)
+        if redacted != expected:
+            raise SystemExit(f"Redaction check failed: {text!r} -> {redacted!r}, expected {expected!r}")
+
+def make_segments(count: int, terms, seed: int = 7):
+    rng = random.Random(seed)
+    segments = []
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(4, 20))
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words)), rng.choice(PII)(rng))
+        if terms and rng.random() < 0.05:
+            words.insert(rng.randrange(len(words)), rng.choice(terms))
+        segments.append(f"{' '.join(words)} #{i}") # Unique, so no stage can rely on caching
+    return segments
+
+def make_terms(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS).title()}{rng.randint(100, 999)}" for _ in range(count)]
+
+def per_rule_redact(rules, texts):
+    """The naive baseline: one regex pass per rule."""
+    out = []
+    for text in texts:
+        for label, pattern in rules:
+            text = pattern.sub(f"[{label.upper()}]", text)
+        out.append(text)
+    return out
+
+def measure(name: str, fn, texts, rounds: int):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<16} {len(texts) / best:>12,.0f} segments/s  ({best * 1000:.1f} ms per {len(texts)} segments)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=20000)
+    parser.add_argument("--terms", type=int, default=200, help="Dictionary terms in the redaction profile")
+    parser.add_argument("--rounds", type=int, default=5, help="Best of N rounds is reported")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    terms = make_terms(args.terms)
+    texts = make_segments(args.segments, terms)
+    filters.FILTER_MEMO_SIZE = 0 # Measure the matching itself, not the memo
+    transcription_filter = TranscriptionFilter()
+    redactor = Redactor({"redaction_terms": terms})
+    per_rule = [(label, re.compile(pattern)) for label, pattern in redactor.rules.items()]
+    per_rule += [("redacted", re.compile(rf"(?i:(?<!\w){re.escape(t)}(?!\w))")) for t in terms]
+
+    check_redaction(Redactor())
+    print(f"{args.segments} segments, {len(redactor.rules)} patterns + {len(terms)} terms\n")
+    measure("filter", transcription_filter.filter_segments, texts, args.rounds)
+    measure("redact", redactor.redact_segments, texts, args.rounds)
+    measure("redact-per-rule", lambda t: per_rule_redact(per_rule, t), texts, args.rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger("transcription_collector.change_feed")
+
+# Delay before resubscribing after the listener failed (e.g. Redis went away)
+CHANGE_FEED_RETRY_SECONDS = 5
+
+async def follow_changes(
+    redis_client: Any,
+    channel: str,
+    load_all: Callable[[], Awaitable[None]],
+    handle_message: Callable[[str], Awaitable[None]],
+    refresh_seconds: float,
+    name: str
+):
+    """
+    Keeps an in-memory registry in sync with a Redis pub/sub change channel until cancelled:
+    subscribes, loads everything, applies each change message, and reloads everything every
+    refresh_seconds in case messages were missed. Resubscribes (and reloads) after failures.
+    name is used in log messages.
+    """
+    while True:
+        try:
+            await _listen(redis_client, channel, load_all, handle_message, refresh_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{name} listener failed, restarting in {CHANGE_FEED_RETRY_SECONDS}s: {e}", exc_info=True)
+            await asyncio.sleep(CHANGE_FEED_RETRY_SECONDS)
+
+async def _listen(redis_client: Any, channel: str, load_all, handle_message, refresh_seconds: float):
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(channel)
+    try:
+        # Subscribe before loading so no change between the two is missed
+        await load_all()
+        loop = asyncio.get_running_loop()
+        next_refresh = loop.time() + refresh_seconds
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message and message.get("type") == "message":
+                await handle_message(message["data"])
+            if loop.time() >= next_refresh:
+                await load_all()
+                next_refresh = loop.time() + refresh_seconds
+    finally:
+        await pubsub.unsubscribe(channel)
+        await pubsub.close()
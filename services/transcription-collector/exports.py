@@ -0,0 +1,334 @@
+import os
+import json
+import base64
+import logging
+from datetime import datetime
+from typing import Optional, Iterable, Iterator, AsyncIterator, Tuple, Any, List
+
+from fastapi import HTTPException, status, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared_models.database import async_session_local
+from shared_models.models import Meeting, Transcription, TranscriptDocument, MeetingArchive
+from shared_models.schemas import BulkExportFormat
+from shared_models.transcripts import load_document_segments, iter_merged_revisions
+from archive import load_archived_segments
+
+logger = logging.getLogger("transcription_collector.exports")
+
+# Rendered exports of finished meetings are cached in Redis for this long
+EXPORT_CACHE_TTL_SECONDS = int(os.environ.get("EXPORT_CACHE_TTL_SECONDS", str(24 * 3600)))
+EXPORT_STREAM_BATCH_SIZE = int(os.environ.get("EXPORT_STREAM_BATCH_SIZE", "500"))
+# Rows fetched per server-side cursor round trip (and per Parquet row group) in bulk exports
+BULK_EXPORT_BATCH_SIZE = int(os.environ.get("BULK_EXPORT_BATCH_SIZE", "5000"))
+
+# Supported export formats and their media types
+FORMAT_MEDIA_TYPES = {
+    "json": "application/json",
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "txt": "text/plain",
+}
+# Accept header media types mapped to formats (includes common aliases)
+MEDIA_TYPE_FORMATS = {
+    "application/json": "json",
+    "application/x-subrip": "srt",
+    "text/srt": "srt",
+    "text/vtt": "vtt",
+    "text/plain": "txt",
+}
+
+# (start, end, text, speaker)
+ExportSegment = Tuple[float, float, str, Optional[str]]
+
+def negotiate_format(format_param: Optional[str], accept: Optional[str]) -> str:
+    """
+    Picks the export format from the explicit `format` query parameter or the Accept header.
+    Falls back to JSON when neither requests a supported format.
+    """
+    if format_param:
+        fmt = format_param.lower()
+        if fmt not in FORMAT_MEDIA_TYPES:
+            supported = ', '.join(FORMAT_MEDIA_TYPES)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid format '{format_param}'. Must be one of: {supported}"
+            )
+        return fmt
+    if accept:
+        # Highest q wins; ties go to the type listed first
+        candidates = []
+        for position, part in enumerate(accept.split(",")):
+            media_type, _, params = part.strip().partition(";")
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        pass
+            fmt = MEDIA_TYPE_FORMATS.get(media_type.strip().lower())
+            if fmt and quality > 0:
+                candidates.append((-quality, position, fmt))
+        if candidates:
+            return min(candidates)[2]
+    return "json"
+
+# --- Renderers ---
+
+def _timestamp(seconds: float, millis_separator: str) -> str:
+    millis = int(round(max(seconds, 0.0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{millis_separator}{millis:03d}"
+
+def render_cue(index: int, segment: ExportSegment, fmt: str) -> str:
+    """Renders one segment as an SRT/WebVTT cue or a plain text line."""
+    start, end, text, speaker = segment
+    text = text.strip()
+    if fmt == "srt":
+        label = f"{speaker}: " if speaker else ""
+        return f"{index}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{label}{text}\n\n"
+    if fmt == "vtt":
+        voice = f"<v {speaker}>" if speaker else ""
+        return f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{voice}{text}\n\n"
+    label = f"{speaker}: " if speaker else ""
+    return f"[{_timestamp(start, '.')[:8]}] {label}{text}\n"
+
+def export_header(fmt: str) -> str:
+    return "WEBVTT\n\n" if fmt == "vtt" else ""
+
+def render_export(segments: Iterable[ExportSegment], fmt: str) -> str:
+    return export_header(fmt) + "".join(render_cue(i, s, fmt) for i, s in enumerate(segments, start=1))
+
+def _from_dicts(segments: Iterable[dict]) -> Iterator[ExportSegment]:
+    for s in segments:
+        # Documents are keyed by alias ('start'/'end'), archives by field name
+        start = s["start"] if "start" in s else s["start_time"]
+        end = s["end"] if "end" in s else s["end_time"]
+        yield (start, end, s["text"], s.get("speaker"))
+
+# --- Export Responses ---
+
+def _export_response(body: str, fmt: str) -> Response:
+    return Response(content=body, media_type=FORMAT_MEDIA_TYPES[fmt])
+
+async def export_transcript(
+    meeting: Meeting,
+    document: Optional[TranscriptDocument],
+    archive: Optional[MeetingArchive],
+    fmt: str,
+    redis_client: Any
+) -> Response:
+    """
+    Returns a transcript export in a text format.
+    Finished meetings (finalized or archived) are rendered once and cached in Redis;
+    live meetings are streamed from the segment table through a server-side cursor.
+    """
+    if document or archive:
+        # Document/archive ids change whenever they are rewritten, so they version the cache key
+        source = f"doc{document.id}" if document else f"arc{archive.id}"
+        cache_key = f"transcript_export:{meeting.id}:{source}:{fmt}"
+        try:
+            cached = await redis_client.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Export cache read failed for {cache_key}: {e}")
+            cached = None
+        if cached is not None:
+            logger.debug(f"Export cache hit for {cache_key}")
+            return _export_response(cached, fmt)
+
+        if document:
+            segments = load_document_segments(document)
+        else:
+            segments = await load_archived_segments(archive)
+        body = render_export(_from_dicts(segments), fmt)
+        try:
+            await redis_client.setex(cache_key, EXPORT_CACHE_TTL_SECONDS, body)
+        except Exception as e:
+            logger.warning(f"Export cache write failed for {cache_key}: {e}")
+        return _export_response(body, fmt)
+
+    return StreamingResponse(_stream_live_export(meeting.id, fmt), media_type=FORMAT_MEDIA_TYPES[fmt])
+
+async def _stream_live_export(meeting_id: int, fmt: str) -> AsyncIterator[str]:
+    # The body is sent after the endpoint returns, when its request-scoped session may be
+    # closed already, so the cursor gets a session of its own
+    async with async_session_local() as db:
+        async for chunk in _live_export_chunks(meeting_id, fmt, db):
+            yield chunk
+
+async def _live_export_chunks(meeting_id: int, fmt: str, db: AsyncSession) -> AsyncIterator[str]:
+    stmt = select(
+        Transcription.start_time, Transcription.end_time, Transcription.text, Transcription.speaker, Transcription.created_at
+    ).where(
+        Transcription.meeting_id == meeting_id
+    ).order_by(
+        Transcription.start_time, Transcription.created_at
+    ).execution_options(yield_per=EXPORT_STREAM_BATCH_SIZE)
+
+    result = await db.stream(stmt)
+    header = export_header(fmt)
+    if header:
+        yield header
+    index = 0
+    pending = []
+    async for partition in result.partitions():
+        # Revisions are merged per partition; the last merged segment is held back
+        # because the next partition may still contain a newer revision of it
+        pending.extend(partition)
+        merged = list(iter_merged_revisions(pending))
+        pending = merged[-1:]
+        chunk = []
+        for row in merged[:-1]:
+            index += 1
+            chunk.append(render_cue(index, (row.start_time, row.end_time, row.text, row.speaker), fmt))
+        if chunk:
+            yield "".join(chunk)
+    for row in pending:
+        index += 1
+        yield render_cue(index, (row.start_time, row.end_time, row.text, row.speaker), fmt)
+
+# --- Bulk Export ---
+
+BULK_EXPORT_MEDIA_TYPES = {
+    BulkExportFormat.NDJSON: "application/x-ndjson",
+    BulkExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# Columns of every bulk export record, in output order
+BULK_EXPORT_COLUMNS = [
+    Transcription.id, Transcription.meeting_id, Meeting.user_id, Meeting.platform,
+    Meeting.platform_specific_id.label("native_meeting_id"),
+    Transcription.start_time, Transcription.end_time, Transcription.text,
+    Transcription.speaker, Transcription.language, Transcription.created_at,
+]
+
+def encode_continuation_token(after_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after_id": after_id}).encode()).decode().rstrip("=")
+
+def decode_continuation_token(token: str) -> int:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        after_id = json.loads(base64.urlsafe_b64decode(padded))["after_id"]
+        if not isinstance(after_id, int):
+            raise ValueError("after_id must be an integer")
+        return after_id
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid continuation token")
+
+def _bulk_export_filters(user_id: Optional[int], start: Optional[datetime], end: Optional[datetime], after_id: int) -> List[Any]:
+    filters = [Transcription.id > after_id]
+    if user_id is not None:
+        filters.append(Meeting.user_id == user_id)
+    if start is not None:
+        filters.append(Transcription.created_at >= start)
+    if end is not None:
+        filters.append(Transcription.created_at < end)
+    return filters
+
+async def _page_partitions(result: Any, limit: int, page: dict) -> AsyncIterator[list]:
+    """
+    Yields the first limit rows of a streamed result (fetched with one extra row), partition by
+    partition, keeping the last yielded id in page["last_id"]; page["more"] is set if rows follow.
+    """
+    remaining = limit
+    async for partition in result.partitions():
+        if len(partition) > remaining:
+            page["more"] = True
+            partition = partition[:remaining]
+        remaining -= len(partition)
+        if partition:
+            page["last_id"] = partition[-1].id
+            yield partition
+        if page.get("more"):
+            return
+
+class _ChunkSink:
+    """File-like sink that lets the Parquet writer's output be yielded row group by row group."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _record(row) -> dict:
+    record = dict(row._mapping)
+    if record["created_at"] is not None:
+        record["created_at"] = record["created_at"].isoformat()
+    return record
+
+async def stream_bulk_export(
+    fmt: BulkExportFormat,
+    user_id: Optional[int],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    after_id: int,
+    limit: int
+) -> AsyncIterator[bytes]:
+    """
+    Streams up to limit segments in id order from a server-side cursor, BULK_EXPORT_BATCH_SIZE rows
+    at a time, so memory stays bounded regardless of the export size. If more rows remain, the export
+    ends with a continuation token (keyset: the last id sent): a final {"continuation": ...} line in
+    NDJSON, the "continuation" key of the file metadata in Parquet.
+    """
+    stmt = select(*BULK_EXPORT_COLUMNS).join(Meeting, Meeting.id == Transcription.meeting_id).where(
+        *_bulk_export_filters(user_id, start, end, after_id)
+    ).order_by(Transcription.id).limit(limit + 1).execution_options(yield_per=BULK_EXPORT_BATCH_SIZE)
+
+    # Streamed after the endpoint returns, so not on its request-scoped session
+    async with async_session_local() as db:
+        result = await db.stream(stmt)
+        page: dict = {}
+        async for chunk in _encode_bulk_export(fmt, _page_partitions(result, limit, page), page):
+            yield chunk
+
+async def _encode_bulk_export(fmt: BulkExportFormat, partitions: AsyncIterator[list], page: dict) -> AsyncIterator[bytes]:
+    if fmt == BulkExportFormat.NDJSON:
+        async for partition in partitions:
+            yield "".join(json.dumps(_record(row)) + "\n" for row in partition).encode()
+        if page.get("more"):
+            yield (json.dumps({"continuation": encode_continuation_token(page["last_id"])}) + "\n").encode()
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([
+        ("id", pa.int64()), ("meeting_id", pa.int64()), ("user_id", pa.int64()),
+        ("platform", pa.string()), ("native_meeting_id", pa.string()),
+        ("start_time", pa.float64()), ("end_time", pa.float64()), ("text", pa.string()),
+        ("speaker", pa.string()), ("language", pa.string()), ("created_at", pa.timestamp("us")),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    async for partition in partitions:
+        columns = {name: [row._mapping[name] for row in partition] for name in schema.names}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        yield sink.drain()
+    if page.get("more"):
+        writer.add_key_value_metadata({"continuation": encode_continuation_token(page["last_id"])})
+    writer.close()
+    yield sink.drain()
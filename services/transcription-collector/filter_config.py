@@ -37,4 +37,18 @@ CUSTOM_FILTERS = [
 STOPWORDS = {
     "en": ["the", "and", "for", "you", "this", "that", "with", "from", "have", "are"],
     # Add other languages as needed
-} 
\ No newline at end of file
+} 
+
+# PII redaction applied to segments before they are stored (see redaction.py)
+# Built-in rules to enable: "email", "phone", "card"
+REDACTION_RULES = ["email", "phone", "card"]
+
+# Additional redaction patterns, by label; matches are replaced with [LABEL]
+REDACTION_PATTERNS = {
+    # "employee_id": r"EMP-\d{5}",
+}
+
+# Words or phrases always redacted (whole words, case-insensitive), replaced with [REDACTED]
+REDACTION_TERMS = [
+    # "Project Falcon",
+]
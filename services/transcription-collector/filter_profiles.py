@@ -0,0 +1,148 @@
+import os
+import json
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Any, NamedTuple
+
+from sqlalchemy import select
+
+from shared_models.database import async_session_local
+from shared_models.models import FilterProfile
+from shared_models.schemas import FILTER_PROFILE_CHANNEL
+from change_feed import follow_changes
+from filters import TranscriptionFilter
+from redaction import Redactor
+
+logger = logging.getLogger("transcription_collector.filter_profiles")
+
+# Maximum compiled profile filters kept in memory
+FILTER_PROFILE_CACHE_SIZE = int(os.environ.get("FILTER_PROFILE_CACHE_SIZE", "1024"))
+# Full reload interval, in case pub/sub notifications were missed
+FILTER_PROFILE_REFRESH_SECONDS = int(os.environ.get("FILTER_PROFILE_REFRESH_SECONDS", "300"))
+
+# (profile_id, version)
+ProfileKey = Tuple[int, int]
+
+class CompiledProfile(NamedTuple):
+    filter: TranscriptionFilter
+    redactor: Redactor
+
+def compile_profile(config: dict) -> CompiledProfile:
+    return CompiledProfile(TranscriptionFilter(config), Redactor(config))
+
+class FilterProfileRegistry:
+    """
+    Resolves the filter for a user/meeting without touching the database or compiling rules.
+
+    Profiles are loaded and compiled in the background - at startup, on every admin-api
+    change notification and periodically - into immutable TranscriptionFilter objects held
+    in an LRU keyed by (profile_id, version). Assignments are swapped atomically once the
+    new version is compiled, so the ingest path always sees either the old or the new rules.
+    Each profile compiles to both a TranscriptionFilter and a Redactor.
+    """
+
+    def __init__(self, default_filter: TranscriptionFilter, default_redactor: Redactor):
+        self.default = CompiledProfile(default_filter, default_redactor)
+        self._compiled: "OrderedDict[ProfileKey, CompiledProfile]" = OrderedDict()
+        self._configs: Dict[ProfileKey, dict] = {}
+        # (user_id, meeting_id or None) -> active profile key
+        self._assignments: Dict[Tuple[int, Optional[int]], ProfileKey] = {}
+        self._pending: set = set()
+
+    def get_profile(self, user_id: int, meeting_id: Optional[int] = None) -> CompiledProfile:
+        """Returns the compiled rules for a meeting: meeting profile, else user profile, else the default."""
+        key = self._assignments.get((user_id, meeting_id)) or self._assignments.get((user_id, None))
+        if key is None:
+            return self.default
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            # Evicted from the LRU - recompile off the ingest path, use the default meanwhile
+            self._schedule_compile(key)
+            return self.default
+        self._compiled.move_to_end(key)
+        return compiled
+
+    def get_filter(self, user_id: int, meeting_id: Optional[int] = None) -> TranscriptionFilter:
+        return self.get_profile(user_id, meeting_id).filter
+
+    def get_redactor(self, user_id: int, meeting_id: Optional[int] = None) -> Redactor:
+        return self.get_profile(user_id, meeting_id).redactor
+
+    def _schedule_compile(self, key: ProfileKey):
+        if key in self._pending or key not in self._configs:
+            return
+        self._pending.add(key)
+
+        async def compile_later():
+            try:
+                await self._compile(key, self._configs[key])
+            finally:
+                self._pending.discard(key)
+        asyncio.create_task(compile_later())
+
+    async def _compile(self, key: ProfileKey, config: dict) -> CompiledProfile:
+        # Regex compilation is CPU work; run it in a thread so the event loop keeps serving streams
+        compiled = await asyncio.to_thread(compile_profile, config)
+        self._compiled[key] = compiled
+        self._compiled.move_to_end(key)
+        while len(self._compiled) > FILTER_PROFILE_CACHE_SIZE:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    async def _install(self, profile: FilterProfile):
+        key = (profile.id, profile.version)
+        if key not in self._compiled:
+            await self._compile(key, profile.config)
+        self._configs[key] = profile.config
+        previous = self._assignments.get((profile.user_id, profile.meeting_id))
+        self._assignments[(profile.user_id, profile.meeting_id)] = key
+        if previous and previous != key:
+            self._configs.pop(previous, None)
+            self._compiled.pop(previous, None)
+        logger.info(f"Filter profile {profile.id} v{profile.version} active for user {profile.user_id}, meeting {profile.meeting_id}")
+
+    def _remove(self, profile_id: int):
+        for assignment, key in list(self._assignments.items()):
+            if key[0] == profile_id:
+                del self._assignments[assignment]
+                self._configs.pop(key, None)
+                self._compiled.pop(key, None)
+                logger.info(f"Filter profile {profile_id} removed for user {assignment[0]}, meeting {assignment[1]}")
+
+    async def load_all(self):
+        """Loads every profile from the database, compiling new versions and dropping deleted ones."""
+        async with async_session_local() as db:
+            result = await db.execute(select(FilterProfile))
+            profiles = result.scalars().all()
+        active_ids = set()
+        for profile in profiles:
+            active_ids.add(profile.id)
+            try:
+                await self._install(profile)
+            except Exception as e:
+                logger.error(f"Failed to compile filter profile {profile.id}: {e}", exc_info=True)
+        for profile_id in {key[0] for key in self._assignments.values()} - active_ids:
+            self._remove(profile_id)
+        logger.info(f"Loaded {len(profiles)} filter profiles")
+
+    async def reload_profile(self, profile_id: int):
+        async with async_session_local() as db:
+            profile = await db.get(FilterProfile, profile_id)
+        if profile is None:
+            self._remove(profile_id)
+        else:
+            await self._install(profile)
+
+    async def handle_message(self, data: str):
+        """Applies one change notification published by admin-api."""
+        try:
+            message = json.loads(data)
+            await self.reload_profile(int(message["profile_id"]))
+        except Exception as e:
+            logger.error(f"Failed to apply filter profile notification {data!r}: {e}", exc_info=True)
+
+    async def run(self, redis_client: Any):
+        """Background task: initial load, then pub/sub driven updates plus periodic full reloads."""
+        await follow_changes(redis_client, FILTER_PROFILE_CHANNEL, self.load_all, self.handle_message,
+                             FILTER_PROFILE_REFRESH_SECONDS, "Filter profile")
@@ -2,6 +2,12 @@ import re
 import logging
 import importlib
 import os
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Callable
 
 logger = logging.getLogger("transcription_collector.filters")
 
@@ -21,18 +27,125 @@ BASE_NON_INFORMATIVE_PATTERNS = [
     r"^<<$",   # Just '<<' characters
 ]
 
+# Number of recent (text, language) -> decision results remembered.
+# Whisper repeats the same hallucinated strings constantly, so hits are frequent.
+FILTER_MEMO_SIZE = int(os.environ.get("FILTER_MEMO_SIZE", "4096"))
+
+# Process pool for custom filters marked with @cpu_heavy
+FILTER_POOL_WORKERS = int(os.environ.get("FILTER_POOL_WORKERS", "2"))
+FILTER_POOL_BATCH_SIZE = int(os.environ.get("FILTER_POOL_BATCH_SIZE", "32")) # Texts per worker task
+FILTER_POOL_TIMEOUT_SECONDS = float(os.environ.get("FILTER_POOL_TIMEOUT_SECONDS", "2.0")) # Per batch of segments
+
+def cpu_heavy(filter_function):
+    """
+    Mark a custom filter as CPU-heavy (language ID, classifiers, ...).
+    Heavy filters run in a process pool instead of on the collector's event loop,
+    so they must be module-level functions that can be pickled.
+    """
+    filter_function.cpu_heavy = True
+    return filter_function
+
+def _apply_filters(filter_functions: Sequence[Callable], texts: Sequence[str]) -> List[bool]:
+    """Runs in a pool worker: applies every filter to every text."""
+    results = []
+    for text in texts:
+        keep = True
+        for filter_function in filter_functions:
+            try:
+                if not filter_function(text):
+                    keep = False
+                    break
+            except Exception as e:
+                logger.error(f"Error in custom filter {filter_function.__name__}: {e}")
+        results.append(keep)
+    return results
+
+class HeavyFilterPool:
+    """Runs CPU-heavy custom filters in worker processes, in batches, with a timeout."""
+    
+    def __init__(self, workers=FILTER_POOL_WORKERS, batch_size=FILTER_POOL_BATCH_SIZE, timeout=FILTER_POOL_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._executor = None
+        self.fail_open_count = 0 # Segments kept unfiltered because their batch failed or timed out
+    
+    def _get_executor(self):
+        if self._executor is None:
+            # 'spawn' avoids forking a process with a running event loop and open connections
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started heavy filter process pool with {self.workers} workers")
+        return self._executor
+    
+    async def run(self, filter_functions: Sequence[Callable], texts: Sequence[str]) -> List[Optional[bool]]:
+        """
+        Apply filters to texts in the pool, results in input order.
+        Texts whose batch failed or timed out get None (undecided): the caller keeps them.
+        After a timeout the pool is recycled, since the stuck workers would keep running.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        executor = self._get_executor()
+        chunks = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        futures = [loop.run_in_executor(executor, _apply_filters, list(filter_functions), chunk) for chunk in chunks]
+        results: List[Optional[bool]] = []
+        failed = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(await asyncio.wait_for(future, max(deadline - loop.time(), 0)))
+                continue
+            except asyncio.TimeoutError:
+                failed.append(f"timed out after {self.timeout}s")
+            except BrokenProcessPool as e:
+                failed.append(f"process pool broke ({e})")
+            except Exception as e:
+                logger.error(f"Error running heavy filters: {e}", exc_info=True)
+                failed.append("error")
+            results.extend([None] * len(chunk))
+        if failed:
+            undecided = results.count(None)
+            self.fail_open_count += undecided
+            logger.warning(f"Heavy filters failed ({', '.join(sorted(set(failed)))}), keeping {undecided} of "
+                           f"{len(texts)} segments unfiltered ({self.fail_open_count} since start); restarting the pool")
+            self.shutdown(executor)
+        return results
+    
+    def shutdown(self, executor: Optional[ProcessPoolExecutor] = None):
+        """
+        Stops the pool (only if it is still executor, when given: concurrent runs may have
+        replaced it already). Workers are killed, so filters stuck on a text stop too.
+        """
+        if self._executor is None or (executor is not None and executor is not self._executor):
+            return
+        executor, self._executor = self._executor, None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+
+heavy_filter_pool = HeavyFilterPool()
+
 class TranscriptionFilter:
     """Manages transcription filtering logic"""
     
-    def __init__(self):
+    def __init__(self, profile: Optional[dict] = None):
+        """
+        Args:
+            profile: Optional per-tenant FilterProfileConfig (as a dict) layered over filter_config.py
+        """
         self.custom_filters = []
         self.patterns = list(BASE_NON_INFORMATIVE_PATTERNS)
         self.min_character_length = 3
         self.min_real_words = 1
         self.stopwords = {}
+        self._memo = OrderedDict()
         
         # Load configuration
         self.load_config()
+        if profile:
+            self.apply_profile(profile)
+        self.compile()
     
     def load_config(self):
         """Load filter configuration from filter_config.py"""
@@ -71,6 +184,38 @@ class TranscriptionFilter:
         except Exception as e:
             logger.error(f"Error loading filter configuration: {e}")
     
+    def apply_profile(self, profile: dict):
+        """Layer a filter profile's rules over the loaded configuration"""
+        self.patterns.extend(profile.get('additional_patterns') or [])
+        if profile.get('min_character_length') is not None:
+            self.min_character_length = profile['min_character_length']
+        if profile.get('min_real_words') is not None:
+            self.min_real_words = profile['min_real_words']
+        if profile.get('stopwords'):
+            self.stopwords = {**self.stopwords, **profile['stopwords']}
+    
+    def compile(self):
+        """
+        Compile patterns into a single matcher and stopwords into frozensets.
+        Must be called again after changing patterns or stopwords.
+        """
+        try:
+            # One alternation is evaluated in a single pass instead of one re.match per pattern
+            self._pattern_matcher = re.compile("|".join(f"(?:{p})" for p in self.patterns))
+            self._fallback_patterns = None
+        except re.error as e:
+            # Patterns using numbered backreferences cannot be combined; match them one by one
+            logger.warning(f"Could not combine filter patterns ({e}), matching them individually")
+            self._pattern_matcher = None
+            self._fallback_patterns = [re.compile(p) for p in self.patterns]
+        self._stopword_sets = {lang: frozenset(w.lower() for w in words) for lang, words in self.stopwords.items()}
+        self._split_custom_filters()
+        self._memo.clear()
+    
+    def _split_custom_filters(self):
+        self._light_filters = [f for f in self.custom_filters if not getattr(f, 'cpu_heavy', False)]
+        self._heavy_filters = [f for f in self.custom_filters if getattr(f, 'cpu_heavy', False)]
+    
     def add_custom_filter(self, filter_function):
         """
         Add a custom filter function
@@ -79,18 +224,27 @@ class TranscriptionFilter:
             filter_function: Function that takes text and returns True if it should be kept
         """
         self.custom_filters.append(filter_function)
+        self._split_custom_filters()
+        self._memo.clear()
     
     def is_stop_word(self, word, language='en'):
         """Check if a word is a stopword in the given language"""
-        return language in self.stopwords and word.lower() in self.stopwords[language]
+        stopwords = self._stopword_sets.get(language)
+        return stopwords is not None and word.lower() in stopwords
+    
+    def _matches_pattern(self, text):
+        if self._pattern_matcher is not None:
+            return self._pattern_matcher.match(text) is not None
+        return any(p.match(text) for p in self._fallback_patterns)
     
-    def filter_segment(self, text, language='en'):
+    def filter_segment(self, text, language='en', include_heavy=True):
         """
         Apply all filters to determine if segment should be kept
         
         Args:
             text (str): Text to filter
             language (str): Language code for language-specific filtering
+            include_heavy (bool): Also run @cpu_heavy custom filters, inline
             
         Returns:
             bool: True if segment passes all filters, False otherwise
@@ -100,35 +254,101 @@ class TranscriptionFilter:
         
         # Check minimum length
         if len(text) < self.min_character_length:
-            logger.debug(f"Filtering out short text: '{text}'")
+            logger.debug("Filtering out short text: %r", text)
             return False
         
-        # Check against patterns
-        for pattern in self.patterns:
-            if re.match(pattern, text):
-                logger.debug(f"Filtering out text matching pattern {pattern}: '{text}'")
-                return False
+        # Check against all patterns at once
+        if self._matches_pattern(text):
+            logger.debug("Filtering out text matching a non-informative pattern: %r", text)
+            return False
         
-        # Count actual words (at least 3 characters) - exclude stopwords
-        real_words = [
-            w for w in text.split() 
-            if len(w) >= 3 and 
-            not w.startswith('<') and 
-            not w.startswith('[') and
-            not self.is_stop_word(w, language)
-        ]
+        # Count actual words (at least 3 characters) - exclude stopwords, stop as soon as enough are found
+        stopwords = self._stopword_sets.get(language, frozenset())
+        real_words = 0
+        for w in text.split():
+            if len(w) >= 3 and w[0] not in '<[' and w.lower() not in stopwords:
+                real_words += 1
+                if real_words >= self.min_real_words:
+                    break
         
-        if len(real_words) < self.min_real_words:
-            logger.debug(f"Filtering out text with insufficient real words: '{text}'")
+        if real_words < self.min_real_words:
+            logger.debug("Filtering out text with insufficient real words: %r", text)
             return False
         
         # Apply any custom filters
-        for custom_filter in self.custom_filters:
+        for custom_filter in (self.custom_filters if include_heavy else self._light_filters):
             try:
                 if not custom_filter(text):
-                    logger.debug(f"Text filtered by custom filter {custom_filter.__name__}: '{text}'")
+                    logger.debug("Text filtered by custom filter %s: %r", custom_filter.__name__, text)
                     return False
             except Exception as e:
                 logger.error(f"Error in custom filter {custom_filter.__name__}: {e}")
                 
-        return True 
\ No newline at end of file
+        return True
+    
+    def filter_segments(self, texts: Sequence[str], languages: Optional[Sequence[Optional[str]]] = None) -> List[bool]:
+        """
+        Apply all filters to a batch of segments
+        
+        Args:
+            texts: Segment texts
+            languages: Language code per text (None entries default to 'en')
+            
+        Returns:
+            List[bool]: True for each segment that passes all filters
+        """
+        if languages is None:
+            languages = ['en'] * len(texts)
+        memo = self._memo
+        decisions = []
+        for text, language in zip(texts, languages):
+            key = (text, language or 'en')
+            decision = memo.get(key)
+            if decision is None:
+                decision = self.filter_segment(text, language=key[1])
+                self._remember(key, decision)
+            else:
+                memo.move_to_end(key)
+            decisions.append(decision)
+        return decisions
+    
+    async def filter_segments_async(self, texts: Sequence[str], languages: Optional[Sequence[Optional[str]]] = None) -> List[bool]:
+        """
+        Same as filter_segments, but @cpu_heavy custom filters run in the process pool
+        (only for segments that passed every other filter), keeping the event loop responsive.
+        """
+        if not self._heavy_filters:
+            return self.filter_segments(texts, languages)
+        if languages is None:
+            languages = ['en'] * len(texts)
+        memo = self._memo
+        decisions: List[Optional[bool]] = []
+        pending_keys = []
+        pending_texts = []
+        for text, language in zip(texts, languages):
+            key = (text, language or 'en')
+            decision = memo.get(key)
+            if decision is not None:
+                memo.move_to_end(key)
+            elif self.filter_segment(text, language=key[1], include_heavy=False):
+                pending_keys.append((len(decisions), key))
+                pending_texts.append(text.strip())
+            else:
+                decision = False
+                self._remember(key, decision)
+            decisions.append(decision)
+        
+        if pending_texts:
+            results = await heavy_filter_pool.run(self._heavy_filters, pending_texts)
+            for (index, key), keep in zip(pending_keys, results):
+                if keep is None:
+                    decisions[index] = True # Undecided (timeout/error) - keep, but do not memoize
+                else:
+                    decisions[index] = keep
+                    self._remember(key, keep)
+        return decisions
+    
+    def _remember(self, key, decision):
+        self._memo[key] = decision
+        if len(self._memo) > FILTER_MEMO_SIZE:
+            self._memo.popitem(last=False)
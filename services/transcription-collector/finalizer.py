@@ -0,0 +1,60 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+from shared_models.database import async_session_local
+from shared_models.transcripts import finalize_meeting_transcript
+
+logger = logging.getLogger("transcription_collector.finalizer")
+
+# A meeting whose stream sent no segments for this long gets its transcript finalized
+FINALIZE_IDLE_SECONDS = int(os.environ.get("FINALIZE_IDLE_SECONDS", "300"))
+FINALIZE_CHECK_INTERVAL_SECONDS = int(os.environ.get("FINALIZE_CHECK_INTERVAL_SECONDS", "60"))
+
+class IdleTranscriptFinalizer:
+    """
+    Finalizes transcripts of meetings whose segment stream on this collector went idle.
+    on_idle is called with the ID of each such meeting, to drop per-meeting stream state.
+    """
+
+    def __init__(self, idle_seconds: int = FINALIZE_IDLE_SECONDS, on_idle: Optional[Callable[[int], None]] = None):
+        self.idle_seconds = idle_seconds
+        self.on_idle = on_idle
+        self._last_activity: Dict[int, float] = {}
+
+    def touch(self, meeting_id: int):
+        """Records that segments were just stored for a meeting."""
+        self._last_activity[meeting_id] = time.monotonic()
+
+    async def finalize_idle(self) -> int:
+        """Finalizes every meeting idle for longer than idle_seconds. Returns the number finalized."""
+        now = time.monotonic()
+        idle = [m for m, last in self._last_activity.items() if now - last >= self.idle_seconds]
+        finalized = 0
+        for meeting_id in idle:
+            # Drop first: if new segments arrive meanwhile, touch() re-registers the meeting
+            self._last_activity.pop(meeting_id, None)
+            if self.on_idle:
+                self.on_idle(meeting_id)
+            async with async_session_local() as db:
+                try:
+                    if await finalize_meeting_transcript(db, meeting_id):
+                        finalized += 1
+                except Exception as e:
+                    logger.error(f"Failed to finalize idle meeting {meeting_id}: {e}", exc_info=True)
+                    await db.rollback()
+        return finalized
+
+    async def run(self):
+        """Background loop checking for idle streams."""
+        logger.info(f"Idle transcript finalizer started (idle after {self.idle_seconds}s)")
+        while True:
+            await asyncio.sleep(FINALIZE_CHECK_INTERVAL_SECONDS)
+            try:
+                await self.finalize_idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Idle finalizer run failed: {e}", exc_info=True)
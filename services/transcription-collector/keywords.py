@@ -0,0 +1,221 @@
+import os
+import json
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import select
+
+from shared_models.database import async_session_local
+from shared_models.models import KeywordSet, Meeting, Transcription
+from shared_models.schemas import KEYWORD_SET_CHANNEL, KEYWORD_HITS_STREAM
+from change_feed import follow_changes
+
+logger = logging.getLogger("transcription_collector.keywords")
+
+# Approximate cap on the hits stream length (XADD MAXLEN ~)
+KEYWORD_HITS_MAXLEN = int(os.environ.get("KEYWORD_HITS_MAXLEN", "100000"))
+# Full reload interval, in case pub/sub notifications were missed
+KEYWORD_SET_REFRESH_SECONDS = int(os.environ.get("KEYWORD_SET_REFRESH_SECONDS", "300"))
+
+class KeywordHit(NamedTuple):
+    keyword_set_id: int
+    keyword_set_name: str
+    keyword: str
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a set of keywords. Finds every keyword occurring in a text
+    in one pass over its characters, independent of the number of keywords.
+    Matching is case-insensitive, whitespace-normalized and restricted to whole words.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]]):
+        """
+        Args:
+            keywords: (keyword, payload) pairs; the payload is returned for each match
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, Any], ...]] = [()]
+        self.size = 0
+        for keyword, payload in keywords:
+            self._add(_normalize(keyword), payload)
+        self._build()
+
+    def _add(self, keyword: str, payload: Any):
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        self._out[state] += ((len(keyword), payload),)
+        self.size += 1
+
+    def _build(self):
+        """Computes failure links breadth-first and merges each state's outputs with its failure state's."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def search(self, text: str) -> List[Any]:
+        """Returns the payloads of all whole-word keyword occurrences in text, in order of their end."""
+        text = _normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state] and (i == last or not _is_word_char(text[i + 1])):
+                for length, payload in out[state]:
+                    start = i - length + 1
+                    if start == 0 or not _is_word_char(text[start - 1]):
+                        matches.append(payload)
+        return matches
+
+class KeywordAlertRegistry:
+    """
+    Holds one compiled automaton per user over all of the user's keyword sets.
+
+    Sets are loaded at startup, on every change notification and periodically. A change
+    only rebuilds the automaton of the set's owner, off the event loop, and swaps it in
+    atomically; the ingest path only does a dictionary lookup and one scan per segment.
+    """
+
+    def __init__(self):
+        # set_id -> (user_id, version, name, keywords)
+        self._sets: Dict[int, Tuple[int, int, str, List[str]]] = {}
+        self._automata: Dict[int, KeywordAutomaton] = {}
+
+    def has_keywords(self, user_id: int) -> bool:
+        return user_id in self._automata
+
+    def match(self, user_id: int, text: str) -> List[KeywordHit]:
+        automaton = self._automata.get(user_id)
+        if automaton is None:
+            return []
+        # Report each keyword once per segment
+        return list(dict.fromkeys(automaton.search(text)))
+
+    async def _rebuild(self, user_id: int):
+        entries = [
+            (keyword, KeywordHit(set_id, name, keyword))
+            for set_id, (owner, _, name, keywords) in self._sets.items() if owner == user_id
+            for keyword in keywords
+        ]
+        if not entries:
+            self._automata.pop(user_id, None)
+            return
+        # Building the automaton is CPU work; run it in a thread so the event loop keeps serving streams
+        self._automata[user_id] = await asyncio.to_thread(KeywordAutomaton, entries)
+        logger.info(f"Compiled {len(entries)} keywords for user {user_id}")
+
+    async def _apply(self, keyword_sets: Sequence[KeywordSet], removed_ids: Iterable[int] = ()):
+        """Updates the given sets, drops removed ones and rebuilds only the affected users' automata."""
+        affected = set()
+        for set_id in removed_ids:
+            previous = self._sets.pop(set_id, None)
+            if previous:
+                affected.add(previous[0])
+        for keyword_set in keyword_sets:
+            previous = self._sets.get(keyword_set.id)
+            if previous and previous[1] == keyword_set.version:
+                continue
+            self._sets[keyword_set.id] = (keyword_set.user_id, keyword_set.version, keyword_set.name, list(keyword_set.keywords))
+            affected.add(keyword_set.user_id)
+            if previous:
+                affected.add(previous[0])
+        for user_id in affected:
+            try:
+                await self._rebuild(user_id)
+            except Exception as e:
+                logger.error(f"Failed to compile keywords for user {user_id}: {e}", exc_info=True)
+
+    async def load_all(self):
+        async with async_session_local() as db:
+            result = await db.execute(select(KeywordSet))
+            keyword_sets = result.scalars().all()
+        removed = set(self._sets) - {s.id for s in keyword_sets}
+        await self._apply(keyword_sets, removed)
+        logger.info(f"Loaded {len(keyword_sets)} keyword sets")
+
+    async def reload_set(self, set_id: int):
+        async with async_session_local() as db:
+            keyword_set = await db.get(KeywordSet, set_id)
+        if keyword_set is None:
+            await self._apply([], [set_id])
+        else:
+            await self._apply([keyword_set])
+
+    async def handle_message(self, data: str):
+        """Applies one change notification."""
+        try:
+            message = json.loads(data)
+            await self.reload_set(int(message["set_id"]))
+        except Exception as e:
+            logger.error(f"Failed to apply keyword set notification {data!r}: {e}", exc_info=True)
+
+    async def run(self, redis_client: Any):
+        """Background task: initial load, then pub/sub driven updates plus periodic full reloads."""
+        await follow_changes(redis_client, KEYWORD_SET_CHANNEL, self.load_all, self.handle_message,
+                             KEYWORD_SET_REFRESH_SECONDS, "Keyword set")
+
+    async def publish_hits(self, redis_client: Any, meeting: Meeting, segments: Sequence[Transcription]) -> int:
+        """Matches stored segments against the meeting owner's keywords and appends hits to the hits stream."""
+        if not self.has_keywords(meeting.user_id):
+            return 0
+        entries = []
+        for segment in segments:
+            for hit in self.match(meeting.user_id, segment.text):
+                entries.append({
+                    "user_id": meeting.user_id,
+                    "meeting_id": meeting.id,
+                    "platform": meeting.platform,
+                    "native_meeting_id": meeting.platform_specific_id or "",
+                    "keyword_set_id": hit.keyword_set_id,
+                    "keyword_set_name": hit.keyword_set_name,
+                    "keyword": hit.keyword,
+                    "text": segment.text,
+                    "start_time": segment.start_time,
+                    "end_time": segment.end_time,
+                    "timestamp": datetime.utcnow().isoformat(),
+                })
+        if entries:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for entry in entries:
+                    pipe.xadd(KEYWORD_HITS_STREAM, entry, maxlen=KEYWORD_HITS_MAXLEN, approximate=True)
+                await pipe.execute()
+        return len(entries)
+
+async def publish_keyword_set_change(redis_client: Any, set_id: int):
+    """Tells all collectors to reload a keyword set."""
+    try:
+        await redis_client.publish(KEYWORD_SET_CHANNEL, json.dumps({"set_id": set_id}))
+    except Exception as e:
+        logger.error(f"Failed to publish keyword set change for set {set_id}: {e}")
@@ -1,12 +1,15 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, HTTPException, Depends, Header, Security, status
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, HTTPException, Depends, Header, Security, status, Response
+from fastapi.responses import StreamingResponse
 import json
 import logging
 import uuid
 import os
+import secrets
 import asyncio
 from datetime import datetime
 import redis.asyncio as redis
-from sqlalchemy import select, and_, func, distinct, text
+from sqlalchemy import select, and_, func, distinct, text, tuple_, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from fastapi.security.api_key import APIKeyHeader
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
@@ -14,7 +17,14 @@ from typing import Optional, List, Dict
 from pydantic import ValidationError
 
 from shared_models.database import get_db, init_db
-from shared_models.models import APIToken, User, Meeting, Transcription
+from shared_models.auth import TokenAuthCache, IDENTITY_HEADER
+from shared_models.etags import make_etag, etag_matches
+from shared_models.logging_utils import configure_logging
+from shared_models.models import User, Meeting, Transcription, MeetingArchive, TranscriptDocument, KeywordSet
+from shared_models.transcripts import (
+    invalidate_transcript_document, decompress_document, render_transcript_response,
+    serialize_segments, serialize_segment_dicts
+)
 from shared_models.schemas import (
     TranscriptionSegment, 
     HealthResponse, 
@@ -23,79 +33,138 @@ from shared_models.schemas import (
     MeetingListResponse,
     TranscriptionResponse,
     Platform,
-    WhisperLiveData
+    WhisperLiveData,
+    BulkExportFormat,
+    TranscriptionBatchRequest,
+    TranscriptionBatchResponse,
+    KeywordSetCreate,
+    KeywordSetResponse,
+    KeywordSetListResponse
+)
+from filters import TranscriptionFilter, heavy_filter_pool
+from filter_profiles import FilterProfileRegistry
+from redaction import Redactor, REDACTION_ENABLED
+from repetition import RepetitionSuppressor
+from keywords import KeywordAlertRegistry, publish_keyword_set_change
+from archive import ARCHIVE_ENABLED, run_archiver, load_archived_segments, ArchiveError
+from finalizer import IdleTranscriptFinalizer
+from exports import (
+    negotiate_format, export_transcript,
+    BULK_EXPORT_MEDIA_TYPES, decode_continuation_token, stream_bulk_export
 )
-from filters import TranscriptionFilter
 
 app = FastAPI(
     title="Transcription Collector",
     description="Collects and stores transcriptions from WhisperLive instances."
 )
 
-# Configure logging
-logging.basicConfig(
-    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configure logging; per-message ingest logs are sampled (see LOG_SAMPLE_RATES)
+configure_logging(sample_rates={"transcription_collector.ingest": 0.01})
 logger = logging.getLogger("transcription_collector")
+ingest_logger = logging.getLogger("transcription_collector.ingest")
 
 # Security - API Key auth
 API_KEY_NAME = "X-API-Key"  # Standardize header name
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
+admin_api_key_header = APIKeyHeader(name="X-Admin-API-Key", auto_error=False)
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN") # Same token admin-api verifies
+
+# Bulk export page size limits (rows per response)
+BULK_EXPORT_DEFAULT_LIMIT = int(os.environ.get("BULK_EXPORT_DEFAULT_LIMIT", "100000"))
+BULK_EXPORT_MAX_LIMIT = int(os.environ.get("BULK_EXPORT_MAX_LIMIT", "1000000"))
+
+# Maximum meetings per POST /transcripts/batch request
+TRANSCRIPT_BATCH_MAX_ITEMS = int(os.environ.get("TRANSCRIPT_BATCH_MAX_ITEMS", "50"))
+# Upper bound for the `tail` parameter of the transcript endpoint
+TRANSCRIPT_TAIL_MAX = int(os.environ.get("TRANSCRIPT_TAIL_MAX", "10000"))
+
+# Keyword alert limits per user
+KEYWORD_SET_MAX_KEYWORDS = int(os.environ.get("KEYWORD_SET_MAX_KEYWORDS", "10000"))
+KEYWORD_SETS_PER_USER = int(os.environ.get("KEYWORD_SETS_PER_USER", "100"))
 
 async def get_current_user(api_key: str = Security(api_key_header),
+                           identity: Optional[str] = Header(None, alias=IDENTITY_HEADER, include_in_schema=False),
                            db: AsyncSession = Depends(get_db)) -> User:
-    """Dependency to verify X-API-Key and return the associated User."""
+    """Dependency to verify X-API-Key (through the gateway's signed identity when present) and return the associated User."""
     if not api_key:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing API token")
     
-    # Find the token in the database
-    result = await db.execute(
-        select(APIToken, User)
-        .join(User, APIToken.user_id == User.id)
-        .where(APIToken.token == api_key)
-    )
-    token_user = result.first()
-    
-    if not token_user:
-        logger.warning(f"Invalid API token provided: {api_key[:10]}...")
+    # Signed gateway identity is verified locally; otherwise a cached token lookup
+    user = await auth_cache.authenticate_request(api_key, identity, db)
+    if not user:
+        logger.warning("Invalid API token provided")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid API token"
         )
-    
-    _token_obj, user_obj = token_user
-    return user_obj
+    return user
 
 # Redis connection
 redis_client = None
 
-# Initialize transcription filter
+# Token -> user cache shared with the other services through Redis
+auth_cache = TokenAuthCache()
+
+# Background cold-archive task (only when ARCHIVE_ENABLED)
+archiver_task = None
+
+# Suppresses segments repeated across a meeting's stream (e.g. hallucinations during silence)
+repetition_suppressor = RepetitionSuppressor()
+
+# Finalizes transcripts of meetings whose stream went idle; their repetition windows go with them
+idle_finalizer = IdleTranscriptFinalizer(on_idle=repetition_suppressor.forget)
+idle_finalizer_task = None
+
+# Initialize transcription filter (default rules) and per-tenant filter profiles
 transcription_filter = TranscriptionFilter()
+filter_profiles = FilterProfileRegistry(transcription_filter, Redactor())
+filter_profiles_task = None
+
+# Per-user keyword automata; hits on stored segments go to the keyword_hits Redis stream
+keyword_alerts = KeywordAlertRegistry()
+keyword_alerts_task = None
 
 @app.on_event("startup")
 async def startup():
-    global redis_client
+    global redis_client, archiver_task, idle_finalizer_task, filter_profiles_task, keyword_alerts_task
     
-    # Initialize Redis connection
-    redis_host = os.environ.get("REDIS_HOST", "redis")
-    redis_port = int(os.environ.get("REDIS_PORT", "6379"))
-    logger.info(f"Connecting to Redis at {redis_host}:{redis_port}")
-    
-    redis_client = redis.Redis(
-        host=redis_host,
-        port=redis_port,
-        db=0,
-        decode_responses=True
-    )
+    # Initialize Redis connection (already set when running in monolith mode)
+    if redis_client is None:
+        redis_host = os.environ.get("REDIS_HOST", "redis")
+        redis_port = int(os.environ.get("REDIS_PORT", "6379"))
+        logger.info(f"Connecting to Redis at {redis_host}:{redis_port}")
+
+        redis_client = redis.Redis(
+            host=redis_host,
+            port=redis_port,
+            db=0,
+            decode_responses=True
+        )
     
     # Initialize database connection
     await init_db()
     logger.info("Database initialized.")
+    auth_cache.start(redis_client)
+
+    if ARCHIVE_ENABLED:
+        archiver_task = asyncio.create_task(run_archiver())
+    idle_finalizer_task = asyncio.create_task(idle_finalizer.run())
+    filter_profiles_task = asyncio.create_task(filter_profiles.run(redis_client))
+    keyword_alerts_task = asyncio.create_task(keyword_alerts.run(redis_client))
 
 @app.on_event("shutdown")
 async def shutdown():
     # await disconnect_db() # Use Session context manager or engine.dispose()
+    if archiver_task:
+        archiver_task.cancel()
+    if idle_finalizer_task:
+        idle_finalizer_task.cancel()
+    if filter_profiles_task:
+        filter_profiles_task.cancel()
+    if keyword_alerts_task:
+        keyword_alerts_task.cancel()
+    heavy_filter_pool.shutdown()
+    await auth_cache.stop()
     if redis_client:
         await redis_client.close()
     logger.info("Application shutting down, connections closed")
@@ -109,18 +178,19 @@ async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(ge
     try:
         while True:
             data = await websocket.receive_text()
-            logger.info(f"[{connection_id}] RAW Data Received: {data}") # Log raw data
+            ingest_logger.debug("[%s] Raw data received: %.500s", connection_id, data)
 
             try:
                 # Attempt to parse the message using the combined WhisperLiveData schema
                 whisper_data = WhisperLiveData.parse_raw(data)
-                logger.info(f"[{connection_id}] Parsed WhisperLiveData: platform={whisper_data.platform.value}, native_id={whisper_data.meeting_id}, token={whisper_data.token[:5]}..., segments={len(whisper_data.segments)}")
+                ingest_logger.debug("[%s] Parsed WhisperLiveData: platform=%s, native_id=%s, segments=%d",
+                                    connection_id, whisper_data.platform.value, whisper_data.meeting_id, len(whisper_data.segments))
 
                 # 1. Validate Token and Get User
                 try:
                     user = await get_user_by_token(whisper_data.token, db)
                     if not user: raise ValueError("User not found for token") # Should be handled by HTTPException in helper
-                    logger.info(f"[{connection_id}] Token validated for user {user.id}")
+                    ingest_logger.debug("[%s] Token validated for user %s", connection_id, user.id)
                 except HTTPException as auth_exc:
                     logger.warning(f"[{connection_id}] Auth failed for incoming data: {auth_exc.detail}")
                     # Decide if we close connection or just skip processing this batch
@@ -145,7 +215,7 @@ async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(ge
                     continue # Skip processing this message if meeting not found
 
                 internal_meeting_id = meeting.id
-                logger.info(f"[{connection_id}] Associated internal meeting ID: {internal_meeting_id}")
+                ingest_logger.debug("[%s] Associated internal meeting ID: %s", connection_id, internal_meeting_id)
 
                 # 3. Process Segments if meeting found
                 if whisper_data.segments: # Check if there are segments in this message
@@ -156,7 +226,7 @@ async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(ge
                         db=db # <<< Pass the db session from the endpoint dependency
                     )
                 else:
-                     logger.info(f"[{connection_id}] Received WhisperLiveData message for meeting {internal_meeting_id} with no segments.")
+                     ingest_logger.debug("[%s] Received WhisperLiveData message for meeting %s with no segments.", connection_id, internal_meeting_id)
 
             except (json.JSONDecodeError, ValidationError) as parse_error:
                 logger.warning(f"[{connection_id}] Failed to parse WhisperLiveData: {parse_error}. Data: {data[:500]}...") # Log more data on error
@@ -194,19 +264,12 @@ async def process_transcription(internal_meeting_id: int, segments: List[Transcr
         logger.error(f"[{server_id}] process_transcription called without internal_meeting_id")
         return
     if not segments:
-        logger.info(f"[{server_id}] process_transcription called with no segments for meeting {internal_meeting_id}. Nothing to process.")
+        ingest_logger.debug("[%s] process_transcription called with no segments for meeting %s. Nothing to process.", server_id, internal_meeting_id)
         return
 
-    # Enhanced logging
-    logger.info(f"[{server_id}] Processing {len(segments)} segments for internal_meeting_id={internal_meeting_id}")
-    
-    # Log a sample of the first segment if available
-    if segments: # Check if segments list is not empty
-        sample_segment = segments[0]
-        logger.info(f"[{server_id}] Sample segment for meeting {internal_meeting_id}: start={sample_segment.start_time}, end={sample_segment.end_time}, text='{sample_segment.text[:50]}...' if len(sample_segment.text) > 50 else sample_segment.text")
-    else:
-        logger.info(f"[{server_id}] Received empty segment list for meeting {internal_meeting_id}")
-    
+    ingest_logger.debug("[%s] Processing %d segments for internal_meeting_id=%s (first: start=%s, end=%s, text=%.50r)",
+                        server_id, len(segments), internal_meeting_id, segments[0].start_time, segments[0].end_time, segments[0].text)
+
     # REMOVE async with get_db(), use passed-in db directly
     # async with get_db() as db:
     try: # Add try/except block for operations using the passed db session
@@ -216,47 +279,95 @@ async def process_transcription(internal_meeting_id: int, segments: List[Transcr
             logger.warning(f"[{server_id}] Meeting with internal id={internal_meeting_id} not found. Cannot store segments.")
             return
         
-        logger.info(f"[{server_id}] Found meeting record: id={meeting.id}, platform={meeting.platform}, native_id={meeting.platform_specific_id}")
 
         new_segments_to_store = []
         processed_count = 0
         filtered_count = 0
 
+        candidates = []
         for segment in segments:
             if not segment.text or segment.start_time is None or segment.end_time is None:
-                logger.debug(f"[{server_id}] Skipping segment with missing data for meeting {internal_meeting_id}")
+                ingest_logger.debug("[%s] Skipping segment with missing data for meeting %s", server_id, internal_meeting_id)
                 continue
-            
-            # Redis key for deduplication uses internal meeting ID
-            segment_key = f"segment:{internal_meeting_id}:{segment.start_time:.3f}:{segment.end_time:.3f}"
-            exists = await redis_client.get(segment_key)
-
-            if not exists:
-                await redis_client.setex(segment_key, 300, "processed") # Simple flag is enough
-                
-                if transcription_filter.filter_segment(segment.text, language=(segment.language or 'en')):
-                    new_transcription = create_transcription_object(
-                        meeting_id=internal_meeting_id,
-                        start=segment.start_time,
-                        end=segment.end_time,
-                        text=segment.text,
-                        language=segment.language
-                    )
-                    new_segments_to_store.append(new_transcription)
-                    processed_count += 1
-                else:
-                    filtered_count += 1
-                    logger.debug(f"[{server_id}] Filtered out segment for meeting {internal_meeting_id}: '{segment.text}'")
+            candidates.append(segment)
+
+        # Redis deduplication for the whole batch in one round trip:
+        # SET NX succeeds only for segments not seen in the last 300s (key uses internal meeting ID)
+        segment_keys = [f"segment:{internal_meeting_id}:{s.start_time:.3f}:{s.end_time:.3f}" for s in candidates]
+        if segment_keys:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for segment_key in segment_keys:
+                    pipe.set(segment_key, "processed", nx=True, ex=300) # Simple flag is enough
+                first_seen = await pipe.execute()
+        else:
+            first_seen = []
+
+        new_segments = []
+        for segment, segment_key, is_new in zip(candidates, segment_keys, first_seen):
+            if is_new:
+                new_segments.append(segment)
+            else:
+                ingest_logger.debug("[%s] Skipping duplicate segment for meeting %s based on Redis key: %s", server_id, internal_meeting_id, segment_key)
+
+        # Filter the whole batch in one call, using the tenant's compiled profile if it has one
+        profile = filter_profiles.get_profile(meeting.user_id, internal_meeting_id)
+        segment_filter = profile.filter
+        decisions = await segment_filter.filter_segments_async(
+            [s.text for s in new_segments], [s.language or 'en' for s in new_segments]
+        )
+        informative = []
+        for segment, keep in zip(new_segments, decisions):
+            if keep:
+                informative.append(segment)
             else:
-                logger.debug(f"[{server_id}] Skipping duplicate segment for meeting {internal_meeting_id} based on Redis key: {segment_key}")
+                filtered_count += 1
+                ingest_logger.debug("[%s] Filtered out segment for meeting %s: %r", server_id, internal_meeting_id, segment.text)
+
+        # Then drop segments repeated across the meeting's recent stream
+        not_repeated = repetition_suppressor.check(internal_meeting_id, [(s.text, s.start_time) for s in informative])
+        kept = []
+        for segment, keep in zip(informative, not_repeated):
+            if keep:
+                kept.append(segment)
+            else:
+                filtered_count += 1
+                ingest_logger.debug("[%s] Suppressed repeated segment for meeting %s: %r", server_id, internal_meeting_id, segment.text)
+
+        # Redact PII from what is kept, one scan per segment, before anything is persisted
+        texts = [s.text for s in kept]
+        if REDACTION_ENABLED:
+            texts, redaction_count = profile.redactor.redact_segments(texts)
+            if redaction_count:
+                ingest_logger.info("[%s] Redacted %d PII matches for meeting %s", server_id, redaction_count, internal_meeting_id)
+        for segment, text in zip(kept, texts):
+            new_transcription = create_transcription_object(
+                meeting_id=internal_meeting_id,
+                start=segment.start_time,
+                end=segment.end_time,
+                text=text,
+                language=segment.language
+            )
+            new_segments_to_store.append(new_transcription)
+            processed_count += 1
         
         if new_segments_to_store:
             # Use the passed-in db session
             db.add_all(new_segments_to_store)
+            # New segments make any finalized document stale; drop it in the same transaction
+            await invalidate_transcript_document(db, internal_meeting_id)
             await db.commit()
-            logger.info(f"[{server_id}] Stored {processed_count} new segments (filtered {filtered_count}) for meeting {internal_meeting_id}")
+            idle_finalizer.touch(internal_meeting_id)
+            ingest_logger.info("[%s] Stored %d new segments (filtered %d) for meeting %s", server_id, processed_count, filtered_count, internal_meeting_id,
+                               extra={"meeting_id": internal_meeting_id, "stored": processed_count, "filtered": filtered_count})
+            try:
+                hit_count = await keyword_alerts.publish_hits(redis_client, meeting, new_segments_to_store)
+                if hit_count:
+                    ingest_logger.info("[%s] Published %d keyword hits for meeting %s", server_id, hit_count, internal_meeting_id)
+            except Exception as e:
+                # Alerts must never block ingest; segments are already stored
+                logger.error(f"[{server_id}] Failed to publish keyword hits for meeting {internal_meeting_id}: {e}")
         else:
-            logger.info(f"[{server_id}] No new, non-duplicate, informative segments to store for meeting {internal_meeting_id}")
+            ingest_logger.debug("[%s] No new, non-duplicate, informative segments to store for meeting %s", server_id, internal_meeting_id)
 
     except Exception as e:
         # Handle potential exceptions during DB operations with the passed session
@@ -304,11 +415,19 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         timestamp=datetime.now().isoformat()
     )
 
+def etag_response(content: bytes, if_none_match: Optional[str], media_type: str = "application/json") -> Response:
+    """Returns a JSON body with its ETag, or an empty 304 if the client (e.g. the gateway cache) already has it."""
+    etag = make_etag(content)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=content, media_type=media_type, headers={"ETag": etag})
+
 @app.get("/meetings", 
          response_model=MeetingListResponse,
          summary="Get list of all meetings for the current user",
          dependencies=[Depends(get_current_user)])
 async def get_meetings(
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -316,7 +435,8 @@ async def get_meetings(
     stmt = select(Meeting).where(Meeting.user_id == current_user.id).order_by(Meeting.created_at.desc())
     result = await db.execute(stmt)
     meetings = result.scalars().all()
-    return MeetingListResponse(meetings=[MeetingResponse.from_orm(m) for m in meetings])
+    response = MeetingListResponse(meetings=[MeetingResponse.from_orm(m) for m in meetings])
+    return etag_response(response.json(by_alias=True).encode(), if_none_match)
     
 @app.get("/transcripts/{platform}/{native_meeting_id}",
          response_model=TranscriptionResponse,
@@ -325,53 +445,303 @@ async def get_meetings(
 async def get_transcript_by_native_id(
     platform: Platform,
     native_meeting_id: str,
+    export_format: Optional[str] = Query(None, alias="format", description="Export format: json, srt, vtt or txt. Overrides the Accept header."),
+    tail: Optional[int] = Query(None, ge=1, le=TRANSCRIPT_TAIL_MAX, description="Return only the last N segments (JSON only)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Retrieves the meeting details and transcript segments for a meeting specified by its platform and native ID.
     Finds the *latest* matching meeting record for the user.
+    Subtitle and plain text exports (SRT, WebVTT, TXT) are selected via `format` or the Accept header.
+    With `tail`, only the most recent segments are returned (e.g. for a live meeting view).
     """
     logger.info(f"User {current_user.id} requested transcript for {platform.value} / {native_meeting_id}")
+    export_format = negotiate_format(export_format, accept)
 
     # 1. Find the latest meeting matching platform and native ID for the user
-    stmt_meeting = select(Meeting).where(
-                Meeting.user_id == current_user.id,
+    # (outer join the finalized document and archive marker so neither needs an extra lookup)
+    stmt_meeting = select(Meeting, TranscriptDocument, MeetingArchive).outerjoin(
+        TranscriptDocument, TranscriptDocument.meeting_id == Meeting.id
+    ).outerjoin(
+        MeetingArchive, MeetingArchive.meeting_id == Meeting.id
+    ).where(
+        Meeting.user_id == current_user.id,
         Meeting.platform == platform.value,
         Meeting.platform_specific_id == native_meeting_id
     ).order_by(Meeting.created_at.desc())
 
     result_meeting = await db.execute(stmt_meeting)
-    meeting = result_meeting.scalars().first()
+    meeting_row = result_meeting.first()
     
-    if not meeting:
+    if not meeting_row:
         logger.warning(f"No meeting found for user {current_user.id}, platform '{platform.value}', native ID '{native_meeting_id}'")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Meeting not found for platform {platform.value} and ID {native_meeting_id}"
         )
 
+    meeting, document, archive = meeting_row
     logger.info(f"Found meeting record ID {meeting.id} for transcript request.")
     internal_meeting_id = meeting.id
 
-    # 2. Fetch transcript segments for the found internal meeting ID
-    stmt_transcripts = select(Transcription).where(
-        Transcription.meeting_id == internal_meeting_id
-    ).order_by(Transcription.start_time)
+    if export_format != "json":
+        return await export_transcript(meeting, document, archive, export_format, redis_client)
+
+    if document:
+        # Finalized meeting - return the pre-serialized document as-is
+        logger.info(f"Returning finalized transcript document ({document.segment_count} segments) for meeting {internal_meeting_id}")
+        segments_json = decompress_document(document.content)
+        if tail and tail < document.segment_count:
+            segments_json = serialize_segment_dicts(json.loads(segments_json)[-tail:])
+        return etag_response(render_transcript_response(meeting, segments_json), if_none_match)
 
-    result_transcripts = await db.execute(stmt_transcripts)
-    segments = result_transcripts.scalars().all()
-    logger.info(f"Retrieved {len(segments)} segments for meeting {internal_meeting_id}")
+    # 2. Fetch transcript segments for the found internal meeting ID
+    if archive:
+        # Segments were moved to cold storage - read through to the archive
+        try:
+            archived_segments = await load_archived_segments(archive)
+        except (ArchiveError, OSError) as e:
+            logger.error(f"Failed to read archive '{archive.storage_key}' for meeting {internal_meeting_id}: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Archived transcript is temporarily unavailable"
+            )
+        logger.info(f"Retrieved {len(archived_segments)} archived segments for meeting {internal_meeting_id}")
+        if tail:
+            archived_segments = archived_segments[-tail:]
+        segment_details = [TranscriptionSegment.parse_obj(s) for s in archived_segments]
+    else:
+        stmt_transcripts = select(Transcription).where(
+            Transcription.meeting_id == internal_meeting_id
+        ).order_by(Transcription.start_time)
+        if tail:
+            # Last N by start time, read backwards along the index and put back in order
+            stmt_transcripts = stmt_transcripts.order_by(None).order_by(Transcription.start_time.desc()).limit(tail)
+
+        result_transcripts = await db.execute(stmt_transcripts)
+        segments = result_transcripts.scalars().all()
+        if tail:
+            segments = segments[::-1]
+        logger.info(f"Retrieved {len(segments)} segments for meeting {internal_meeting_id}")
+        segment_details = [TranscriptionSegment.from_orm(s) for s in segments]
 
     # 3. Construct the response using the found meeting and segments
     # Map ORM objects to Pydantic schemas
     meeting_details = MeetingResponse.from_orm(meeting)
-    segment_details = [TranscriptionSegment.from_orm(s) for s in segments]
 
     # Combine into the final response model
     response_data = meeting_details.dict() # Get meeting data as dict
     response_data["segments"] = segment_details # Add segments list
 
-    return TranscriptionResponse(**response_data)
+    return etag_response(TranscriptionResponse(**response_data).json(by_alias=True).encode(), if_none_match)
+
+@app.post("/transcripts/batch",
+          response_model=TranscriptionBatchResponse,
+          summary="Get transcripts for several meetings in one request",
+          dependencies=[Depends(get_current_user)])
+async def get_transcripts_batch(
+    req: TranscriptionBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Resolves a list of (platform, native_meeting_id) pairs to the user's latest matching meetings
+    and returns all transcripts together. Meetings are looked up in one query and live segments are
+    fetched with a single `meeting_id = ANY(...)` scan; missing meetings are reported per item.
+    """
+    if len(req.meetings) > TRANSCRIPT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many meetings requested ({len(req.meetings)}). Maximum is {TRANSCRIPT_BATCH_MAX_ITEMS}."
+        )
+    # Platform may be a plain string here because MeetingBase validates before enum conversion
+    pairs = list(dict.fromkeys((Platform(m.platform).value, m.native_meeting_id) for m in req.meetings))
+    logger.info(f"User {current_user.id} requested batch of {len(pairs)} transcripts")
+
+    # 1. Latest meeting (with finalized document / archive marker) for every pair, in one query
+    stmt_meetings = select(Meeting, TranscriptDocument, MeetingArchive).outerjoin(
+        TranscriptDocument, TranscriptDocument.meeting_id == Meeting.id
+    ).outerjoin(
+        MeetingArchive, MeetingArchive.meeting_id == Meeting.id
+    ).where(
+        Meeting.user_id == current_user.id,
+        tuple_(Meeting.platform, Meeting.platform_specific_id).in_(pairs)
+    ).order_by(Meeting.created_at.desc())
+    result_meetings = await db.execute(stmt_meetings)
+    found = {}
+    for meeting, document, archive in result_meetings.all():
+        found.setdefault((meeting.platform, meeting.platform_specific_id), (meeting, document, archive))
+
+    # 2. Segments of all live (non-finalized, non-archived) meetings in a single index-ordered scan
+    live_ids = [meeting.id for meeting, document, archive in found.values() if not document and not archive]
+    live_segments: Dict[int, List[Transcription]] = {meeting_id: [] for meeting_id in live_ids}
+    if live_ids:
+        stmt_segments = select(Transcription).where(
+            Transcription.meeting_id == any_(bindparam("meeting_ids", live_ids, type_=ARRAY(Integer)))
+        ).order_by(Transcription.meeting_id, Transcription.start_time)
+        result_segments = await db.execute(stmt_segments)
+        for segment in result_segments.scalars():
+            live_segments[segment.meeting_id].append(segment)
+
+    # 3. Archived meetings are read from the blob store concurrently
+    archived = [(key, archive) for key, (meeting, document, archive) in found.items() if archive and not document]
+    archive_results = await asyncio.gather(
+        *(load_archived_segments(archive) for _key, archive in archived), return_exceptions=True
+    )
+    archived_segments = dict(zip((key for key, _archive in archived), archive_results))
+
+    # 4. Assemble the combined response from pre-serialized segment arrays
+    items = []
+    for platform_value, native_meeting_id in pairs:
+        item_header = json.dumps({"platform": platform_value, "native_meeting_id": native_meeting_id})[:-1].encode()
+        entry = found.get((platform_value, native_meeting_id))
+        error = None
+        if not entry:
+            error = f"Meeting not found for platform {platform_value} and ID {native_meeting_id}"
+        else:
+            meeting, document, archive = entry
+            if document:
+                segments_json = decompress_document(document.content)
+            elif archive:
+                segments = archived_segments[(platform_value, native_meeting_id)]
+                if isinstance(segments, Exception):
+                    logger.error(f"Failed to read archive '{archive.storage_key}' for meeting {meeting.id}: {segments}")
+                    error = "Archived transcript is temporarily unavailable"
+                else:
+                    segments_json = serialize_segment_dicts(segments)
+            else:
+                segments_json = serialize_segments(live_segments[meeting.id])
+        if error:
+            items.append(item_header + b', "transcript": null, "error": ' + json.dumps(error).encode() + b"}")
+        else:
+            transcript = render_transcript_response(meeting, segments_json)
+            items.append(item_header + b', "transcript": ' + transcript + b', "error": null}')
+
+    return Response(content=b'{"results": [' + b", ".join(items) + b"]}", media_type="application/json")
+
+@app.get("/transcripts/export",
+         summary="Bulk export transcript segments over a time range",
+         responses={200: {"content": {"application/x-ndjson": {}, "application/vnd.apache.parquet": {}}}})
+async def bulk_export_transcripts(
+    start: Optional[datetime] = Query(None, description="Only segments created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only segments created before this time"),
+    export_format: BulkExportFormat = Query(BulkExportFormat.NDJSON, alias="format"),
+    user_id: Optional[int] = Query(None, description="Admin only: restrict to one user (default: all users)"),
+    continuation: Optional[str] = Query(None, description="Continuation token that ended the previous page"),
+    limit: int = Query(BULK_EXPORT_DEFAULT_LIMIT, ge=1, le=BULK_EXPORT_MAX_LIMIT, description="Maximum rows in this response"),
+    api_key: Optional[str] = Security(api_key_header),
+    admin_api_key: Optional[str] = Security(admin_api_key_header),
+    identity: Optional[str] = Header(None, alias=IDENTITY_HEADER, include_in_schema=False),
+    db: AsyncSession = Depends(get_db)
+):
+    """Streams all segments of the caller (or, with `X-Admin-API-Key`, of any/all users) in id order.
+    When more rows remain, the export ends with a continuation token (NDJSON: a final
+    `{"continuation": ...}` line; Parquet: the `continuation` file metadata key); pass it back as
+    `continuation` with the same filters to fetch the next page.
+    """
+    if admin_api_key:
+        if not ADMIN_API_TOKEN or not secrets.compare_digest(admin_api_key.encode(), ADMIN_API_TOKEN.encode()):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or missing admin token.")
+        scope_user_id = user_id # None exports all users
+    else:
+        current_user = await get_current_user(api_key, identity, db)
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot export another user's transcripts")
+        scope_user_id = current_user.id
+
+    after_id = decode_continuation_token(continuation) if continuation else 0
+    logger.info(f"Bulk export ({export_format.value}) for user {scope_user_id if scope_user_id is not None else 'ALL'} after id {after_id}")
+
+    return StreamingResponse(
+        stream_bulk_export(export_format, scope_user_id, start, end, after_id, limit),
+        media_type=BULK_EXPORT_MEDIA_TYPES[export_format]
+    )
+
+# --- Keyword Sets ---
+
+async def _get_user_keyword_set(set_id: int, current_user: User, db: AsyncSession) -> KeywordSet:
+    keyword_set = await db.get(KeywordSet, set_id)
+    if not keyword_set or keyword_set.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Keyword set not found")
+    return keyword_set
+
+def _check_keyword_limit(keyword_set_in: KeywordSetCreate):
+    if len(keyword_set_in.keywords) > KEYWORD_SET_MAX_KEYWORDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A keyword set can have at most {KEYWORD_SET_MAX_KEYWORDS} keywords"
+        )
+
+@app.get("/keyword-sets",
+         response_model=KeywordSetListResponse,
+         summary="List the current user's keyword sets")
+async def list_keyword_sets(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(KeywordSet).where(KeywordSet.user_id == current_user.id).order_by(KeywordSet.id))
+    return KeywordSetListResponse(keyword_sets=[KeywordSetResponse.from_orm(s) for s in result.scalars().all()])
+
+@app.post("/keyword-sets",
+          response_model=KeywordSetResponse,
+          status_code=status.HTTP_201_CREATED,
+          summary="Create a keyword set to be alerted on")
+async def create_keyword_set(
+    keyword_set_in: KeywordSetCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Keywords spoken in any of the user's meetings are published to the `keyword_hits` Redis stream."""
+    _check_keyword_limit(keyword_set_in)
+    set_count = await db.scalar(select(func.count(KeywordSet.id)).where(KeywordSet.user_id == current_user.id))
+    if set_count >= KEYWORD_SETS_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A user can have at most {KEYWORD_SETS_PER_USER} keyword sets"
+        )
+    keyword_set = KeywordSet(user_id=current_user.id, name=keyword_set_in.name, keywords=keyword_set_in.keywords, version=1)
+    db.add(keyword_set)
+    await db.commit()
+    await db.refresh(keyword_set)
+    logger.info(f"Created keyword set {keyword_set.id} with {len(keyword_set.keywords)} keywords for user {current_user.id}")
+    await publish_keyword_set_change(redis_client, keyword_set.id)
+    return KeywordSetResponse.from_orm(keyword_set)
+
+@app.put("/keyword-sets/{set_id}",
+         response_model=KeywordSetResponse,
+         summary="Replace a keyword set")
+async def update_keyword_set(
+    set_id: int,
+    keyword_set_in: KeywordSetCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    _check_keyword_limit(keyword_set_in)
+    keyword_set = await _get_user_keyword_set(set_id, current_user, db)
+    keyword_set.name = keyword_set_in.name
+    keyword_set.keywords = keyword_set_in.keywords
+    keyword_set.version += 1
+    await db.commit()
+    await db.refresh(keyword_set)
+    logger.info(f"Updated keyword set {set_id} to v{keyword_set.version} for user {current_user.id}")
+    await publish_keyword_set_change(redis_client, set_id)
+    return KeywordSetResponse.from_orm(keyword_set)
+
+@app.delete("/keyword-sets/{set_id}",
+            status_code=status.HTTP_204_NO_CONTENT,
+            summary="Delete a keyword set")
+async def delete_keyword_set(
+    set_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    keyword_set = await _get_user_keyword_set(set_id, current_user, db)
+    await db.delete(keyword_set)
+    await db.commit()
+    logger.info(f"Deleted keyword set {set_id} for user {current_user.id}")
+    await publish_keyword_set_change(redis_client, set_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # ADD Helper for token validation (or ensure it exists in an auth.py)
 async def get_user_by_token(token: str, db: AsyncSession) -> Optional[User]:
@@ -379,13 +749,9 @@ async def get_user_by_token(token: str, db: AsyncSession) -> Optional[User]:
     if not token:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing API token")
     
-    result = await db.execute(
-        select(User).join(APIToken).where(APIToken.token == token)
-    )
-    user = result.scalars().first()
-    
+    user = await auth_cache.authenticate(token, db)
     if not user:
-        logger.warning(f"Invalid API token provided in WebSocket handshake: {token[:5]}...")
+        logger.warning("Invalid API token provided in WebSocket handshake")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid API token"
@@ -0,0 +1,228 @@
+import re
+import os
+import logging
+import importlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("transcription_collector.redaction")
+
+# Redact PII from segments before they are stored
+REDACTION_ENABLED = os.environ.get("REDACTION_ENABLED", "true").lower() == "true"
+
+# Built-in rules, by label. Order matters: at a given position the first matching rule that
+# passes its check wins, so card numbers are tried before the (shorter) phone number shapes.
+BUILTIN_REDACTION_RULES = {
+    "email": r"(?<![\w.+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}(?!\w)",
+    "card": r"(?<![\w+])\d(?:[ -]?\d){12,18}(?!\w)",
+    "phone": r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{2,4}\)|\d{2,4})[ .-]?\d{3,4}[ .-]?\d{3,4}(?!\w)",
+}
+
+# Label used for dictionary terms
+TERMS_LABEL = "redacted"
+
+def luhn_valid(digits: str) -> bool:
+    """Checksum used by payment card numbers; keeps arbitrary long numbers from being redacted as cards."""
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        n = int(char)
+        if i % 2:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return total % 10 == 0
+
+# Extra checks per built-in label; where a match fails its check, the rules after it are tried
+_VALIDATORS = {
+    "card": lambda match: luhn_valid(re.sub(r"\D", "", match)),
+}
+
+def trie_pattern(terms: Sequence[str]) -> str:
+    """
+    Builds a regex matching any of the terms with shared prefixes factored out
+    ("sam|samuel|sara" -> "sa(?:m(?:uel)?|ra)"), so matching cost at each position
+    depends on the term length rather than on the number of terms.
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {} # End of a term
+
+    def emit(node: dict) -> str:
+        optional = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            # A term may end here, but longer terms through this node are preferred
+            body = f"(?:{body})?" if len(branches) > 1 or len(body) > 1 else f"{body}?"
+        return body
+
+    return emit(trie)
+
+class Redactor:
+    """
+    Replaces PII in segment text with [LABEL] placeholders.
+
+    All rules - built-in patterns, custom patterns and dictionary terms - are compiled
+    into one alternation of named groups, so each segment is scanned once regardless
+    of how many rules are enabled.
+    """
+
+    def __init__(self, profile: Optional[dict] = None):
+        """
+        Args:
+            profile: Optional per-tenant FilterProfileConfig (as a dict) layered over filter_config.py
+        """
+        self.rules: Dict[str, str] = {}
+        self.terms: List[str] = []
+
+        self.load_config()
+        if profile:
+            self.apply_profile(profile)
+        self.compile()
+
+    def load_config(self):
+        """Load redaction rules from filter_config.py"""
+        try:
+            config = importlib.import_module('filter_config')
+
+            enabled = getattr(config, 'REDACTION_RULES', list(BUILTIN_REDACTION_RULES))
+            unknown = [label for label in enabled if label not in BUILTIN_REDACTION_RULES]
+            if unknown:
+                logger.warning(f"Ignoring unknown built-in redaction rules: {unknown}")
+            self.rules = {label: BUILTIN_REDACTION_RULES[label] for label in BUILTIN_REDACTION_RULES if label in enabled}
+
+            if hasattr(config, 'REDACTION_PATTERNS'):
+                self.rules.update(config.REDACTION_PATTERNS)
+                logger.info(f"Added {len(config.REDACTION_PATTERNS)} redaction patterns from config")
+
+            if hasattr(config, 'REDACTION_TERMS'):
+                self.terms.extend(config.REDACTION_TERMS)
+                logger.info(f"Added {len(config.REDACTION_TERMS)} redaction terms from config")
+        except ImportError:
+            logger.warning("No filter_config.py found, using built-in redaction rules")
+            self.rules = dict(BUILTIN_REDACTION_RULES)
+        except Exception as e:
+            logger.error(f"Error loading redaction configuration: {e}")
+            self.rules = dict(BUILTIN_REDACTION_RULES)
+
+    def apply_profile(self, profile: dict):
+        """Layer a filter profile's redaction rules over the loaded configuration"""
+        self.rules.update(profile.get('redaction_patterns') or {})
+        self.terms.extend(profile.get('redaction_terms') or [])
+
+    def compile(self):
+        """Compile all rules into a single matcher. Must be called again after changing rules or terms."""
+        self._labels = {}
+        self._parts: List[Tuple[str, str]] = [] # (label, named group)
+        for i, (label, pattern) in enumerate(self.rules.items()):
+            group = f"_r{i}"
+            self._labels[group] = label
+            self._parts.append((label, f"(?P<{group}>{pattern})"))
+        terms = sorted({t.strip().lower() for t in self.terms if t.strip()})
+        if terms:
+            # Whole words, any case; the trie prefers longer terms, so "John Smith" wins over "John"
+            self._labels["_terms"] = TERMS_LABEL
+            self._parts.append((TERMS_LABEL, f"(?P<_terms>(?i:(?<!\\w)(?:{trie_pattern(terms)})(?!\\w)))"))
+        parts = [part for _, part in self._parts]
+        # Matchers without the rules whose checks rejected a match, by the rejected labels
+        self._without: Dict[frozenset, Optional[re.Pattern]] = {}
+
+        self._fallback_rules = None
+        if not parts:
+            self._matcher = None
+            return
+        try:
+            self._matcher = re.compile("|".join(parts))
+        except re.error as e:
+            # Patterns using numbered backreferences cannot be combined; apply them one by one
+            logger.warning(f"Could not combine redaction rules ({e}), applying them individually")
+            self._matcher = None
+            self._fallback_rules = [(label, re.compile(pattern)) for label, pattern in self.rules.items()]
+            if terms:
+                self._fallback_rules.append((TERMS_LABEL, re.compile(parts[-1])))
+
+    def _matcher_without(self, labels: frozenset) -> Optional[re.Pattern]:
+        if labels not in self._without:
+            parts = [part for label, part in self._parts if label not in labels]
+            self._without[labels] = re.compile("|".join(parts)) if parts else None
+        return self._without[labels]
+
+    def _replacement(self, label: str, match: re.Match) -> Optional[str]:
+        """Placeholder for a match, or None if the match fails its rule's check."""
+        validator = _VALIDATORS.get(label)
+        if validator is not None and not validator(match.group(0)):
+            return None
+        return f"[{label.upper()}]"
+
+    def redact(self, text: str) -> Tuple[str, int]:
+        """
+        Args:
+            text (str): Segment text
+
+        Returns:
+            Tuple[str, int]: Redacted text and the number of replacements made
+        """
+        count = 0
+
+        def substitute(match, label=None):
+            nonlocal count
+            replacement = self._replacement(label or self._labels[match.lastgroup], match)
+            if replacement is None:
+                return match.group(0)
+            count += 1
+            return replacement
+
+        if self._matcher is not None:
+            return self._redact_combined(text)
+        for label, pattern in self._fallback_rules or []:
+            text = pattern.sub(lambda m, label=label: substitute(m, label), text)
+        return text, count
+
+    def _redact_combined(self, text: str) -> Tuple[str, int]:
+        """
+        One scan with the combined matcher. A match rejected by its rule's check (e.g. a digit run
+        failing Luhn) is matched again at the same position without that rule, so the text it
+        covered is still seen by the remaining rules (e.g. as phone numbers).
+        """
+        out = []
+        count = 0
+        pos = 0
+        match = self._matcher.search(text)
+        while match is not None:
+            start = match.start()
+            rejected = frozenset()
+            replacement = None
+            while match is not None:
+                label = self._labels[match.lastgroup]
+                replacement = self._replacement(label, match)
+                if replacement is not None:
+                    break
+                rejected |= {label}
+                matcher = self._matcher_without(rejected)
+                match = matcher.match(text, start) if matcher is not None else None
+            if replacement is not None and match.end() > start:
+                out.append(text[pos:start])
+                out.append(replacement)
+                count += 1
+                pos = match.end()
+                match = self._matcher.search(text, pos)
+            else:
+                # Nothing to redact here; resume after this position (text up to pos is copied later)
+                match = self._matcher.search(text, start + 1)
+        out.append(text[pos:])
+        return "".join(out), count
+
+    def redact_segments(self, texts: Sequence[str]) -> Tuple[List[str], int]:
+        """Redacts a batch of segment texts. Returns the texts and the total number of replacements."""
+        redacted = []
+        total = 0
+        for text in texts:
+            text, count = self.redact(text)
+            redacted.append(text)
+            total += count
+        return redacted, total
@@ -0,0 +1,97 @@
+import os
+import re
+import hashlib
+import logging
+from collections import OrderedDict, Counter, deque
+from typing import List, Sequence, Tuple
+
+logger = logging.getLogger("transcription_collector.repetition")
+
+# A segment is suppressed once its normalized text already occurred REPETITION_MAX_REPEATS
+# times among the meeting's last REPETITION_WINDOW distinct segments
+REPETITION_WINDOW = int(os.environ.get("REPETITION_WINDOW", "12"))
+REPETITION_MAX_REPEATS = int(os.environ.get("REPETITION_MAX_REPEATS", "3"))
+# Meetings whose windows are kept in memory (least recently active are dropped first)
+REPETITION_MAX_MEETINGS = int(os.environ.get("REPETITION_MAX_MEETINGS", "10000"))
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Lowercases and strips punctuation so 'Thank you.' and 'thank you' compare equal."""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub("", text.lower())).strip()
+
+def fingerprint(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode(), digest_size=8).digest()
+
+class _MeetingWindow:
+    __slots__ = ("entries", "counts", "seen")
+
+    def __init__(self):
+        self.entries = deque() # (fingerprint, start bucket)
+        self.counts = Counter() # fingerprint -> occurrences in window
+        self.seen = set() # (fingerprint, start bucket) in window
+
+class RepetitionSuppressor:
+    """
+    Detects segments repeated across a meeting's stream, e.g. Whisper emitting
+    "Thank you." over and over during silence, using a bounded per-meeting window
+    of normalized-text fingerprints.
+
+    Re-sent revisions of the same segment (same text, same start) are not counted as
+    repetitions; they are left to deduplication and transcript finalization.
+    """
+
+    def __init__(self, window: int = REPETITION_WINDOW, max_repeats: int = REPETITION_MAX_REPEATS,
+                 max_meetings: int = REPETITION_MAX_MEETINGS):
+        self.window = window
+        self.max_repeats = max_repeats
+        self.max_meetings = max_meetings
+        self._meetings: "OrderedDict[int, _MeetingWindow]" = OrderedDict()
+
+    def _window_for(self, meeting_id: int) -> _MeetingWindow:
+        state = self._meetings.get(meeting_id)
+        if state is None:
+            state = self._meetings[meeting_id] = _MeetingWindow()
+            if len(self._meetings) > self.max_meetings:
+                self._meetings.popitem(last=False)
+        else:
+            self._meetings.move_to_end(meeting_id)
+        return state
+
+    def check(self, meeting_id: int, segments: Sequence[Tuple[str, float]]) -> List[bool]:
+        """
+        Args:
+            meeting_id: Internal meeting ID
+            segments: (text, start_time) of each segment, in stream order
+
+        Returns:
+            List[bool]: True for each segment to keep, False for suppressed repetitions
+        """
+        state = self._window_for(meeting_id)
+        decisions = []
+        for text, start_time in segments:
+            fp = fingerprint(text)
+            entry = (fp, round(start_time, 1))
+            if entry in state.seen:
+                decisions.append(True) # Revision of a segment already in the window
+                continue
+            keep = state.counts[fp] < self.max_repeats
+            if not keep:
+                logger.debug("Suppressing repeated segment for meeting %s: %r", meeting_id, text)
+            decisions.append(keep)
+
+            state.entries.append(entry)
+            state.counts[fp] += 1
+            state.seen.add(entry)
+            if len(state.entries) > self.window:
+                old_fp, old_start = state.entries.popleft()
+                state.seen.discard((old_fp, old_start))
+                state.counts[old_fp] -= 1
+                if not state.counts[old_fp]:
+                    del state.counts[old_fp]
+        return decisions
+
+    def forget(self, meeting_id: int):
+        """Drops a meeting's window (its stream ended); the LRU bound only catches meetings never forgotten."""
+        self._meetings.pop(meeting_id, None)
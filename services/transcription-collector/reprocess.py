@@ -0,0 +1,255 @@
+"""
+Re-applies the current filter and redaction rules to stored transcript segments.
+
+Segments are read in keyset-paged batches (id order) up to the highest id present
+when the job starts, so rows written by live ingest meanwhile - which already went
+through the current pipeline - are left alone. Each batch is evaluated on a process
+pool; rejected segments are deleted and segments whose redacted text differs are
+updated, in one short transaction per batch. Progress is checkpointed after every
+batch, so an interrupted run resumes where it stopped.
+
+Usage:
+    python reprocess.py --dry-run
+    python reprocess.py --batch-size 2000 --max-rows-per-second 5000
+    python reprocess.py --user-id 42 --restart
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete, update, bindparam, func, text
+
+from shared_models.database import async_session_local
+from shared_models.models import Transcription, Meeting, FilterProfile, TranscriptDocument
+from shared_models.transcripts import finalize_meeting_transcript
+from filters import TranscriptionFilter
+from redaction import Redactor, REDACTION_ENABLED
+
+logger = logging.getLogger("transcription_collector.reprocess")
+
+REPROCESS_CHECKPOINT_FILE = os.environ.get("REPROCESS_CHECKPOINT_FILE", "reprocess_checkpoint.json")
+# Postgres lock wait per statement, so the job backs off instead of queueing behind ingest
+REPROCESS_LOCK_TIMEOUT = os.environ.get("REPROCESS_LOCK_TIMEOUT", "5s")
+
+# (id, meeting_id, user_id, text, language)
+SegmentRow = Tuple[int, int, int, str, Optional[str]]
+# (id, new_text or None to delete)
+SegmentChange = Tuple[int, Optional[str]]
+
+# --- Worker side ---
+
+_profile_configs: Dict[Tuple[int, Optional[int]], dict] = {}
+_compiled: Dict[Optional[Tuple[int, Optional[int]]], Tuple[TranscriptionFilter, Redactor]] = {}
+
+def _init_worker(profile_configs: Dict[Tuple[int, Optional[int]], dict], log_level: str):
+    global _profile_configs
+    logging.basicConfig(level=log_level)
+    _profile_configs = profile_configs
+    _compiled.clear()
+
+def _rules_for(user_id: int, meeting_id: int) -> Tuple[TranscriptionFilter, Redactor]:
+    """Same resolution as ingest: meeting profile, else user profile, else the default rules."""
+    key = (user_id, meeting_id) if (user_id, meeting_id) in _profile_configs else (user_id, None)
+    if key not in _profile_configs:
+        key = None
+    rules = _compiled.get(key)
+    if rules is None:
+        config = _profile_configs[key] if key else None
+        rules = _compiled[key] = (TranscriptionFilter(config), Redactor(config))
+    return rules
+
+def _evaluate(rows: List[SegmentRow], redact: bool) -> List[SegmentChange]:
+    """Runs in a pool worker: returns the changes the current rules make to the rows."""
+    changes = []
+    for row_id, meeting_id, user_id, text, language in rows:
+        segment_filter, redactor = _rules_for(user_id, meeting_id)
+        if not segment_filter.filter_segment(text, language or 'en'):
+            changes.append((row_id, None))
+            continue
+        if redact:
+            redacted, count = redactor.redact(text)
+            if count:
+                changes.append((row_id, redacted))
+    return changes
+
+# --- Checkpoints ---
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+# --- Job ---
+
+async def load_profile_configs() -> Dict[Tuple[int, Optional[int]], dict]:
+    async with async_session_local() as db:
+        result = await db.execute(select(FilterProfile))
+        return {(p.user_id, p.meeting_id): p.config for p in result.scalars().all()}
+
+def _scope_filters(args) -> list:
+    filters = []
+    if args.user_id is not None:
+        filters.append(Meeting.user_id == args.user_id)
+    if args.meeting_id is not None:
+        filters.append(Transcription.meeting_id == args.meeting_id)
+    return filters
+
+async def fetch_batch(after_id: int, end_id: int, limit: int, scope: list) -> List[SegmentRow]:
+    stmt = select(
+        Transcription.id, Transcription.meeting_id, Meeting.user_id, Transcription.text, Transcription.language
+    ).join(Meeting, Meeting.id == Transcription.meeting_id).where(
+        Transcription.id > after_id, Transcription.id <= end_id, *scope
+    ).order_by(Transcription.id).limit(limit)
+    async with async_session_local() as db:
+        result = await db.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+async def apply_changes(changes: List[SegmentChange], meeting_ids: Dict[int, int]) -> List[int]:
+    """
+    Applies one batch of deletes/updates in a single transaction.
+    Returns the meetings whose finalized documents were dropped.
+    """
+    deletes = [row_id for row_id, new_text in changes if new_text is None]
+    updates = [{"row_id": row_id, "new_text": new_text} for row_id, new_text in changes if new_text is not None]
+    affected = sorted({meeting_ids[row_id] for row_id, _ in changes})
+
+    async with async_session_local() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(text(f"SET LOCAL lock_timeout = '{REPROCESS_LOCK_TIMEOUT}'"))
+        if deletes:
+            await db.execute(delete(Transcription).where(Transcription.id.in_(deletes)))
+        if updates:
+            table = Transcription.__table__
+            await db.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(text=bindparam("new_text")),
+                updates
+            )
+        result = await db.execute(select(TranscriptDocument.meeting_id).where(TranscriptDocument.meeting_id.in_(affected)))
+        finalized = result.scalars().all()
+        if finalized:
+            await db.execute(delete(TranscriptDocument).where(TranscriptDocument.meeting_id.in_(finalized)))
+        await db.commit()
+    return finalized
+
+async def refinalize(meeting_ids: List[int]):
+    for meeting_id in meeting_ids:
+        async with async_session_local() as db:
+            try:
+                await finalize_meeting_transcript(db, meeting_id)
+            except Exception as e:
+                logger.error(f"Failed to re-finalize meeting {meeting_id}: {e}", exc_info=True)
+                await db.rollback()
+
+async def run(args) -> dict:
+    scope = _scope_filters(args)
+    redact = REDACTION_ENABLED and not args.skip_redaction
+
+    job_scope = {"user_id": args.user_id, "meeting_id": args.meeting_id, "redact": redact}
+
+    checkpoint = None if args.restart or args.dry_run else load_checkpoint(args.checkpoint_file)
+    if checkpoint:
+        if checkpoint.get("scope") != job_scope:
+            raise SystemExit(f"Checkpoint {args.checkpoint_file} belongs to a job with scope {checkpoint.get('scope')}; use --restart to discard it")
+        logger.info(f"Resuming from checkpoint: {checkpoint}")
+    else:
+        async with async_session_local() as db:
+            end_id = await db.scalar(select(func.max(Transcription.id))) or 0
+        checkpoint = {"scope": job_scope, "after_id": 0, "end_id": end_id, "scanned": 0, "deleted": 0, "updated": 0, "refinalize": []}
+
+    profile_configs = await load_profile_configs()
+    loop = asyncio.get_running_loop()
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(profile_configs, logging.getLevelName(logger.getEffectiveLevel()))
+    )
+    started = time.monotonic()
+    try:
+        while True:
+            batch_started = time.monotonic()
+            rows = await fetch_batch(checkpoint["after_id"], checkpoint["end_id"], args.batch_size, scope)
+            if not rows:
+                break
+
+            chunk_size = max(1, -(-len(rows) // args.workers))
+            chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+            results = await asyncio.gather(*[loop.run_in_executor(executor, _evaluate, chunk, redact) for chunk in chunks])
+            changes = [change for result in results for change in result]
+
+            deleted = sum(1 for _, new_text in changes if new_text is None)
+            if args.dry_run:
+                texts = {row[0]: row[3] for row in rows}
+                for row_id, new_text in changes[:args.show]:
+                    action = "DELETE" if new_text is None else f"UPDATE -> '{new_text}'"
+                    logger.info(f"[dry-run] segment {row_id} '{texts[row_id]}': {action}")
+            elif changes:
+                finalized = await apply_changes(changes, {row[0]: row[1] for row in rows})
+                checkpoint["refinalize"] = sorted(set(checkpoint["refinalize"]) | set(finalized))
+
+            checkpoint["after_id"] = rows[-1][0]
+            checkpoint["scanned"] += len(rows)
+            checkpoint["deleted"] += deleted
+            checkpoint["updated"] += len(changes) - deleted
+            if not args.dry_run:
+                save_checkpoint(args.checkpoint_file, checkpoint)
+            logger.info(
+                f"Processed up to id {checkpoint['after_id']}/{checkpoint['end_id']}: scanned {checkpoint['scanned']}, "
+                f"{'would delete' if args.dry_run else 'deleted'} {checkpoint['deleted']}, "
+                f"{'would update' if args.dry_run else 'updated'} {checkpoint['updated']}"
+            )
+
+            if args.max_rows_per_second:
+                # Throttle to the configured rate, leaving headroom for live ingest
+                remaining = len(rows) / args.max_rows_per_second - (time.monotonic() - batch_started)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+    finally:
+        executor.shutdown()
+
+    if checkpoint["refinalize"]:
+        # Documents dropped by the job are rebuilt from the reprocessed rows
+        logger.info(f"Re-finalizing {len(checkpoint['refinalize'])} meeting transcripts")
+        await refinalize(checkpoint["refinalize"])
+        checkpoint["refinalize"] = []
+        save_checkpoint(args.checkpoint_file, checkpoint)
+    logger.info(f"Reprocessing {'dry run ' if args.dry_run else ''}finished in {time.monotonic() - started:.1f}s: {checkpoint}")
+    return checkpoint
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per keyset page and transaction")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Filter worker processes")
+    parser.add_argument("--max-rows-per-second", type=float, default=2000, help="Throttle (0 = unlimited)")
+    parser.add_argument("--user-id", type=int, help="Only this user's segments")
+    parser.add_argument("--meeting-id", type=int, help="Only this meeting's segments (internal id)")
+    parser.add_argument("--skip-redaction", action="store_true", help="Only re-filter, do not re-redact")
+    parser.add_argument("--checkpoint-file", default=REPROCESS_CHECKPOINT_FILE)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--show", type=int, default=20, help="Dry run: changes logged per batch")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,13 @@ import os
 from urllib.parse import urljoin
 import time # Import time for sleep
 import re # Import re for parsing meeting ID
+import logging
 
 # Default Base URL (can be overridden)
 DEFAULT_BASE_URL = "http://localhost:8056" 
 
+logger = logging.getLogger("vexa_client")
+
 class VexaClientError(Exception):
     """Custom exception for Vexa client errors."""
     pass
@@ -82,12 +85,6 @@ class VexaClient:
         url = urljoin(self.base_url, path)
         headers = self._get_headers(api_type)
         
-        # Debug output - print URL and headers for troubleshooting
-        print(f"\nDEBUG: Making {method} request to {url}")
-        print(f"DEBUG: Headers: {headers}")
-        print(f"DEBUG: Params: {params}")
-        print(f"DEBUG: JSON data: {json_data}")
-        
         try:
             response = self._session.request(
                 method=method,
@@ -96,14 +93,8 @@ class VexaClient:
                 params=params,
                 json=json_data
             )
-            # Debug response
-            print(f"DEBUG: Response status: {response.status_code}")
-            print(f"DEBUG: Response headers: {dict(response.headers)}")
-            try:
-                print(f"DEBUG: Response content: {response.text[:500]}...")
-            except:
-                print(f"DEBUG: Could not display response content")
-                
+            logger.debug("%s %s -> %s (%d bytes)", method, url, response.status_code, len(response.content))
+
             response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
             
             # Handle cases where response might be empty (e.g., 204 No Content)